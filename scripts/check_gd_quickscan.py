@@ -2,99 +2,131 @@
 """
 Quick static checker for a Godot project folder.
 Checks:
- - Each .gd script contains at least one 'func' line.
- - Scans for obvious undeclared identifiers mentioned in error logs pattern:
-   (simple heuristic) X referenced but no `class_name` or var declaration found in any file
- - Scans .tscn ext_resource paths and reports missing files.
+ - Each .gd script tokenizes: no unterminated string or unbalanced bracket
+   (possible syntax/truncated file).
+ - Capitalized identifiers (classes, types, constants) used in a script resolve
+   to a declaration in the script or a script it extends, a class_name, an
+   autoload from project.godot, or an engine built-in. Names from
+   'Identifier "X" not declared' errors in *.log files are listed too.
+ - .tscn ext_resource paths and .gd preload()/load() paths exist on disk.
+Scripts are tokenized by gdscript_scan.py and results are cached in
+.build/project_index.sqlite by project_index.py (both next to this
+script), so only files changed since the last run are re-scanned, across
+a process pool when there are many.
 Usage:
     python3 scripts/check_gd_quickscan.py /path/to/project_root
 """
-import sys, os, re, json
+import sys
 from pathlib import Path
 
+from gdscript_scan import is_builtin
+from godot_scene import iter_sections
+from project_index import ProjectIndex
+
 ROOT = Path(sys.argv[1]) if len(sys.argv) > 1 else Path.cwd()
 print(f"[quickscan] project root: {ROOT}")
 
+index = ProjectIndex(ROOT)
+stats = index.stats
+print(f"[quickscan] index: {stats['parsed']} of {stats['files']} files re-parsed ({stats['seconds'] * 1000:.0f} ms)")
+
 # 1) gather scripts and scene files
-gd_files = list(ROOT.rglob("*.gd"))
-tscn_files = list(ROOT.rglob("*.tscn"))
+gd_files = index.files("gd")
+tscn_files = index.files("tscn")
 
 print(f"[quickscan] Found {len(gd_files)} .gd files and {len(tscn_files)} .tscn files")
 
-# 2) Check .gd files have 'func' and collect class_name / exported names / identifiers (simple)
-all_identifiers = set()
-class_names = set()
-func_counts = {}
-for p in gd_files:
-    txt = p.read_text(encoding='utf8', errors='ignore')
-    func_counts[p] = len(re.findall(r'(^|\n)\s*func\s+', txt))
-    # collect 'class_name' declarations
-    for m in re.finditer(r'class_name\s+([A-Za-z0-9_]+)', txt):
-        class_names.add(m.group(1))
-    # collect exported variable names and simple var names (heuristic)
-    for m in re.finditer(r'\bvar\s+([A-Za-z0-9_]+)', txt):
-        all_identifiers.add(m.group(1))
-    for m in re.finditer(r'\b([A-Za-z0-9_]+)\s*\(', txt):
-        # function call names, may be identifiers, keep
-        all_identifiers.add(m.group(1))
-
-# detect gd files missing func
-missing_funcs = [str(p) for p,c in func_counts.items() if c == 0]
-
-# 3) parse tscn ext_resource entries and check files exist
+
+def res_path(path):
+    """res:// path -> path relative to ROOT"""
+    return path[len("res://"):] if path.startswith("res://") else path
+
+
+# 2) symbol table: per-script declarations, class_names, autoloads
+declared = {p: set() for p in gd_files}
+extends = {}
+refs = []
+loads = []
+for p, kind, name, line in index.symbols():
+    if kind == "ref":
+        refs.append((p, name, line))
+    elif kind == "extends":
+        extends[p] = name
+    elif kind in ("preload", "load"):
+        loads.append((p, name, line))
+    elif kind not in ("resource", "undeclared"):
+        declared[p].add(name)
+
+class_names = {name: p for p, _, name, _ in index.symbols(kind="class_name")}
+autoloads = set()
+project_file = ROOT / "project.godot"
+if project_file.exists():
+    for section in iter_sections(project_file.read_text(encoding="utf8", errors="ignore"), str(project_file)):
+        if section.tag == "autoload":
+            autoloads.update(section.properties)
+
+
+def visible_names(p, seen=()):
+    """Names declared in script p and the project scripts it extends"""
+    names = set(declared.get(p, ()))
+    parent = extends.get(p)
+    parent = class_names.get(parent) or (res_path(parent) if parent and "/" in parent else None)
+    if parent in declared and parent not in seen:
+        names |= visible_names(parent, (*seen, p))
+    return names
+
+
+syntax_errors = [(p, error) for p, error in index.errors() if p.endswith(".gd")]
+
+# 3) unresolved identifiers, with the first place each is used
+undeclared = {}
+scope_cache = {}
+for p, name, line in refs:
+    if name in class_names or name in autoloads or is_builtin(name):
+        continue
+    if p not in scope_cache:
+        scope_cache[p] = visible_names(p)
+    if name not in scope_cache[p]:
+        undeclared.setdefault(name, f"{p}:{line}")
+for p, _, name, line in index.symbols(kind="undeclared"):
+    undeclared.setdefault(name, f"{p}:{line} (log)")
+
+# 4) ext_resource and preload/load paths that do not exist
 missing_resources = []
-for t in tscn_files:
-    txt = t.read_text(encoding='utf8', errors='ignore')
-    for m in re.finditer(r'ext_resource path=\"([^\"]+)\"', txt):
-        path = m.group(1)
-        # res:// mapping to real file path: convert res:// to root if present
-        real = path
-        if path.startswith("res://"):
-            real = str(ROOT / path[7:])
-        if not os.path.exists(real):
-            missing_resources.append((str(t), path, real))
-
-# 4) simple "undeclared" heuristic: search for tokens used that don't appear as class_name/var
-# This is very noisy; restrict to likely suspects by scanning grep for 'Identifier "X" not declared' patterns in any log files
-undeclared_candidates = set()
-# Look for explicit error / TODO tokens in code or comments, else skip
-error_patterns = re.compile(r'Identifier\s+"?([A-Za-z0-9_]+)"?\s+not declared', re.IGNORECASE)
-# scan recent .log files if exist
-for lf in ROOT.rglob("*.log"):
-    text = lf.read_text(errors='ignore')
-    for mm in error_patterns.finditer(text):
-        undeclared_candidates.add(mm.group(1))
-# Also look inside scripts for suspicious capitalized names that are not class_name
-for idname in list(all_identifiers)[:]:
-    if idname[0].isupper() and idname not in class_names:
-        undeclared_candidates.add(idname)
+for t, _, _, path in index.ext_resources():
+    if t.endswith(".tscn") and path and not (ROOT / res_path(path)).exists():
+        missing_resources.append((t, path))
+for p, path, line in loads:
+    if path.startswith("res://") and not (ROOT / res_path(path)).exists():
+        missing_resources.append((f"{p}:{line}", path))
+index.close()
 
 # Print report
 ok = True
 print("---- quickscan report ----")
-if missing_funcs:
+if syntax_errors:
     ok = False
-    print(f"[ERROR] {len(missing_funcs)} .gd files appear to have zero 'func' definitions (possible syntax/truncated file):")
-    for p in missing_funcs[:20]:
-        print("  -", p)
+    print(f"[ERROR] {len(syntax_errors)} .gd files fail to tokenize (possible syntax/truncated file):")
+    for p, error in syntax_errors[:20]:
+        print(f"  - {p}: {error}")
 else:
-    print("[OK] All .gd files contain at least one 'func' (quick heuristic).")
+    print("[OK] All .gd files tokenize cleanly.")
 
 if missing_resources:
     ok = False
-    print(f"[ERROR] {len(missing_resources)} missing ext_resource files referenced in .tscn:")
-    for t,path,real in missing_resources[:50]:
-        print(f"  - scene: {t} references -> {path}  (resolved:{real})  [MISSING]")
+    print(f"[ERROR] {len(missing_resources)} missing resource files referenced:")
+    for where, path in missing_resources[:50]:
+        print(f"  - {where} references -> {path}  [MISSING]")
 else:
-    print("[OK] All ext_resource paths found on disk (quick check).")
+    print("[OK] All ext_resource and preload/load paths found on disk.")
 
-if undeclared_candidates:
+if undeclared:
     ok = False
-    print(f"[WARN] Possible undeclared identifiers found (heuristic):")
-    for c in sorted(undeclared_candidates):
-        print("  -", c)
+    print(f"[WARN] {len(undeclared)} identifiers resolve to no declaration, class_name, autoload or built-in:")
+    for name in sorted(undeclared):
+        print(f"  - {name}  ({undeclared[name]})")
 else:
-    print("[OK] No obvious undeclared identifier candidates found by heuristic.")
+    print("[OK] Every identifier resolves to a declaration, class_name, autoload or built-in.")
 
 print("--------------------------")
 sys.exit(0 if ok else 3)
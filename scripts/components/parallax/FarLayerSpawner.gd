@@ -16,6 +16,7 @@ func _ready():
 	spawn_x = 3000.0 # Well off-screen right (account for large monument width)
 	motion_scale = 0.2
 	layer_y_offset = 120.0 # Far layer too high - move down more
+	layer_name = "far"
 
 	# Load textures with region and scale data from ParallaxScalingEditor
 	texture_configs = [
@@ -5,9 +5,10 @@ class_name FrontLayerSpawner
 ## Largest scale, fastest movement (motion_scale 0.9)
 ## Trees are integrated with AQI system
 
-# Tree type configs for quick lookup
-var tree_configs: Dictionary = {}
-var non_tree_configs: Array[Dictionary] = []
+# Tree type -> texture_configs index, and per-index tree type ("" for non-trees)
+var tree_indices: Dictionary = {}
+var non_tree_indices: Array[int] = []
+var config_tree_types: Array[String] = []
 
 func _ready():
 	# Front layer settings - trees/decorations sit on horizon
@@ -21,6 +22,7 @@ func _ready():
 	spawn_x = 2000.0 # Well off-screen right
 	motion_scale = 0.9
 	layer_y_offset = -30.0 # Front layer too low - move up
+	layer_name = "front"
 
 	# Load textures with region and scale data from ParallaxScalingEditor
 	texture_configs = [
@@ -61,102 +63,39 @@ func _ready():
 		},
 	]
 
-	# Build tree config map for quick lookup
-	for config in texture_configs:
-		if config.has("type") and config["type"].begins_with("tree_"):
-			tree_configs[config["type"]] = config
-		elif not config.get("type", "").begins_with("tree_"):
-			non_tree_configs.append(config)
+	# Build tree index map for quick lookup
+	for i in texture_configs.size():
+		var tree_type: String = texture_configs[i].get("type", "")
+		if tree_type.begins_with("tree_"):
+			tree_indices[tree_type] = i
+			config_tree_types.append(tree_type)
+		else:
+			non_tree_indices.append(i)
+			config_tree_types.append("")
 
 	super._ready()
 
 # Override texture selection to use TreeSpawnManager probabilities
-func _select_texture_config() -> Dictionary:
-	"""Select texture config based on TreeSpawnManager probabilities"""
+func _select_layout_index() -> int:
+	"""Select texture config index based on TreeSpawnManager probabilities"""
 	var tree_manager = _get_tree_spawn_manager()
 
 	if tree_manager:
 		var tree_type = tree_manager.should_spawn_tree_type()
 		if tree_type != "":
-			return tree_configs.get(tree_type, {})
+			return tree_indices.get(tree_type, -1)
 
 	# Fall back to random non-tree element if no tree selected
-	if non_tree_configs.size() > 0:
-		return non_tree_configs[randi() % non_tree_configs.size()]
+	if non_tree_indices.size() > 0:
+		return non_tree_indices[randi() % non_tree_indices.size()]
 
 	# Final fallback to any config
-	return texture_configs[randi() % texture_configs.size()] if texture_configs.size() > 0 else {}
-
-# Override spawn to attach AQI sources
-func _spawn_object():
-	if object_pool.is_empty() or texture_configs.is_empty():
-		return
-
-	var sprite = object_pool.pop_back()
-	var config = _select_texture_config()
-
-	if config.is_empty():
-		object_pool.append(sprite)
-		return
-
-	sprite.texture = config["texture"]
-
-	# Apply region if specified
-	if config.has("region") and config["region"] != null:
-		sprite.region_enabled = true
-		sprite.region_rect = config["region"]
-		# Set bottom-center pivot based on region size
-		var region: Rect2 = config["region"]
-		sprite.offset = Vector2(-region.size.x / 2.0, -region.size.y)
-	else:
-		sprite.region_enabled = false
-		# Set bottom-center pivot so sprites sit on horizon
-		if sprite.texture:
-			sprite.offset = Vector2(-sprite.texture.get_width() / 2.0, -sprite.texture.get_height())
-
-	sprite.position.x = spawn_x
-
-	# Get scale from config (per-asset) or use base_scale with variance (fallback)
-	var scale_val: float
-	if config.has("scale") and config["scale"] > 0:
-		scale_val = config["scale"]
-	else:
-		scale_val = base_scale + randf_range(-scale_variance, scale_variance)
-
-	# Calculate sprite height after scaling (needed for pivot correction)
-	var sprite_height: float
-	if config.has("region") and config["region"] != null:
-		sprite_height = config["region"].size.y * scale_val
-	elif sprite.texture:
-		sprite_height = sprite.texture.get_height() * scale_val
-	else:
-		sprite_height = 0.0
-
-	# Calculate y-position using quadratic formula (gives world CENTER Y)
-	var world_center_y = quad_a + quad_b * scale_val + quad_c * scale_val * scale_val
-
-	# Convert from world space to screen space (Parallax2D uses camera-relative coords)
-	var screen_center_y = world_center_y - camera_y
-
-	# Pivot correction: quadratic formula gives CENTER Y, but we changed pivot to BOTTOM
-	# So we need to move DOWN by half the sprite height to position the bottom correctly
-	var pivot_correction = sprite_height / 2.0
-
-	# Per-asset Y offset for fine-tuning (optional)
-	var asset_y_offset = config.get("y_offset", 0.0)
-
-	# Apply layer offset, global offset, pivot correction, asset offset, and variance
-	sprite.position.y = screen_center_y + pivot_correction + layer_y_offset + global_y_offset + asset_y_offset + randf_range(-y_variance, y_variance)
-
-	sprite.scale = Vector2(scale_val, scale_val)
-	sprite.visible = true
-
-	# Attach TreeAQISource if this is a tree
-	if config.has("type") and config["type"].begins_with("tree_"):
-		_attach_tree_aqi_source(sprite, config["type"])
-
-	active_objects.append(sprite)
-	object_spawned.emit(sprite)
+	return super._select_layout_index()
+
+# Attach AQI sources to spawned trees
+func _on_object_spawned(sprite: Sprite2D, index: int) -> void:
+	if config_tree_types[index] != "":
+		_attach_tree_aqi_source(sprite, config_tree_types[index])
 
 func _get_tree_spawn_manager() -> Node:
 	"""Get TreeSpawnManager from main scene"""
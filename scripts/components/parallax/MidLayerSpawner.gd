@@ -16,6 +16,7 @@ func _ready():
 	spawn_x = 3000.0 # Well off-screen right
 	motion_scale = 0.6
 	layer_y_offset = 0.0 # Fine-tuning offset for mid layer
+	layer_name = "mid"
 
 	# Load textures with region and scale data from ParallaxScalingEditor
 	texture_configs = [
@@ -37,6 +37,26 @@ var layer_y_offset: float = 0.0
 # Positive = move DOWN (closer to road), Negative = move UP (away from road)
 @export var global_y_offset: float = 380.0
 
+# Offsets solved by tests/parallax_offsets.py - when enabled, override the values
+# above and each config's "y_offset" (layer_name picks this spawner's entry).
+# Off by default: the inspector values stay in charge until the solved ones
+# have been checked in the engine
+const SOLVED_OFFSETS_PATH = "res://data/parallax_offsets.json"
+@export var use_solved_offsets: bool = false
+var layer_name: String = ""
+
+# Spawn layout baked by tests/parallax_layout.py, one row per texture config:
+# base_y = quad(scale) - camera_y + pivot correction + global + layer + asset offsets
+const LAYOUT_PATH = "res://data/parallax_layout.json"
+const LAYOUT_VERSION = 1
+enum {COL_REGION_X, COL_REGION_Y, COL_REGION_W, COL_REGION_H, COL_WIDTH, COL_HEIGHT,
+	COL_OFFSET_X, COL_OFFSET_Y, COL_SCALE, COL_ASSET_Y_OFFSET, COL_BASE_Y}
+var layout_textures: Array[Texture2D] = []
+var layout_regions: Array[Rect2] = []
+var layout_offsets: PackedVector2Array = PackedVector2Array()
+var layout_scales: PackedFloat32Array = PackedFloat32Array()
+var layout_base_y: PackedFloat32Array = PackedFloat32Array()
+
 var object_pool: Array[Sprite2D] = []
 var active_objects: Array[Sprite2D] = []
 var spawn_timer: float = 0.0
@@ -45,9 +65,124 @@ var scroll_speed: float = 300.0
 var motion_scale: float = 1.0
 
 func _ready():
+	if use_solved_offsets:
+		_apply_solved_offsets()
+	if not _load_layout():
+		_bake_layout()
 	_create_pool()
 	next_spawn_time = randf_range(0.5, spawn_interval_min)
 
+func _apply_solved_offsets():
+	if not FileAccess.file_exists(SOLVED_OFFSETS_PATH):
+		return
+	var file = FileAccess.open(SOLVED_OFFSETS_PATH, FileAccess.READ)
+	if not file:
+		return
+	var json = JSON.new()
+	if json.parse(file.get_as_text()) != OK or not (json.data is Dictionary):
+		push_warning("[ParallaxLayerSpawner] Could not parse %s" % SOLVED_OFFSETS_PATH)
+		return
+	var solved: Dictionary = json.data
+	var layer: Dictionary = solved.get("layers", {}).get(layer_name, {})
+	if layer.is_empty():
+		return
+	global_y_offset = solved.get("global_y_offset", global_y_offset)
+	layer_y_offset = layer.get("layer_y_offset", layer_y_offset)
+	var asset_offsets: Dictionary = layer.get("assets", {})
+	for config in texture_configs:
+		var path = config["texture"].resource_path if config.get("texture") else ""
+		if asset_offsets.has(path):
+			config["y_offset"] = asset_offsets[path]
+
+func _layout_inputs(config: Dictionary) -> Array:
+	"""Region x, y, w, h, source width, height, scale and y_offset of one texture config"""
+	var texture: Texture2D = config.get("texture")
+	var region_rect := Rect2()
+	var size := Vector2.ZERO
+	if config.get("region") != null:
+		region_rect = config["region"]
+		size = region_rect.size
+	elif texture:
+		size = texture.get_size()
+	# Configs without a scale use base_scale (scale_variance is not applied to baked rows)
+	var scale_val: float = config["scale"] if config.get("scale", 0.0) > 0 else base_scale
+	return [region_rect.position.x, region_rect.position.y, region_rect.size.x, region_rect.size.y,
+		size.x, size.y, scale_val, config.get("y_offset", 0.0)]
+
+func _layout_row(config: Dictionary) -> Array:
+	"""Layout row of one texture config, computed as tests/parallax_layout.py does"""
+	var inputs = _layout_inputs(config)
+	var width: float = inputs[4]
+	var height: float = inputs[5]
+	var scale_val: float = inputs[6]
+	var world_center_y = quad_a + quad_b * scale_val + quad_c * scale_val * scale_val
+	var base_y = world_center_y - camera_y + height * scale_val / 2.0 + global_y_offset + layer_y_offset + inputs[7]
+	return inputs.slice(0, 6) + [-width / 2.0, -height, scale_val, inputs[7], base_y]
+
+func _set_layout(rows: Array) -> void:
+	layout_textures.clear()
+	layout_regions.clear()
+	layout_offsets.clear()
+	layout_scales.clear()
+	layout_base_y.clear()
+	for i in rows.size():
+		var row: Array = rows[i]
+		layout_textures.append(texture_configs[i].get("texture"))
+		layout_regions.append(Rect2(row[COL_REGION_X], row[COL_REGION_Y], row[COL_REGION_W], row[COL_REGION_H]))
+		layout_offsets.append(Vector2(row[COL_OFFSET_X], row[COL_OFFSET_Y]))
+		layout_scales.append(row[COL_SCALE])
+		layout_base_y.append(row[COL_BASE_Y])
+
+func _bake_layout() -> void:
+	var rows := []
+	for config in texture_configs:
+		rows.append(_layout_row(config))
+	_set_layout(rows)
+
+func _load_layout() -> bool:
+	"""Use the baked table if it was built from this spawner's current configs and offsets"""
+	if not FileAccess.file_exists(LAYOUT_PATH):
+		push_warning("[ParallaxLayerSpawner] %s not found - baking the %s layer at runtime" % [LAYOUT_PATH, layer_name])
+		return false
+	var file = FileAccess.open(LAYOUT_PATH, FileAccess.READ)
+	if not file:
+		push_warning("[ParallaxLayerSpawner] Could not open %s - baking the %s layer at runtime" % [LAYOUT_PATH, layer_name])
+		return false
+	var json = JSON.new()
+	if json.parse(file.get_as_text()) != OK or not (json.data is Dictionary):
+		push_warning("[ParallaxLayerSpawner] Could not parse %s - baking the %s layer at runtime" % [LAYOUT_PATH, layer_name])
+		return false
+	var layout: Dictionary = json.data
+	var table: Dictionary = layout.get("layers", {}).get(layer_name, {})
+	if layout.get("version") != LAYOUT_VERSION or table.is_empty():
+		push_warning("[ParallaxLayerSpawner] %s has no version %d table for the %s layer - baking it at runtime" % [LAYOUT_PATH, LAYOUT_VERSION, layer_name])
+		return false
+	var constants: Array = table.get("constants", [])
+	var rows: Array = table.get("rows", [])
+	var textures: Array = table.get("textures", [])
+	# JSON numbers come back as floats, so compare with a tolerance rather than exactly
+	var expected = [quad_a, quad_b, quad_c, camera_y]
+	var stale = constants.size() != expected.size() \
+		or not is_equal_approx(table.get("global_y_offset", NAN), global_y_offset) \
+		or not is_equal_approx(table.get("layer_y_offset", NAN), layer_y_offset) \
+		or rows.size() != texture_configs.size() or textures.size() != texture_configs.size()
+	for k in expected.size():
+		stale = stale or not is_equal_approx(constants[k], expected[k])
+	var input_columns = [COL_REGION_X, COL_REGION_Y, COL_REGION_W, COL_REGION_H, COL_WIDTH, COL_HEIGHT, COL_SCALE, COL_ASSET_Y_OFFSET]
+	for i in texture_configs.size():
+		if stale:
+			break
+		var inputs = _layout_inputs(texture_configs[i])
+		var texture = texture_configs[i].get("texture")
+		stale = textures[i] != (texture.resource_path if texture else "")
+		for k in input_columns.size():
+			stale = stale or not is_equal_approx(rows[i][input_columns[k]], inputs[k])
+	if stale:
+		push_warning("[ParallaxLayerSpawner] %s is out of date for the %s layer - baking it at runtime; run tests/parallax_layout.py" % [LAYOUT_PATH, layer_name])
+		return false
+	_set_layout(rows)
+	return true
+
 func _create_pool():
 	for i in pool_size:
 		var sprite = Sprite2D.new()
@@ -86,67 +221,36 @@ func _physics_process(delta):
 			_despawn_object(obj)
 
 func _spawn_object():
-	if object_pool.is_empty() or texture_configs.is_empty():
+	if object_pool.is_empty() or layout_base_y.is_empty():
 		return
 
-	var sprite = object_pool.pop_back()
-	var config = texture_configs[randi() % texture_configs.size()]
-
-	sprite.texture = config["texture"]
-
-	# Apply region if specified
-	if config.has("region") and config["region"] != null:
-		sprite.region_enabled = true
-		sprite.region_rect = config["region"]
-		# Set bottom-center pivot based on region size
-		var region: Rect2 = config["region"]
-		sprite.offset = Vector2(-region.size.x / 2.0, -region.size.y)
-	else:
-		sprite.region_enabled = false
-		# Set bottom-center pivot so sprites sit on horizon
-		if sprite.texture:
-			sprite.offset = Vector2(-sprite.texture.get_width() / 2.0, -sprite.texture.get_height())
-
-	sprite.position.x = spawn_x
-
-	# Get scale from config (per-asset) or use base_scale with variance (fallback)
-	var scale_val: float
-	if config.has("scale") and config["scale"] > 0:
-		scale_val = config["scale"]
-	else:
-		scale_val = base_scale + randf_range(-scale_variance, scale_variance)
-
-	# Calculate sprite height after scaling (needed for pivot correction)
-	var sprite_height: float
-	if config.has("region") and config["region"] != null:
-		sprite_height = config["region"].size.y * scale_val
-	elif sprite.texture:
-		sprite_height = sprite.texture.get_height() * scale_val
-	else:
-		sprite_height = 0.0
-
-	# Calculate y-position using quadratic formula (gives world CENTER Y)
-	var world_center_y = quad_a + quad_b * scale_val + quad_c * scale_val * scale_val
-
-	# Convert from world space to screen space (Parallax2D uses camera-relative coords)
-	var screen_center_y = world_center_y - camera_y
-
-	# Pivot correction: quadratic formula gives CENTER Y, but we changed pivot to BOTTOM
-	# So we need to move DOWN by half the sprite height to position the bottom correctly
-	var pivot_correction = sprite_height / 2.0
-
-	# Per-asset Y offset for fine-tuning (optional)
-	var asset_y_offset = config.get("y_offset", 0.0)
-
-	# Apply layer offset, global offset, pivot correction, asset offset, and variance
-	sprite.position.y = screen_center_y + pivot_correction + layer_y_offset + global_y_offset + asset_y_offset + randf_range(-y_variance, y_variance)
+	var index = _select_layout_index()
+	if index < 0:
+		return
 
+	var sprite = object_pool.pop_back()
+	var region = layout_regions[index]
+	var scale_val = layout_scales[index]
+	sprite.texture = layout_textures[index]
+	sprite.region_enabled = region.has_area()
+	sprite.region_rect = region
+	sprite.offset = layout_offsets[index]
+	sprite.position = Vector2(spawn_x, layout_base_y[index] + randf_range(-y_variance, y_variance))
 	sprite.scale = Vector2(scale_val, scale_val)
 	sprite.visible = true
 
 	active_objects.append(sprite)
+	_on_object_spawned(sprite, index)
 	object_spawned.emit(sprite)
 
+func _select_layout_index() -> int:
+	"""Index into the layout (and texture_configs) of the next object; -1 spawns nothing"""
+	return randi() % layout_base_y.size()
+
+func _on_object_spawned(_sprite: Sprite2D, _index: int) -> void:
+	"""Hook for child classes, called before object_spawned is emitted"""
+	pass
+
 func _despawn_object(sprite: Sprite2D):
 	sprite.visible = false
 	active_objects.erase(sprite)
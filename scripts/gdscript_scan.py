@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+GDScript tokenizer and per-file symbol scan.
+
+check_gd_quickscan.py used whole-file regexes: `\\b(\\w+)\\s*\\(` picked up
+calls inside strings and comments, and with no notion of the engine's
+own classes every capitalized call (Vector2, Color, ...) came out as a
+possibly undeclared identifier. Here a script is tokenized once (strings,
+comments, $node paths and annotations are single tokens) and scanned for:
+
+    declarations  class_name, extends, func, var, const, signal, enum
+                  (and its members), inner class, for-loop and
+                  parameter names
+    references    capitalized identifiers that are not member accesses
+                  (after '.') - class, type and constant names that must
+                  resolve to a declaration, a class_name, an autoload or
+                  an engine built-in (BUILTINS / BUILTIN_PREFIXES)
+    loads         preload("...") / load("...") paths
+    resources     every "res://..." / "uid://..." string literal (paths
+                  built at runtime start from one: "res://data/chunks/")
+
+Declarations anywhere in the file count for the whole file: the scan is
+meant to find names that resolve nowhere, not to model scopes.
+
+Tokenizer errors (unterminated string, unbalanced bracket) are reported
+as ScanError with the line number.
+
+statements(text) splits a script into logical lines (a bracketed
+expression spanning several lines is one statement) with their
+indentation, for checks that need the block structure.
+
+Usage:
+    from gdscript_scan import scan, is_builtin
+    result = scan(text)        # {'symbols': [(kind, name, line)], 'error': None | str}
+    for line, indent, tokens in statements(text): ...
+
+    python3 scripts/gdscript_scan.py FILE.gd     # print tokens' symbols
+"""
+
+import re
+import sys
+
+TOKEN = re.compile(r'''
+    (?P<ws>[ \t\r\f]+|\\\n)
+  | (?P<newline>\n)
+  | (?P<comment>\#[^\n]*)
+  | (?P<string>(?:[r&^])?(?:"""(?:\\.|[^\\])*?"""|\'\'\'(?:\\.|[^\\])*?\'\'\'|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'))
+  | (?P<nodepath>[$%](?:"[^"\n]*"|[A-Za-z_][\w/]*))
+  | (?P<annotation>@\w+)
+  | (?P<number>0x[0-9a-fA-F_]+|0b[01_]+|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:e[+-]?\d+)?)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>->|:=|\*\*=?|<<=?|>>=?|[-+*/%&|^<>=!]=|&&|\|\||\.\.|[-+*/%&|^~<>=!.,:;()\[\]{}])
+  | (?P<unterminated>["'])
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+
+OPEN = {'(': ')', '[': ']', '{': '}'}
+
+# Variant types, engine classes and singletons a script may name without declaring
+BUILTINS = frozenset('''
+    Variant bool int float String StringName NodePath RID Object Callable Signal Dictionary Array
+    Vector2 Vector2i Vector3 Vector3i Vector4 Vector4i Rect2 Rect2i Transform2D Transform3D Plane
+    Quaternion AABB Basis Projection Color
+    PackedByteArray PackedInt32Array PackedInt64Array PackedFloat32Array PackedFloat64Array
+    PackedStringArray PackedVector2Array PackedVector3Array PackedVector4Array PackedColorArray
+    GDScript Script Resource RefCounted Node Node2D Node3D CanvasItem CanvasLayer Viewport SubViewport
+    Window SceneTree PackedScene Tween Tweener PropertyTweener MethodTweener CallbackTweener
+    IntervalTweener Timer Camera2D Camera3D Sprite2D AnimatedSprite2D SpriteFrames AnimationPlayer
+    AnimationTree Animation AnimationLibrary Area2D Area3D CollisionShape2D CollisionPolygon2D
+    CharacterBody2D RigidBody2D StaticBody2D PhysicsBody2D KinematicCollision2D RayCast2D
+    Shape2D RectangleShape2D CircleShape2D CapsuleShape2D SegmentShape2D ConvexPolygonShape2D
+    ParallaxBackground ParallaxLayer Parallax2D Line2D Polygon2D Path2D PathFollow2D Marker2D
+    CPUParticles2D GPUParticles2D PointLight2D DirectionalLight2D LightOccluder2D TileMap
+    TileMapLayer TileSet VisibleOnScreenNotifier2D VisibleOnScreenEnabler2D RemoteTransform2D
+    Control Container BoxContainer HBoxContainer VBoxContainer GridContainer MarginContainer
+    CenterContainer PanelContainer ScrollContainer SplitContainer HSplitContainer VSplitContainer
+    TabContainer FlowContainer HFlowContainer VFlowContainer AspectRatioContainer SubViewportContainer
+    Label RichTextLabel Button BaseButton CheckBox CheckButton TextureButton LinkButton MenuButton
+    OptionButton ColorPickerButton ButtonGroup Panel TextureRect ColorRect NinePatchRect
+    ProgressBar TextureProgressBar Range Slider HSlider VSlider ScrollBar HScrollBar VScrollBar
+    SpinBox LineEdit TextEdit CodeEdit ItemList Tree TreeItem PopupMenu PopupPanel Popup
+    AcceptDialog ConfirmationDialog FileDialog ColorPicker TabBar Separator HSeparator VSeparator
+    ReferenceRect GraphEdit GraphNode MenuBar VideoStreamPlayer
+    Texture Texture2D ImageTexture CompressedTexture2D AtlasTexture GradientTexture1D
+    GradientTexture2D NoiseTexture2D CanvasTexture ViewportTexture Image Gradient Curve Curve2D
+    Font FontFile FontVariation SystemFont Theme StyleBox StyleBoxFlat StyleBoxTexture
+    StyleBoxEmpty StyleBoxLine LabelSettings Material ShaderMaterial CanvasItemMaterial
+    Shader ParticleProcessMaterial Environment WorldEnvironment FastNoiseLite Noise
+    AudioStream AudioStreamPlayer AudioStreamPlayer2D AudioStreamWAV AudioStreamOggVorbis
+    AudioStreamMP3 AudioEffect AudioBusLayout
+    InputEvent InputEventKey InputEventMouse InputEventMouseButton InputEventMouseMotion
+    InputEventScreenTouch InputEventScreenDrag InputEventAction InputEventJoypadButton
+    InputEventJoypadMotion InputEventWithModifiers InputEventGesture InputEventMagnifyGesture
+    InputEventPanGesture InputEventShortcut InputEventMIDI Shortcut
+    FileAccess DirAccess ConfigFile JSON JSONRPC RegEx RegExMatch HTTPRequest HTTPClient
+    Thread Mutex Semaphore RandomNumberGenerator Crypto HashingContext Marshalls
+    ResourceLoader ResourceSaver ResourceUID ResourceFormatLoader ResourceFormatSaver
+    Engine OS Input InputMap ProjectSettings ClassDB Time Performance DisplayServer
+    RenderingServer PhysicsServer2D PhysicsServer3D AudioServer TranslationServer IP
+    NavigationServer2D NavigationServer3D Geometry2D Geometry3D ThemeDB TextServerManager
+    WorkerThreadPool EngineDebugger JavaScriptBridge CameraServer XRServer NativeMenu
+    EditorPlugin EditorInterface EditorSettings EditorScript EditorFileSystem EditorProperty
+    EditorInspectorPlugin EditorImportPlugin EditorExportPlugin EditorResourcePicker
+    EditorUndoRedoManager EditorPaths EditorFileDialog EditorSelection EditorScriptPicker
+    UndoRedo Expression MainLoop WeakRef Error PhysicsDirectSpaceState2D
+    PhysicsRayQueryParameters2D PhysicsShapeQueryParameters2D PhysicsPointQueryParameters2D
+    World2D InstancePlaceholder MultiplayerAPI MultiplayerPeer StreamPeer StreamPeerTCP
+    PacketPeer TCPServer UDPServer WebSocketPeer Logger ScriptBacktrace TextServer
+    ScriptEditor ScriptEditorBase SyntaxHighlighter CodeHighlighter EditorSyntaxHighlighter
+    PI TAU INF NAN OK FAILED HORIZONTAL VERTICAL CLOCKWISE COUNTERCLOCKWISE
+'''.split())
+
+# Global-scope enums and constants inherited from engine classes (NOTIFICATION_READY, ...)
+BUILTIN_PREFIXES = (
+    'KEY_', 'MOUSE_BUTTON_', 'JOY_', 'MIDI_', 'ERR_', 'TYPE_', 'OP_', 'PROPERTY_HINT_',
+    'PROPERTY_USAGE_', 'METHOD_FLAG', 'SIDE_', 'CORNER_', 'HORIZONTAL_ALIGNMENT_',
+    'VERTICAL_ALIGNMENT_', 'INLINE_ALIGNMENT_', 'EULER_ORDER_', 'NOTIFICATION_', 'PROCESS_MODE_',
+    'PRESET_', 'SIZE_', 'MOUSE_FILTER_', 'FOCUS_', 'CURSOR_', 'ANCHOR_', 'GROW_DIRECTION_',
+    'LAYOUT_DIRECTION_', 'TEXTURE_FILTER_', 'TEXTURE_REPEAT_', 'CLIP_CHILDREN_', 'TEXT_DIRECTION_',
+    'AUTO_TRANSLATE_MODE_', 'INTERNAL_MODE_', 'PHYSICS_INTERPOLATION_MODE_', 'ACCESS_',
+)
+
+
+def is_builtin(name):
+    return name in BUILTINS or name.startswith(BUILTIN_PREFIXES)
+
+
+class ScanError(ValueError):
+    def __init__(self, message, line):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+def tokenize(text):
+    """(kind, value, line) for every significant token (whitespace and comments dropped)"""
+    line = 1
+    depth = []
+    for match in TOKEN.finditer(text):
+        kind, value = match.lastgroup, match.group()
+        if kind == 'unterminated':
+            raise ScanError("unterminated string", line)
+        if kind == 'op':
+            if value in OPEN:
+                depth.append((value, line))
+            elif value in ')]}':
+                if not depth or OPEN[depth[-1][0]] != value:
+                    raise ScanError(f"unbalanced '{value}'", line)
+                depth.pop()
+        if kind not in ('ws', 'comment'):
+            yield kind, value, line
+        line += value.count('\n')
+    if depth:
+        raise ScanError(f"'{depth[-1][0]}' never closed", depth[-1][1])
+
+
+TAB_WIDTH = 4
+
+
+def statements(text):
+    """(line, indent, tokens) per logical line; a tab counts as TAB_WIDTH columns"""
+    lines = text.split('\n')
+    current, depth = [], 0
+    for token in tokenize(text):
+        kind, value, _ = token
+        if kind == 'newline':
+            if depth == 0 and current:
+                yield _statement(lines, current)
+                current = []
+            continue
+        if kind == 'op' and value in OPEN:
+            depth += 1
+        elif kind == 'op' and value in ')]}':
+            depth -= 1
+        current.append(token)
+    if current:
+        yield _statement(lines, current)
+
+
+def _statement(lines, tokens):
+    line = tokens[0][2]
+    source = lines[line - 1]
+    leading = source[:len(source) - len(source.lstrip(' \t'))]
+    return line, leading.count('\t') * TAB_WIDTH + leading.count(' '), tokens
+
+
+RESOURCE_SCHEMES = ('res://', 'uid://')
+
+DECLARES = {'class_name': 'class_name', 'func': 'func', 'var': 'var', 'const': 'const',
+            'signal': 'signal', 'class': 'class', 'for': 'var'}
+
+
+def _scan_tokens(tokens):
+    symbols = []
+    refs = {}
+    n = len(tokens)
+    for i, (kind, value, line) in enumerate(tokens):
+        prev = tokens[i - 1] if i else ('newline', '', line)
+        nxt = tokens[i + 1] if i + 1 < n else ('newline', '', line)
+        if kind == 'string' and value.lstrip('r&^')[1:].startswith(RESOURCE_SCHEMES):
+            symbols.append(('resource', value.lstrip('r&^')[1:-1], line))
+        elif kind == 'name' and prev[1] != '.':
+            if value in DECLARES and nxt[0] == 'name':
+                symbols.append((DECLARES[value], nxt[1], line))
+                if value == 'func':
+                    symbols.extend(('param', p[1], p[2]) for p in _params(tokens, i))
+            elif value == 'extends' and nxt[0] in ('name', 'string'):
+                symbols.append(('extends', nxt[1].strip('"\''), line))
+            elif value == 'enum':
+                j = i + 1
+                if nxt[0] == 'name':
+                    symbols.append(('enum', nxt[1], line))
+                    j += 1
+                if j < n and tokens[j][1] == '{':
+                    for member in _enum_members(tokens, j):
+                        symbols.append(('const', member[1], member[2]))
+            elif value in ('preload', 'load') and nxt[1] == '(' and i + 2 < n and tokens[i + 2][0] == 'string':
+                symbols.append((value, tokens[i + 2][1].strip('"\''), line))
+            elif value == 'func':  # lambda
+                symbols.extend(('param', p[1], p[2]) for p in _params(tokens, i))
+            elif nxt[1] == '=' and prev[1] in ('{', ','):
+                continue  # Lua-style dictionary key: {NAME = value}
+            elif value[0].isupper() and prev[1] not in DECLARES and prev[1] not in ('extends', 'enum'):
+                refs.setdefault(value, line)
+    symbols.extend(('ref', name, line) for name, line in refs.items())
+    return symbols
+
+
+def _enum_members(tokens, start):
+    """Name tokens at depth 1 directly after '{' or ','"""
+    depth = 0
+    for j in range(start, len(tokens)):
+        value = tokens[j][1]
+        if value in OPEN:
+            depth += 1
+        elif value in ')]}':
+            depth -= 1
+            if depth == 0:
+                return
+        elif depth == 1 and tokens[j][0] == 'name' and tokens[j - 1][1] in ('{', ','):
+            yield tokens[j]
+
+
+def _params(tokens, func_index):
+    """Parameter name tokens of the func (or lambda) starting at func_index"""
+    j = func_index + 1
+    if j < len(tokens) and tokens[j][0] == 'name':
+        j += 1
+    if j >= len(tokens) or tokens[j][1] != '(':
+        return []
+    params, depth = [], 0
+    for k in range(j, len(tokens)):
+        value = tokens[k][1]
+        if value in OPEN:
+            depth += 1
+        elif value in ')]}':
+            depth -= 1
+            if depth == 0:
+                break
+        elif depth == 1 and tokens[k][0] == 'name' and tokens[k - 1][1] in ('(', ','):
+            params.append(tokens[k])
+    return params
+
+
+def scan(text):
+    """{'symbols': [(kind, name, line)], 'error': message or None}"""
+    try:
+        tokens = [t for t in tokenize(text) if t[0] != 'newline']
+    except ScanError as e:
+        return {'symbols': [], 'error': str(e)}
+    return {'symbols': _scan_tokens(tokens), 'error': None}
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("usage: gdscript_scan.py FILE.gd")
+        return 2
+    with open(sys.argv[1], encoding='utf-8') as f:
+        result = scan(f.read())
+    if result['error']:
+        print(f"✗ {result['error']}")
+        return 1
+    for kind, name, line in result['symbols']:
+        builtin = '  (built-in)' if kind == 'ref' and is_builtin(name) else ''
+        print(f"  {line:5d}  {kind:10s} {name}{builtin}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
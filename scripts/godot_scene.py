@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Parser for Godot's text resource format (.tscn, .tres, project.godot).
+
+The extractors used to read a scene whole and run large re.DOTALL
+patterns with lazy `.*?` / `[^\\[]*?` spans, one search per asset. That
+rescans the file once per asset, backtracks as scenes grow, and silently
+matches across node boundaries when a pattern does not fit (a negative
+coordinate, say). This module tokenizes the file in one linear pass and
+parses the tokens by recursive descent, without backtracking.
+
+Values come back typed:
+
+    Vector2(1, 2)                  → Vector2(x=1.0, y=2.0)
+    Rect2(0, 0, 10, 20)            → Rect2(x, y, width, height)
+    Color(1, 0, 0, 1)              → Color(r, g, b, a)
+    PackedVector2Array(0, 1, 2, 3) → [Vector2, Vector2]
+    ExtResource("2_abc")           → the ExtResource declared with that id
+    SubResource("x")               → SubResourceRef("x")
+    NodePath("a/b"), &"name"       → NodePath, StringName
+    other constructors             → Constructor(name, args)
+    numbers, strings, bool, null, [arrays], {dicts} as Python values
+
+Scene indexes its nodes by path, name and type:
+
+    scene = load_scene('scenes/ParallaxScalingEditor.tscn')
+    tree = scene.node('Tree1')                 # by path ('.' is the root)
+    tree['position'].y, tree['region_rect'].width, tree['texture'].path
+    for node in scene.find(type='Sprite2D'):   # name= / type= / parent=
+        ...
+
+iter_sections() yields sections while parsing, for callers that only need
+the first few. `python3 scripts/godot_scene.py FILE` prints the node tree.
+"""
+
+import re
+import sys
+from collections import namedtuple
+
+Vector2 = namedtuple('Vector2', 'x y')
+Vector2i = namedtuple('Vector2i', 'x y')
+Vector3 = namedtuple('Vector3', 'x y z')
+Rect2 = namedtuple('Rect2', 'x y width height')
+Color = namedtuple('Color', 'r g b a')
+Transform2D = namedtuple('Transform2D', 'xx xy yx yy ox oy')
+ExtResource = namedtuple('ExtResource', 'id type path uid')
+SubResourceRef = namedtuple('SubResourceRef', 'id')
+Constructor = namedtuple('Constructor', 'name args')
+
+
+class NodePath(str):
+    """NodePath("...")"""
+
+
+class StringName(str):
+    """&"..." """
+
+
+VECTOR_TYPES = {
+    'Vector2': Vector2, 'Vector2i': Vector2i, 'Vector3': Vector3, 'Rect2': Rect2,
+    'Rect2i': Rect2, 'Color': Color, 'Transform2D': Transform2D,
+}
+PACKED_VECTORS = {'PackedVector2Array': Vector2, 'PackedVector3Array': Vector3, 'PackedColorArray': Color}
+
+
+class ParseError(ValueError):
+    """Malformed text resource; the message carries file and line"""
+
+
+# -- tokenizer ----------------------------------------------------------------
+
+_TOKEN = re.compile(r'''
+    (?P<ws>[ \t\r\n]+|;[^\n]*)
+  | (?P<string>[&^]?"(?:[^"\\]|\\.)*")
+  | (?P<key>\d+(?:[:/][\w.]+)+)
+  | (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?![\w/]))
+  | (?P<name>[A-Za-z_@][\w/.:@-]*(?<!:))
+  | (?P<punct>[\[\](){},:=])
+''', re.VERBOSE | re.DOTALL)
+
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+
+
+def _unescape(body):
+    return re.sub(r'\\(.)', lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def tokenize(text, filename='<text>'):
+    """Yield (kind, value, line) in a single pass; kinds: string, number, name, punct"""
+    position, line, end = 0, 1, len(text)
+    match = _TOKEN.match
+    while position < end:
+        m = match(text, position)
+        if m is None:
+            raise ParseError(f"{filename}:{line}: unexpected character {text[position]!r}")
+        kind = m.lastgroup
+        value = m.group()
+        if kind == 'key':
+            kind = 'name'  # digit-led property path, e.g. 0:0/0 in a TileSet
+        if kind != 'ws':
+            yield kind, value, line
+        line += value.count('\n')
+        position = m.end()
+
+
+# -- parser -------------------------------------------------------------------
+
+class Section:
+    """[tag attr=value ...] followed by `key = value` properties"""
+
+    def __init__(self, tag, attrs, line):
+        self.tag = tag
+        self.attrs = attrs
+        self.properties = {}
+        self.line = line
+
+    def __repr__(self):
+        return f"Section({self.tag!r}, {self.attrs!r})"
+
+
+class _Parser:
+    def __init__(self, text, filename):
+        self.filename = filename
+        self.tokens = tokenize(text, filename)
+        self.ext_resources = {}
+        self.current = None
+        self.advance()
+
+    def advance(self):
+        self.current = next(self.tokens, (None, None, self.current[2] if self.current else 1))
+
+    def error(self, message):
+        return ParseError(f"{self.filename}:{self.current[2]}: {message}")
+
+    def expect(self, punct):
+        kind, value, _ = self.current
+        if kind != 'punct' or value != punct:
+            raise self.error(f"expected {punct!r}, found {value!r}")
+        self.advance()
+
+    def at(self, punct):
+        return self.current[0] == 'punct' and self.current[1] == punct
+
+    def sections(self):
+        section = None
+        while self.current[0] is not None:
+            kind, value, line = self.current
+            if kind == 'punct' and value == '[':
+                if section is not None:
+                    yield section
+                section = self.header()
+            elif kind in ('name', 'string'):
+                key = _unescape(value[1:-1]) if kind == 'string' else value
+                self.advance()
+                self.expect('=')
+                if section is None:
+                    section = Section(None, {}, line)  # project.godot: keys before any section
+                section.properties[key] = self.value()
+            else:
+                raise self.error(f"unexpected {value!r}")
+        if section is not None:
+            yield section
+
+    def header(self):
+        line = self.current[2]
+        self.expect('[')
+        kind, tag, _ = self.current
+        if kind != 'name':
+            raise self.error("expected a section tag")
+        self.advance()
+        attrs = {}
+        while not self.at(']'):
+            kind, key, _ = self.current
+            if kind != 'name':
+                raise self.error(f"expected an attribute name, found {key!r}")
+            self.advance()
+            self.expect('=')
+            attrs[key] = self.value()
+        self.advance()
+        section = Section(tag, attrs, line)
+        if tag == 'ext_resource':
+            resource = ExtResource(attrs.get('id'), attrs.get('type'), attrs.get('path'), attrs.get('uid'))
+            self.ext_resources[resource.id] = resource
+        return section
+
+    def value(self):
+        kind, token, _ = self.current
+        if kind == 'string':
+            self.advance()
+            if token[0] == '&':
+                return StringName(_unescape(token[2:-1]))
+            if token[0] == '^':
+                return NodePath(_unescape(token[2:-1]))
+            return _unescape(token[1:-1])
+        if kind == 'number':
+            self.advance()
+            return float(token) if any(c in token for c in '.eE') else int(token)
+        if kind == 'name':
+            self.advance()
+            if token in ('true', 'false'):
+                return token == 'true'
+            if token == 'null':
+                return None
+            if token in ('inf', 'nan', 'inf_neg'):
+                return {'inf': float('inf'), 'nan': float('nan'), 'inf_neg': float('-inf')}[token]
+            return self.constructor(token)
+        if self.at('['):
+            return self.array()
+        if self.at('{'):
+            return self.dictionary()
+        raise self.error(f"expected a value, found {token!r}")
+
+    def array(self):
+        self.expect('[')
+        items = []
+        while not self.at(']'):
+            items.append(self.value())
+            if not self.at(']'):
+                self.expect(',')
+        self.advance()
+        return items
+
+    def dictionary(self):
+        self.expect('{')
+        items = {}
+        while not self.at('}'):
+            key = self.value()
+            self.expect(':')
+            items[key if not isinstance(key, list) else tuple(key)] = self.value()
+            if not self.at('}'):
+                self.expect(',')
+        self.advance()
+        return items
+
+    def constructor(self, name):
+        if name == 'Object':
+            return self.object()
+        if self.at('['):
+            # Typed container, e.g. Array[ExtResource("1_x")]([...]): the element type is skipped
+            self.array()
+        self.expect('(')
+        args = []
+        while not self.at(')'):
+            args.append(self.value())
+            if not self.at(')'):
+                self.expect(',')
+        self.advance()
+        return self.build(name, args)
+
+    def object(self):
+        """Object(Class, "property": value, ...) as Constructor('Object', [Class, {properties}])"""
+        self.expect('(')
+        kind, class_name, _ = self.current
+        if kind != 'name':
+            raise self.error("expected a class name")
+        self.advance()
+        properties = {}
+        while self.at(','):
+            self.advance()
+            key = self.value()
+            self.expect(':')
+            properties[key] = self.value()
+        self.expect(')')
+        return Constructor('Object', [class_name, properties])
+
+    def build(self, name, args):
+        if name in VECTOR_TYPES:
+            return VECTOR_TYPES[name](*(float(a) for a in args))
+        if name in PACKED_VECTORS:
+            cls = PACKED_VECTORS[name]
+            size = len(cls._fields)
+            return [cls(*(float(a) for a in args[i:i + size])) for i in range(0, len(args), size)]
+        if name.startswith('Packed') and name.endswith('Array'):
+            return list(args[0]) if len(args) == 1 and isinstance(args[0], list) else args
+        if name in ('Array', 'Dictionary') and len(args) == 1:
+            return args[0]
+        if name == 'ExtResource':
+            return self.ext_resources.get(args[0], ExtResource(args[0], None, None, None))
+        if name == 'SubResource':
+            return SubResourceRef(args[0])
+        if name == 'NodePath':
+            return NodePath(args[0] if args else '')
+        if name == 'StringName':
+            return StringName(args[0] if args else '')
+        return Constructor(name, args)
+
+
+def iter_sections(text, filename='<text>'):
+    """Yield Sections in file order while parsing"""
+    return _Parser(text, filename).sections()
+
+
+# -- scene index --------------------------------------------------------------
+
+class Node:
+    """One [node] section"""
+
+    def __init__(self, section):
+        self.name = section.attrs.get('name')
+        self.type = section.attrs.get('type')
+        self.parent = section.attrs.get('parent')
+        self.instance = section.attrs.get('instance')
+        self.groups = section.attrs.get('groups', [])
+        self.properties = section.properties
+        self.line = section.line
+        if self.parent is None:
+            self.path = '.'
+        elif self.parent == '.':
+            self.path = self.name
+        else:
+            self.path = f"{self.parent}/{self.name}"
+
+    def __getitem__(self, key):
+        return self.properties[key]
+
+    def get(self, key, default=None):
+        return self.properties.get(key, default)
+
+    def __repr__(self):
+        return f"Node({self.path!r}, {self.type!r})"
+
+
+class Scene:
+    """Parsed .tscn/.tres with nodes indexed by path, name and type"""
+
+    def __init__(self, sections, filename='<text>'):
+        self.filename = filename
+        self.header = None
+        self.ext_resources = {}
+        self.sub_resources = {}
+        self.resource = None
+        self.nodes = []
+        self.connections = []
+        self.by_path = {}
+        self.by_name = {}
+        self.by_type = {}
+
+        for section in sections:
+            if section.tag in ('gd_scene', 'gd_resource'):
+                self.header = section
+            elif section.tag == 'ext_resource':
+                attrs = section.attrs
+                self.ext_resources[attrs.get('id')] = ExtResource(
+                    attrs.get('id'), attrs.get('type'), attrs.get('path'), attrs.get('uid'))
+            elif section.tag == 'sub_resource':
+                self.sub_resources[section.attrs.get('id')] = section
+            elif section.tag == 'resource':
+                self.resource = section
+            elif section.tag == 'node':
+                self.add(Node(section))
+            elif section.tag == 'connection':
+                self.connections.append(section.attrs)
+
+    def add(self, node):
+        self.nodes.append(node)
+        self.by_path[node.path] = node
+        self.by_name.setdefault(node.name, []).append(node)
+        self.by_type.setdefault(node.type, []).append(node)
+
+    @property
+    def root(self):
+        return self.by_path.get('.')
+
+    def node(self, path):
+        """Node at `path` relative to the root ('.' is the root); KeyError if absent"""
+        return self.by_path[path]
+
+    def find(self, name=None, type=None, parent=None):
+        """Nodes matching every given criterion, in file order"""
+        if name is not None:
+            candidates = self.by_name.get(name, [])
+        elif type is not None:
+            candidates = self.by_type.get(type, [])
+        else:
+            candidates = self.nodes
+        return [n for n in candidates
+                if (type is None or n.type == type) and (parent is None or n.parent == parent)]
+
+    def find_one(self, name, type=None):
+        """The single node called `name` (optionally of `type`), or None"""
+        matches = self.find(name=name, type=type)
+        return matches[0] if matches else None
+
+
+def parse_scene(text, filename='<text>'):
+    return Scene(iter_sections(text, filename), filename)
+
+
+def load_scene(path):
+    with open(path, encoding='utf-8') as f:
+        return parse_scene(f.read(), str(path))
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("usage: godot_scene.py FILE.tscn")
+        return 2
+    scene = load_scene(sys.argv[1])
+    print(f"{scene.filename}: {len(scene.nodes)} nodes, {len(scene.ext_resources)} ext_resources, "
+          f"{len(scene.sub_resources)} sub_resources, {len(scene.connections)} connections")
+    for node in scene.nodes:
+        depth = 0 if node.path == '.' else node.path.count('/') + 1
+        print(f"{'  ' * depth}{node.name} ({node.type or node.instance})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
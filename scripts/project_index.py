@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Persistent index of the parsed project: scenes, resources, scripts, logs.
+
+Every tool used to walk the tree with rglob() and re-parse each .gd and
+.tscn it needed from scratch. check_gd_quickscan.py also rglobbed *.log
+through addons/gut. This index keeps per-file parse results in SQLite
+(.build/project_index.sqlite) and re-parses only files whose size or
+mtime changed and whose bytes then hash differently. A warm refresh
+walks the tree and stats each file, and parses nothing. Large batches
+(a cold index) are parsed across a process pool (SPRITE_JOBS workers,
+like the sprite tools; the core count by default).
+
+Tables (paths are relative to the project root, '/'-separated):
+    files          path, kind, size, mtime_ns, sha256, error, scene (pickled godot_scene.Scene)
+    nodes          file, path, name, type, parent, instance
+    ext_resources  file, id, type, path
+    symbols        file, kind, name, line
+                   kind: class_name, extends, func, var, const, signal,
+                         enum, class, param, ref, preload, load, resource
+                         (gdscript_scan.py), undeclared (from *.log)
+
+Kinds of file: gd, tscn, tres, log. Directories in SKIP_DIRS are never
+entered. Files that fail to parse (or, for .gd, to tokenize) are kept with
+their error, so a broken file is reported instead of re-parsed on every run.
+
+Usage:
+    from project_index import ProjectIndex, load_scene
+
+    with ProjectIndex() as index:          # refreshed on open
+        for path in index.files('gd'):
+            funcs = index.symbols(path, 'func')
+        rows = index.query("SELECT file, path FROM nodes WHERE type = ?", ('Sprite2D',))
+
+    scene = load_scene('scenes/Main.tscn')  # cached godot_scene.load_scene
+
+    python3 scripts/project_index.py [ROOT]           # refresh and print stats
+    python3 scripts/project_index.py rebuild [ROOT]   # drop and re-parse everything
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from gdscript_scan import scan
+from godot_scene import ParseError, parse_scene
+
+INDEX_PATH = '.build/project_index.sqlite'
+# Bump when a parser or the stored representation changes: forces a rebuild
+INDEX_VERSION = 3
+# Fewer stale files than this are parsed inline: a pool costs more to start
+PARALLEL_MIN_FILES = 64
+# Files per pool task
+PARSE_CHUNK = 16
+
+KINDS = {'.gd': 'gd', '.tscn': 'tscn', '.tres': 'tres', '.log': 'log'}
+SKIP_DIRS = {'.git', '.godot', '.build', '__pycache__', '.venv', 'venv', 'node_modules'}
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE files (
+    path TEXT PRIMARY KEY, kind TEXT, size INTEGER, mtime_ns INTEGER,
+    sha256 TEXT, error TEXT, scene BLOB);
+CREATE TABLE nodes (file TEXT, path TEXT, name TEXT, type TEXT, parent TEXT, instance TEXT);
+CREATE TABLE ext_resources (file TEXT, id TEXT, type TEXT, path TEXT);
+CREATE TABLE symbols (file TEXT, kind TEXT, name TEXT, line INTEGER);
+CREATE INDEX nodes_file ON nodes (file);
+CREATE INDEX ext_resources_file ON ext_resources (file);
+CREATE INDEX symbols_file ON symbols (file, kind);
+CREATE INDEX symbols_name ON symbols (kind, name);
+"""
+
+# -- per-kind parsers ---------------------------------------------------------
+
+_UNDECLARED = re.compile(r'Identifier\s+"?(\w+)"?\s+not declared', re.IGNORECASE)
+
+
+def parse_log(text):
+    return [('undeclared', name, text.count('\n', 0, match.start()) + 1)
+            for match in _UNDECLARED.finditer(text)]
+
+
+def parse_file(job):
+    """
+    (pickled scene, error, symbol rows, node rows, ext_resource rows) of one
+    file; runs in a pool worker, so everything returned is plain data
+    """
+    root, rel, kind = job
+    text = (Path(root) / rel).read_text(encoding='utf-8', errors='ignore')
+    scene = error = None
+    symbols, nodes, ext_resources = [], [], []
+    if kind in ('tscn', 'tres'):
+        try:
+            parsed = parse_scene(text, rel)
+        except ParseError as e:
+            error = str(e)
+        else:
+            scene = pickle.dumps(parsed, pickle.HIGHEST_PROTOCOL)
+            nodes = [(n.path, n.name, n.type, n.parent, getattr(n.instance, 'path', None))
+                     for n in parsed.nodes]
+            ext_resources = [(r.id, r.type, r.path) for r in parsed.ext_resources.values()]
+    elif kind == 'gd':
+        result = scan(text)
+        symbols, error = result['symbols'], result['error']
+    elif kind == 'log':
+        symbols = parse_log(text)
+    return scene, error, symbols, nodes, ext_resources
+
+
+# -- index --------------------------------------------------------------------
+
+def default_workers():
+    """SPRITE_JOBS overrides the core count (SPRITE_JOBS=1 runs everything inline)"""
+    env = os.environ.get('SPRITE_JOBS')
+    if env:
+        return max(1, int(env))
+    return os.cpu_count() or 1
+
+
+class ProjectIndex:
+    """SQLite index of the project rooted at `root` (refreshed on open unless refresh=False)"""
+
+    def __init__(self, root='.', path=None, refresh=True):
+        self.root = Path(root)
+        self.path = Path(path) if path else self.root / INDEX_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self._ensure_schema()
+        self.stats = None
+        if refresh:
+            self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def _ensure_schema(self):
+        try:
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.DatabaseError:
+            row = None
+        if row and row[0] == str(INDEX_VERSION):
+            return
+        self.rebuild()
+
+    def rebuild(self):
+        """Drop every table and start empty"""
+        tables = [r[0] for r in self.db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        with self.db:
+            for table in tables:
+                self.db.execute(f"DROP TABLE {table}")
+            self.db.executescript(SCHEMA)
+            self.db.execute("INSERT INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+
+    # -- refresh ----------------------------------------------------------
+
+    def walk(self):
+        """(relative path, kind) of every indexable file, skipping SKIP_DIRS"""
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            rel_dir = os.path.relpath(dirpath, self.root)
+            for filename in sorted(filenames):
+                kind = KINDS.get(os.path.splitext(filename)[1])
+                if kind:
+                    rel = filename if rel_dir == '.' else f"{rel_dir}/{filename}"
+                    yield rel.replace(os.sep, '/'), kind
+
+    def refresh(self, workers=None):
+        """Re-parse changed files, forget deleted ones; returns and stores the counts"""
+        start = time.perf_counter()
+        known = {path: (size, mtime_ns) for path, size, mtime_ns
+                 in self.db.execute("SELECT path, size, mtime_ns FROM files")}
+        seen = set()
+        stale = []
+        touched = 0
+        with self.db:
+            for rel, kind in self.walk():
+                seen.add(rel)
+                result = self._check(rel, kind, known.get(rel))
+                if result == 'touched':
+                    touched += 1
+                elif result != 'fresh':
+                    stale.append(result)
+            removed = set(known) - seen
+            for rel in removed:
+                self._forget(rel)
+            self._parse(stale, workers)
+        self.stats = {'files': len(seen), 'parsed': len(stale), 'touched': touched,
+                      'removed': len(removed), 'seconds': time.perf_counter() - start}
+        return self.stats
+
+    def refresh_file(self, rel):
+        """Bring a single file up to date without walking the tree"""
+        rel = str(rel).replace(os.sep, '/')
+        kind = KINDS.get(os.path.splitext(rel)[1])
+        row = self.db.execute("SELECT size, mtime_ns FROM files WHERE path = ?", (rel,)).fetchone()
+        with self.db:
+            if not (self.root / rel).exists():
+                self._forget(rel)
+                return 'removed'
+            result = self._check(rel, kind, row)
+            if result in ('fresh', 'touched'):
+                return result
+            self._parse([result], workers=1)
+            return 'parsed'
+
+    def _check(self, rel, kind, known):
+        """
+        'fresh' (stat unchanged), 'touched' (same bytes, stat updated), or
+        the (rel, kind, size, mtime_ns, sha256) of a file to re-parse
+        """
+        st = os.stat(self.root / rel)
+        if known and tuple(known) == (st.st_size, st.st_mtime_ns):
+            return 'fresh'
+        digest = hashlib.sha256((self.root / rel).read_bytes()).hexdigest()
+        old = self.db.execute("SELECT sha256 FROM files WHERE path = ?", (rel,)).fetchone()
+        if old and old[0] == digest:
+            self.db.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                            (st.st_size, st.st_mtime_ns, rel))
+            return 'touched'
+        return rel, kind, st.st_size, st.st_mtime_ns, digest
+
+    def _parse(self, stale, workers=None):
+        """Parse the stale files (across a process pool when there are many) and store the rows"""
+        if not stale:
+            return
+        if workers is None:
+            workers = default_workers() if len(stale) >= PARALLEL_MIN_FILES else 1
+        jobs = [(str(self.root), rel, kind) for rel, kind, *_ in stale]
+        if workers <= 1:
+            results = [parse_file(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(parse_file, jobs, chunksize=PARSE_CHUNK))
+        for (rel, kind, size, mtime_ns, digest), result in zip(stale, results):
+            scene, error, symbols, nodes, ext_resources = result
+            self._forget(rel)
+            self.db.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (rel, kind, size, mtime_ns, digest, error, scene))
+            self.db.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?)",
+                                [(rel, *row) for row in nodes])
+            self.db.executemany("INSERT INTO ext_resources VALUES (?, ?, ?, ?)",
+                                [(rel, *row) for row in ext_resources])
+            self.db.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?)",
+                                [(rel, *row) for row in symbols])
+
+    def _forget(self, rel):
+        for table, column in (('files', 'path'), ('nodes', 'file'),
+                              ('ext_resources', 'file'), ('symbols', 'file')):
+            self.db.execute(f"DELETE FROM {table} WHERE {column} = ?", (rel,))
+
+    # -- queries ----------------------------------------------------------
+
+    def query(self, sql, params=()):
+        return self.db.execute(sql, params).fetchall()
+
+    def files(self, kind=None):
+        """Indexed paths (of one kind), sorted"""
+        if kind is None:
+            return [r[0] for r in self.query("SELECT path FROM files ORDER BY path")]
+        return [r[0] for r in self.query("SELECT path FROM files WHERE kind = ? ORDER BY path", (kind,))]
+
+    def errors(self):
+        """(path, error) of files that failed to parse"""
+        return self.query("SELECT path, error FROM files WHERE error IS NOT NULL ORDER BY path")
+
+    def symbols(self, file=None, kind=None):
+        """(file, kind, name, line) rows, optionally narrowed to one file and/or kind"""
+        sql, params = "SELECT file, kind, name, line FROM symbols WHERE 1", []
+        if file is not None:
+            sql, params = sql + " AND file = ?", params + [file]
+        if kind is not None:
+            sql, params = sql + " AND kind = ?", params + [kind]
+        return self.query(sql + " ORDER BY file, line", params)
+
+    def ext_resources(self, file=None):
+        """(file, id, type, path) rows"""
+        if file is None:
+            return self.query("SELECT file, id, type, path FROM ext_resources ORDER BY file")
+        return self.query("SELECT file, id, type, path FROM ext_resources WHERE file = ?", (file,))
+
+    def scene(self, rel):
+        """The parsed godot_scene.Scene of a .tscn/.tres (ParseError if it failed to parse)"""
+        row = self.db.execute("SELECT scene, error FROM files WHERE path = ?", (rel,)).fetchone()
+        if row is None:
+            raise KeyError(rel)
+        if row[1]:
+            raise ParseError(row[1])
+        return pickle.loads(row[0])
+
+
+def load_scene(path, root='.'):
+    """godot_scene.load_scene, served from the index when the file is unchanged"""
+    rel = os.path.relpath(path, root)
+    with ProjectIndex(root, refresh=False) as index:
+        index.refresh_file(rel)
+        return index.scene(rel.replace(os.sep, '/'))
+
+
+def main():
+    args = sys.argv[1:]
+    rebuild = bool(args) and args[0] == 'rebuild'
+    root = Path(args[1 if rebuild else 0]) if len(args) > rebuild else Path('.')
+    with ProjectIndex(root, refresh=False) as index:
+        if rebuild:
+            index.rebuild()
+        stats = index.refresh()
+        print(f"{index.path}: {stats['files']} files, {stats['parsed']} parsed, "
+              f"{stats['touched']} touched, {stats['removed']} removed "
+              f"({stats['seconds'] * 1000:.0f} ms)")
+        for kind, count in index.query("SELECT kind, COUNT(*) FROM files GROUP BY kind ORDER BY kind"):
+            print(f"  {kind:5s} {count}")
+        for path, error in index.errors():
+            print(f"  ✗ {path}: {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""
+Put the project's scripts/ directory on sys.path.
+
+gdscript_scan, godot_scene and project_index live in scripts/ (next to
+check_gd_quickscan.py, which uses them too). Tools in tests/ import this
+module before any of them:
+
+    import _scripts_path  # noqa: F401
+    from project_index import load_scene
+"""
+
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = str(Path(__file__).resolve().parent.parent / "scripts")
+
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
@@ -1,29 +1,30 @@
 #!/usr/bin/env python3
 """Analyze road and player configuration from ParallaxScalingEditor"""
 
-import re
+import _scripts_path  # noqa: F401
+from project_index import load_scene
 
 # Parse ParallaxScalingEditor.tscn
-with open('scenes/ParallaxScalingEditor.tscn', 'r') as f:
-    content = f.read()
+scene = load_scene('scenes/ParallaxScalingEditor.tscn')
+
+
+def placed(node, *keys):
+    """The node if it has every property in `keys`, else None"""
+    if node is not None and all(key in node.properties for key in keys):
+        return node
+    return None
+
 
 print("="*70)
 print("ROAD AND PLAYER ANALYSIS FROM PARALLAXSCALINGEDITOR.TSCN")
 print("="*70)
 
 # Extract RoadTile info
-road_pattern = r'\[node name="RoadTile"\s+type="Sprite2D"[^\[]*?position = Vector2\(([\d.]+),\s*([\d.]+)\)[^\[]*?scale = Vector2\(([\d.]+),\s*([\d.]+)\)[^\[]*?region_rect = Rect2\(([\d.]+),\s*([\d.]+),\s*([\d.]+),\s*([\d.]+)\)'
-
-road_match = re.search(road_pattern, content, re.DOTALL)
-if road_match:
-    road_x = float(road_match.group(1))
-    road_y = float(road_match.group(2))
-    road_scale_x = float(road_match.group(3))
-    road_scale_y = float(road_match.group(4))
-    region_x = float(road_match.group(5))
-    region_y = float(road_match.group(6))
-    region_w = float(road_match.group(7))
-    region_h = float(road_match.group(8))
+road = placed(scene.find_one('RoadTile', type='Sprite2D'), 'position', 'scale', 'region_rect')
+if road:
+    road_x, road_y = road['position']
+    road_scale_x, road_scale_y = road['scale']
+    region_x, region_y, region_w, region_h = road['region_rect']
 
     print(f"\nROAD TILE:")
     print(f"  Position: ({road_x}, {road_y})")
@@ -35,14 +36,10 @@ if road_match:
     print(f"  → And child RoadTileA/B sprites need offset positioning")
 
 # Extract VimBase (player) info
-vim_pattern = r'\[node name="VimBase"\s+type="Sprite2D"[^\[]*?position = Vector2\(([\d.]+),\s*([\d.]+)\)[^\[]*?scale = Vector2\(([\d.]+),\s*([\d.]+)\)'
-
-vim_match = re.search(vim_pattern, content, re.DOTALL)
-if vim_match:
-    vim_x = float(vim_match.group(1))
-    vim_y = float(vim_match.group(2))
-    vim_scale_x = float(vim_match.group(3))
-    vim_scale_y = float(vim_match.group(4))
+vim = placed(scene.find_one('VimBase', type='Sprite2D'), 'position', 'scale')
+if vim:
+    vim_x, vim_y = vim['position']
+    vim_scale_x, vim_scale_y = vim['scale']
 
     print(f"\nPLAYER (VimBase):")
     print(f"  Position: ({vim_x}, {vim_y})")
@@ -52,11 +49,9 @@ if vim_match:
     print(f"     scale = Vector2({vim_scale_x}, {vim_scale_y})")
 
 # Extract Camera info for reference
-camera_pattern = r'\[node name="Camera2D"[^\[]*?position = Vector2\(([\d.]+),\s*([\d.]+)\)'
-camera_match = re.search(camera_pattern, content, re.DOTALL)
-if camera_match:
-    cam_x = float(camera_match.group(1))
-    cam_y = float(camera_match.group(2))
+camera = placed(scene.find_one('Camera2D'), 'position')
+if camera:
+    cam_x, cam_y = camera['position']
     print(f"\nCAMERA (for reference):")
     print(f"  Position: ({cam_x}, {cam_y})")
 
@@ -65,23 +60,20 @@ print("CURRENT MAIN.TSCN VALUES (INCORRECT):")
 print("="*70)
 
 # Parse current Main.tscn
-with open('scenes/Main.tscn', 'r') as f:
-    main_content = f.read()
+main_scene = load_scene('scenes/Main.tscn')
 
 # Find current Road node
-road_main_pattern = r'\[node name="Road"[^\[]*?position = Vector2\(([\d.]+),\s*([\d.]+)\)[^\[]*?scale = Vector2\(([\d.]+),\s*([\d.]+)\)'
-road_main_match = re.search(road_main_pattern, main_content, re.DOTALL)
-if road_main_match:
+road_main = placed(main_scene.find_one('Road'), 'position', 'scale')
+if road_main:
     print(f"\nCurrent Road in Main.tscn:")
-    print(f"  position = Vector2({road_main_match.group(1)}, {road_main_match.group(2)})")
-    print(f"  scale = Vector2({road_main_match.group(3)}, {road_main_match.group(4)})")
+    print(f"  position = Vector2({road_main['position'].x:g}, {road_main['position'].y:g})")
+    print(f"  scale = Vector2({road_main['scale'].x:g}, {road_main['scale'].y:g})")
 
 # Find current Player
-player_pattern = r'\[node name="Player"[^\[]*?position = Vector2\(([\d.]+),\s*([\d.]+)\)[^\[]*?scale = Vector2\(([\d.]+),\s*([\d.]+)\)'
-player_match = re.search(player_pattern, main_content, re.DOTALL)
-if player_match:
+player = placed(main_scene.find_one('Player'), 'position', 'scale')
+if player:
     print(f"\nCurrent Player in Main.tscn:")
-    print(f"  position = Vector2({player_match.group(1)}, {player_match.group(2)})")
-    print(f"  scale = Vector2({player_match.group(3)}, {player_match.group(4)})")
+    print(f"  position = Vector2({player['position'].x:g}, {player['position'].y:g})")
+    print(f"  scale = Vector2({player['scale'].x:g}, {player['scale'].y:g})")
 
 print("\n" + "="*70)
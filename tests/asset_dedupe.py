@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Find duplicate images and remap their users onto one canonical resource.
+
+Byte-identical copies (assets/parallax/front_shop_01.webp,
+mid_building_01.webp and skyline_1.webp) and re-exports of the same
+sprite each get their own import, their own slot in the pack and, when
+loaded, their own texture in VRAM. This tool groups the project's
+images three ways:
+
+    same bytes    identical files (sha256)
+    same pixels   different encodings of identical RGBA (golden_images.pixel_hash)
+    near          64-bit dHash of the alpha-trimmed content within
+                  NEAR_DISTANCE bits, confirmed by thumbnail SSIM >= NEAR_SSIM
+
+Each group gets a canonical member: reachable from the game first
+(resource_graph.py), then the most referenced, then not under a backups/
+directory, then the shortest path. `apply` points every ext_resource
+(path and uid) in .tscn/.tres files and every "res://..." literal in .gd
+files at the canonical member. Near duplicates are remapped only with
+--near and only when both images have the same size: a sprite of another
+size would change every user's on-screen scale. `--delete` also removes
+duplicates, with their .import sidecar, that no .tscn/.tres/.gd/.json/.cfg
+file names any more by path, bare file name or uid.
+
+Fingerprints are cached in .build/dedupe_cache.json by source hash.
+
+Usage (from the project root):
+    python3 tests/asset_dedupe.py                      # report groups
+    python3 tests/asset_dedupe.py apply [--near] [--delete]
+"""
+
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from PIL import Image
+import numpy as np
+
+import _scripts_path  # noqa: F401
+from golden_images import _planes, perceptual_diff, pixel_hash, thumbnail
+from project_index import ProjectIndex
+from resource_graph import ResourceGraph, format_size
+from sprite_cache import CACHE_DIR, SpriteCache
+
+IMAGE_EXTS = ('.webp', '.png', '.jpg', '.jpeg')
+# Third-party and editor-only trees are never remapped
+SKIP_PREFIXES = ('addons/',)
+# Text that may name an image outside ext_resources and script literals
+# (chunk JSON uses bare file names, export_presets.cfg uses uids)
+MENTION_EXTS = ('.tscn', '.tres', '.gd', '.json', '.cfg', '.godot')
+CACHE_PATH = Path('.build/dedupe_cache.json')
+# Bump when a fingerprint changes: invalidates the cache
+FINGERPRINT_VERSION = 1
+HASH_SIZE = 8
+NEAR_DISTANCE = 4
+# Animation frames of one sprite (health_damage_0/_1, charger states) score 0.96-0.985
+NEAR_SSIM = 0.995
+ALPHA_VISIBLE = 8
+
+
+def dhash(pixels):
+    """64-bit difference hash of the visible content: trimmed to alpha, over mid-gray"""
+    visible = pixels[:, :, 3] > ALPHA_VISIBLE
+    if visible.any():
+        rows, cols = np.nonzero(visible.any(axis=1))[0], np.nonzero(visible.any(axis=0))[0]
+        pixels = pixels[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+    luma, _ = _planes(pixels)
+    small = np.asarray(Image.fromarray(luma.astype(np.uint8)).resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX))
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0]), pixels
+
+
+class Fingerprints:
+    """sha256, pixel hash, size and dHash per image, cached by sha256"""
+
+    def __init__(self, root='.'):
+        self.root = Path(root)
+        self.hashes = SpriteCache(self.root / CACHE_DIR)
+        self.cache = {}
+        path = self.root / CACHE_PATH
+        if path.exists():
+            try:
+                data = json.loads(path.read_text())
+                if data.get('version') == FINGERPRINT_VERSION:
+                    self.cache = data['fingerprints']
+            except (OSError, ValueError, KeyError):
+                pass
+        self._dirty = False
+
+    def get(self, rel):
+        sha = self.hashes.source_hash(self.root / rel)
+        if sha not in self.cache:
+            pixels = self.hashes.load_rgba(self.root / rel)
+            code, _ = dhash(pixels)
+            self.cache[sha] = {'pixels': pixel_hash(pixels), 'size': [pixels.shape[1], pixels.shape[0]],
+                               'dhash': f'{code:016x}'}
+            self._dirty = True
+        return dict(self.cache[sha], sha256=sha)
+
+    def content_thumbnail(self, rel):
+        _, content = dhash(self.hashes.load_rgba(self.root / rel))
+        return thumbnail(content)
+
+    def save(self):
+        self.hashes.save()
+        if not self._dirty:
+            return
+        path = self.root / CACHE_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps({'version': FINGERPRINT_VERSION, 'fingerprints': self.cache}, indent=1))
+        os.replace(tmp, path)
+        self._dirty = False
+
+
+class Group:
+    """Duplicates of one canonical image"""
+
+    def __init__(self, kind, members):
+        self.kind = kind
+        self.members = members
+        self.canonical = members[0]
+        self.duplicates = members[1:]
+
+
+def references(index, rel):
+    """(file, kind) of everything that names res://rel"""
+    target = f'res://{rel}'
+    rows = [(f, 'ext_resource') for f, _, _, path in index.ext_resources() if path == target]
+    rows += index.query("SELECT DISTINCT file, kind FROM symbols "
+                        "WHERE kind IN ('preload', 'load', 'resource') AND name = ?", (target,))
+    return sorted(set(rows))
+
+
+def find_groups(graph, prints):
+    images = sorted(rel for rel in graph.files
+                    if rel.lower().endswith(IMAGE_EXTS) and not rel.startswith(SKIP_PREFIXES))
+    info = {rel: prints.get(rel) for rel in images}
+    alive = graph.reachable()
+    ref_counts = {rel: len(references(graph.index, rel)) for rel in images}
+
+    def rank(rel):
+        return (rel not in alive, -ref_counts[rel], '/backups/' in f'/{rel}', len(rel), rel)
+
+    groups = []
+    by_pixels = {}
+    for rel in images:
+        by_pixels.setdefault(info[rel]['pixels'], []).append(rel)
+    for members in by_pixels.values():
+        if len(members) > 1:
+            same_bytes = len({info[m]['sha256'] for m in members}) == 1
+            groups.append(Group('same bytes' if same_bytes else 'same pixels', sorted(members, key=rank)))
+
+    # Near duplicates among the distinct pixel sets (one representative each)
+    representatives = sorted(by_pixels.values(), key=lambda ms: min(ms))
+    reps = [sorted(ms, key=rank)[0] for ms in representatives]
+    codes = np.array([int(info[r]['dhash'], 16) for r in reps], dtype=np.uint64)
+    parent = list(range(len(reps)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(reps)):
+        distances = np.array([bin(int(x)).count('1') for x in codes[i + 1:] ^ codes[i]], dtype=int)
+        for offset in np.nonzero(distances <= NEAR_DISTANCE)[0]:
+            j = i + 1 + int(offset)
+            if perceptual_diff(prints.content_thumbnail(reps[i]), prints.content_thumbnail(reps[j])) >= NEAR_SSIM:
+                parent[find(j)] = find(i)
+    clusters = {}
+    for i, rep in enumerate(reps):
+        clusters.setdefault(find(i), []).append(rep)
+    for members in clusters.values():
+        if len(members) > 1:
+            groups.append(Group('near', sorted(members, key=rank)))
+    prints.save()
+    return groups, info, alive
+
+
+def remappable(group, info, near):
+    """Duplicates of `group` that apply may point at its canonical member"""
+    if group.kind != 'near':
+        return group.duplicates
+    if not near:
+        return []
+    return [d for d in group.duplicates if info[d]['size'] == info[group.canonical]['size']]
+
+
+def mentioned(graph, rel):
+    """Project text files other than rel's sidecars that name rel by path, file name or uid"""
+    needles = [f'res://{rel}', f'"{os.path.basename(rel)}"']
+    needles += [uid for uid, target in graph.uids.items() if target == rel]
+    hits = []
+    for other in graph._walk():
+        if other.endswith(MENTION_EXTS) and not other.startswith(rel + '.'):
+            text = (graph.root / other).read_text(errors='ignore')
+            if any(needle in text for needle in needles):
+                hits.append(other)
+    return hits
+
+
+def import_uid(root, rel):
+    sidecar = Path(root) / (rel + '.import')
+    if sidecar.exists():
+        match = re.search(r'^uid="(uid://\w+)"', sidecar.read_text(errors='ignore'), re.MULTILINE)
+        if match:
+            return match.group(1)
+    return None
+
+
+def rewrite(root, file, old, new, uid):
+    """Point `file`'s references to res://old at res://new; True if the file changed"""
+    path = Path(root) / file
+    text = path.read_text(encoding='utf-8')
+    old_ref, new_ref = f'res://{old}', f'res://{new}'
+    if file.endswith(('.tscn', '.tres')):
+        def ext_resource(match):
+            line = match.group(0)
+            if f'path="{old_ref}"' not in line:
+                return line
+            line = line.replace(f'path="{old_ref}"', f'path="{new_ref}"')
+            if uid:
+                line = re.sub(r'uid="uid://\w+"', f'uid="{uid}"', line)
+            return line
+        updated = re.sub(r'^\[ext_resource [^\n]*\]$', ext_resource, text, flags=re.MULTILINE)
+    else:
+        updated = text.replace(f'"{old_ref}"', f'"{new_ref}"')
+    if updated == text:
+        return False
+    path.write_text(updated, encoding='utf-8')
+    return True
+
+
+def report(groups, info, alive, root):
+    if not groups:
+        print("No duplicate images.")
+        return
+    wasted = 0
+    vram = 0
+    for group in groups:
+        print(f"\n{group.kind}: keep {group.canonical}")
+        for dup in group.duplicates:
+            size = os.path.getsize(Path(root) / dup)
+            width, height = info[dup]['size']
+            wasted += size
+            if dup in alive and group.canonical in alive:
+                vram += width * height * 4
+            note = '' if info[dup]['size'] == info[group.canonical]['size'] else f"  ({width}x{height})"
+            print(f"  {format_size(size)}  {dup}{'' if dup in alive else '  [unreachable]'}{note}")
+    print(f"\n{len(groups)} group(s): {format_size(wasted).strip()} of duplicate files, "
+          f"{format_size(vram).strip()} of duplicate RGBA8 textures at runtime")
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args and not args[0].startswith('--') else 'report'
+    with ProjectIndex() as index:
+        graph = ResourceGraph(index)
+        prints = Fingerprints(graph.root)
+        groups, info, alive = find_groups(graph, prints)
+        if command == 'report':
+            report(groups, info, alive, graph.root)
+            return 0
+        if command != 'apply':
+            print(__doc__)
+            return 2
+
+        changed = set()
+        deleted = []
+        for group in groups:
+            uid = import_uid(graph.root, group.canonical)
+            for dup in remappable(group, info, '--near' in args):
+                for file, _ in references(index, dup):
+                    if rewrite(graph.root, file, dup, group.canonical, uid):
+                        changed.add(file)
+        index.refresh()
+        if '--delete' in args:
+            for group in groups:
+                for dup in remappable(group, info, '--near' in args):
+                    if not mentioned(graph, dup):
+                        for path in (graph.root / dup, graph.root / (dup + '.import')):
+                            if path.exists():
+                                path.unlink()
+                        deleted.append(dup)
+        for file in sorted(changed):
+            print(f"  remapped {file}")
+        for dup in deleted:
+            print(f"  deleted  {dup}")
+        print(f"Remapped {len(changed)} file(s), deleted {len(deleted)} duplicate(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
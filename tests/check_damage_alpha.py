@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 """Check alpha channel in damage sprites"""
 
-from PIL import Image
 import numpy as np
 
+from sprite_cache import load_rgba
+
 for level in [0, 3, 5]:
     print(f"\n=== Damage level {level} ===")
 
-    damage = Image.open(f'assets/ui/health/damage/health_damage_{level}.webp').convert('RGBA')
-    arr = np.array(damage)
+    arr = load_rgba(f'assets/ui/health/damage/health_damage_{level}.webp')
     alpha = arr[:, :, 3]
 
     print(f"Alpha channel stats:")
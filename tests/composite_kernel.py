@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Alpha-only compositing kernel for the breathing/degradation previews.
+
+In every preview loop the only per-frame input is the scalar breathing
+alpha, yet each frame used to copy the layers, round-trip them through
+np.array()/Image.fromarray() and run two or three Image.alpha_composite
+calls. Porter-Duff "over" is linear in premultiplied colour, so for a
+fixed stack of layers over an opaque background
+
+    frame(alpha) = S0 + alpha * S1
+
+where S0 is the premultiplied static stack (breathing layer invisible)
+and S1 the premultiplied contribution of the breathing layer. Because the
+background is opaque, premultiplied and straight colour coincide, so both
+terms are taken from the reference path itself: S0 = frame(0) and
+S0 + S1 = frame(1).
+
+The reference path does not use alpha itself but the breathing layer's
+alpha truncated to uint8 per pixel, a8 = int(A * alpha) for a pixel of
+alpha A (modulate_alpha). Given A, the kernel applies the same truncation
+and lerps each pixel by a8 / A:
+
+    frame = frame(0) + (d * a8 + A // 2) // A,  d = frame(1) - frame(0)
+
+A sprite has only a handful of distinct alphas, so per frame that is a
+table over (distinct A, d in -255..255) and one gather through an index
+precomputed with the kernel.
+
+Without A it falls back to one weight for the whole frame,
+w = round(alpha * 256), and is off by up to 2 wherever the truncation
+bites.
+
+What remains is PIL's own rounding: alpha_composite rounds in fixed point
+after every layer of the stack, the kernel once. That leaves at most one
+code value (TOLERANCE) on a small fraction of pixels; the endpoints are
+exact. The benchmark checks that bound and prints the share of values
+that differ.
+
+Usage:
+    from composite_kernel import AlphaKernel, sandwich_reference
+
+    kernel = AlphaKernel(lambda a: sandwich_reference(bottom, middle, top, a),
+                         layer_alpha=np.array(middle)[:, :, 3])
+    frame = kernel.frame(0.42)                # (H, W, 3) uint8
+
+    python3 tests/composite_kernel.py [damage_level] [frames]   # benchmark
+"""
+
+import sys
+import time
+
+from PIL import Image
+import numpy as np
+
+# Max per-channel difference to the Porter-Duff reference path: PIL's
+# per-layer fixed-point rounding, which a single lerp cannot reproduce
+TOLERANCE = 1
+BACKGROUND = (60, 60, 60, 255)
+WEIGHT_ONE = 256
+# frame(1) - frame(0) per channel
+DIFFS = np.arange(-255, 256)
+
+
+def modulate_alpha(image, alpha):
+    """Reference alpha modulation used by the previews (truncates to uint8)"""
+    array = np.array(image)
+    array[:, :, 3] = (array[:, :, 3] * alpha).astype(np.uint8)
+    return Image.fromarray(array)
+
+
+def sandwich_reference(bottom, middle, top, alpha, background=BACKGROUND):
+    """
+    The previews' Porter-Duff path: BOTTOM, MIDDLE at `alpha`, optional TOP,
+    composited over an opaque background. Returns (H, W, 3) uint8.
+    """
+    composite = Image.alpha_composite(bottom, modulate_alpha(middle, alpha))
+    if top is not None:
+        composite = Image.alpha_composite(composite, top)
+    canvas = Image.new('RGBA', composite.size, background)
+    return np.array(Image.alpha_composite(canvas, composite).convert('RGB'))
+
+
+class AlphaKernel:
+    """
+    Precomputed static layers for one layer stack.
+
+    `render(alpha)` is the reference compositing path; it is called twice
+    (alpha 0 and 1) and must be affine in alpha over an opaque background.
+    `layer_alpha` is the (H, W) uint8 alpha of the modulated layer in
+    output coordinates, so frames reproduce modulate_alpha's truncation.
+    """
+
+    def __init__(self, render, layer_alpha=None):
+        self.lo = np.asarray(render(0.0)).astype(np.uint16)
+        self.hi = np.asarray(render(1.0)).astype(np.uint16)
+        if self.lo.shape != self.hi.shape:
+            raise ValueError("render(0) and render(1) returned different shapes")
+        self.levels = None
+        if layer_alpha is not None:
+            if layer_alpha.shape != self.lo.shape[:2]:
+                raise ValueError(f"layer_alpha is {layer_alpha.shape}, frames are {self.lo.shape[:2]}")
+            levels, level = np.unique(np.asarray(layer_alpha, dtype=np.uint8), return_inverse=True)
+            self.levels = levels.astype(np.int64)
+            self.base = self.lo.astype(np.int16)
+            d = self.hi.astype(np.int32) - self.lo
+            self.index = level.reshape(self.lo.shape[:2] + (1,)) * DIFFS.size + (d - DIFFS[0])
+
+    @staticmethod
+    def weights(alphas):
+        return np.rint(np.clip(np.asarray(alphas, dtype=float), 0.0, 1.0) * WEIGHT_ONE).astype(np.uint16)
+
+    def frame(self, alpha):
+        """One (H, W, C) uint8 frame"""
+        if self.levels is None:
+            w = int(self.weights(alpha))
+            out = self.lo * np.uint16(WEIGHT_ONE - w)
+            out += self.hi * np.uint16(w)
+            out += 128
+            out >>= 8
+            return out.astype(np.uint8)
+        # modulate_alpha's truncation; A = 0 leaves a8 = 0, so any divisor does
+        a8 = (self.levels * float(np.clip(alpha, 0.0, 1.0))).astype(np.int64)[:, None]
+        divisor = np.maximum(self.levels, 1)[:, None]
+        table = (DIFFS * a8 + divisor // 2) // divisor
+        return (self.base + table.astype(np.int16).take(self.index)).astype(np.uint8)
+
+
+def breathing_alpha(t, period=3.0, peak=0.6):
+    """Sinusoidal breathing alpha in [0, peak] used by the previews"""
+    return (np.sin(np.asarray(t) * 2 * np.pi / period) + 1.0) / 2.0 * peak
+
+
+def load_level(level):
+    """(bottom, middle, top) RGBA layers of one damage level"""
+    return (
+        Image.open(f'assets/ui/health/damage/health_damage_{level}.webp').convert('RGBA'),
+        Image.open(f'assets/ui/health/breathing_masked/health_breathing_{level}_masked.webp').convert('RGBA'),
+        Image.open(f'assets/ui/health/top_layers/top_layer_damage_{level}.webp').convert('RGBA'),
+    )
+
+
+def benchmark(level=3, frame_count=90, fps=30):
+    """Time the reference path against the kernel and check equivalence"""
+    bottom, middle, top = load_level(level)
+    alphas = breathing_alpha(np.arange(frame_count) / fps)
+
+    start = time.perf_counter()
+    reference = [sandwich_reference(bottom, middle, top, a) for a in alphas]
+    ref_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    kernel = AlphaKernel(lambda a: sandwich_reference(bottom, middle, top, a),
+                         layer_alpha=np.array(middle)[:, :, 3])
+    setup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = [kernel.frame(a) for a in alphas]
+    frame_time = time.perf_counter() - start
+
+    worst = 0
+    differing = 0
+    for ref, one in zip(reference, single):
+        diff = np.abs(ref.astype(np.int16) - one.astype(np.int16))
+        worst = max(worst, int(diff.max()))
+        differing += int(np.count_nonzero(diff))
+
+    total_values = sum(ref.size for ref in reference)
+    per = lambda seconds: seconds / frame_count * 1000
+    print(f"=== Compositing benchmark: damage level {level}, {frame_count} frames "
+          f"({reference[0].shape[1]}x{reference[0].shape[0]}) ===")
+    print(f"  Porter-Duff reference : {per(ref_time):7.3f} ms/frame")
+    print(f"  Kernel setup          : {setup_time * 1000:7.3f} ms (once per level)")
+    print(f"  Kernel, per frame     : {per(frame_time):7.3f} ms/frame  (x{ref_time / frame_time:.1f})")
+    print(f"  Max channel diff      : {worst} (tolerance {TOLERANCE}), "
+          f"{differing / total_values * 100:.3f}% of values differ")
+    return worst <= TOLERANCE
+
+
+def main():
+    level = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    frame_count = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+    ok = benchmark(level, frame_count)
+    print("✓ Kernel matches reference" if ok else "✗ Kernel exceeds tolerance")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,50 +5,46 @@ Create HOLE masks by COLOR analysis (not comparison).
 Analyze the damage sprite directly:
 - PINK pixels (healthy lungs) → CUT HOLE (transparent α=0)
 - DARK pixels (damaged lungs) → KEEP SOLID (opaque α=255)
+
+The game's top layers (assets/ui/health/top_layers/) come from the pink
+detection rule (create_holes_pink_detection.py, sprite_build.py); this
+variant writes to OUTPUT_DIR for comparison, so the two never overwrite
+each other.
+
+Damage levels are processed in parallel (see sprite_pool.py).
 """
 
+import os
+import time
+
 from PIL import Image
 import numpy as np
 
-print("=== Creating HOLE masks by COLOR analysis ===\n")
+from pixel_classifier import LUNG_RULES
+from sprite_cache import load_rgba
+from sprite_pool import DAMAGE_LEVELS, run_parallel, print_timings
 
-for level in range(6):
-    print(f"Processing damage level {level}:")
+OUTPUT_DIR = '.build/top_layers_by_color'
 
-    # Load damage sprite
-    if level == 0:
-        damage_img = Image.open('assets/ui/health/health_damage_0_healthy.webp').convert('RGBA')
-    else:
-        damage_img = Image.open(f'assets/ui/health/health_damage_{level if level < 5 else "5_critical"}.webp').convert('RGBA')
 
-    damage_array = np.array(damage_img)
+def process_level(level):
+    """Cut holes in one damage sprite and return its pixel statistics"""
+    damage_array = load_rgba(f'assets/ui/health/damage/health_damage_{level}.webp')
 
     # Analyze pixel colors to detect healthy (pink) vs damaged (dark)
     # Healthy lungs: PINK color (high R, medium-high G, medium-high B)
     # Damaged lungs: DARK color (low R, low G, low B) or crosshatch pattern
-
-    r = damage_array[:, :, 0].astype(float)
-    g = damage_array[:, :, 1].astype(float)
-    b = damage_array[:, :, 2].astype(float)
+    #
+    # Healthy = bright (mean > 150) + reddish tint + visible (alpha > 128),
+    # evaluated as one lookup-table gather (see pixel_classifier.py)
+    classifier = LUNG_RULES.compile()
+    bits = classifier.classify(damage_array)
     a = damage_array[:, :, 3]
 
-    # Calculate brightness (grayscale value)
-    brightness = (r + g + b) / 3.0
-
-    # Detect pink/healthy pixels:
-    # - High brightness (bright, not dark)
-    # - Reddish tint (R > G and R > B)
-    # - Not too saturated (not pure red)
-
-    is_bright = brightness > 150  # Bright pixels
-    is_reddish = (r > g * 0.8) & (r > b * 0.8)  # Reddish tint
-    is_visible = a > 128  # Has alpha (visible)
-
-    # Healthy = bright + reddish + visible
-    is_healthy = is_bright & is_reddish & is_visible
+    is_healthy = classifier.match(bits, 'healthy_bright', 'visible')
 
     # Damaged = NOT healthy (dark or non-reddish)
-    is_damaged = ~is_healthy & is_visible
+    is_damaged = classifier.match(bits, 'visible', exclude=('healthy_bright',))
 
     # Create TOP layer with holes
     top_layer = damage_array.copy()
@@ -64,20 +60,43 @@ for level in range(6):
     top_layer[a == 0, :] = [0, 0, 0, 0]
 
     # Save TOP layer
-    top_layer_img = Image.fromarray(top_layer, mode='RGBA')
-    output_path = f'assets/ui/health/top_layer_damage_{level}.webp'
+    top_layer_img = Image.fromarray(top_layer)
+    output_path = f'{OUTPUT_DIR}/top_layer_damage_{level}.webp'
     top_layer_img.save(output_path, 'WEBP', lossless=True, quality=100)
 
-    # Calculate statistics
-    healthy_percent = (np.sum(is_healthy) / (damage_array.shape[0] * damage_array.shape[1])) * 100
-    damaged_percent = (np.sum(is_damaged) / (damage_array.shape[0] * damage_array.shape[1])) * 100
-    transparent_percent = (np.sum(a == 0) / (damage_array.shape[0] * damage_array.shape[1])) * 100
+    total = damage_array.shape[0] * damage_array.shape[1]
+    return {
+        'healthy_percent': np.sum(is_healthy) / total * 100,
+        'damaged_percent': np.sum(is_damaged) / total * 100,
+        'transparent_percent': np.sum(a == 0) / total * 100,
+        'output_path': output_path,
+    }
+
+
+def main():
+    print("=== Creating HOLE masks by COLOR analysis ===\n")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    LUNG_RULES.compile()  # build the lookup table once, before workers need it
+
+    start = time.perf_counter()
+    results = run_parallel(process_level, DAMAGE_LEVELS)
+    wall = time.perf_counter() - start
+
+    for result in results:
+        stats = result.value
+        print(f"Processing damage level {result.item}:")
+        print(f"  Healthy pixels (HOLES): {stats['healthy_percent']:.1f}%")
+        print(f"  Damaged pixels (SOLID): {stats['damaged_percent']:.1f}%")
+        print(f"  Background (transparent): {stats['transparent_percent']:.1f}%")
+        print(f"  Saved: {stats['output_path']}\n")
+
+    print_timings(results, wall, label="level")
+
+    print("\n=== DONE ===")
+    print("Top layers created with HOLES where pixels are PINK (healthy)")
+    print("Damaged (dark) areas remain SOLID")
 
-    print(f"  Healthy pixels (HOLES): {healthy_percent:.1f}%")
-    print(f"  Damaged pixels (SOLID): {damaged_percent:.1f}%")
-    print(f"  Background (transparent): {transparent_percent:.1f}%")
-    print(f"  Saved: {output_path}\n")
 
-print("=== DONE ===")
-print("Top layers created with HOLES where pixels are PINK (healthy)")
-print("Damaged (dark) areas remain SOLID")
+if __name__ == "__main__":
+    main()
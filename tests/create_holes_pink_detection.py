@@ -5,44 +5,39 @@ Refined HOLE detection: Specifically detect PINK healthy lungs.
 Pink lungs: R high, G/B moderate, REDDISH hue (R > G and R > B significantly)
 Dark damaged: Low RGB
 Beige background: High RGB but neutral (R≈G≈B)
+
+Damage levels are processed in parallel (see sprite_pool.py).
 """
 
+import time
+
 from PIL import Image
 import numpy as np
 
-print("=== Creating HOLE masks with PINK detection ===\n")
+from pixel_classifier import LUNG_RULES
+from sprite_cache import load_rgba
+from sprite_pool import DAMAGE_LEVELS, run_parallel, print_timings
 
-for level in range(6):
-    print(f"Processing damage level {level}:")
 
-    # Load damage sprite
-    if level == 0:
-        damage_img = Image.open('assets/ui/health/health_damage_0_healthy.webp').convert('RGBA')
-    else:
-        damage_img = Image.open(f'assets/ui/health/health_damage_{level if level < 5 else "5_critical"}.webp').convert('RGBA')
-
-    damage_array = np.array(damage_img)
-
-    r = damage_array[:, :, 0].astype(float)
-    g = damage_array[:, :, 1].astype(float)
-    b = damage_array[:, :, 2].astype(float)
-    a = damage_array[:, :, 3]
+def process_level(level):
+    """Cut holes where one damage sprite is pink and return its pixel statistics"""
+    damage_array = load_rgba(f'assets/ui/health/damage/health_damage_{level}.webp')
 
     # Detect PINK healthy lungs:
     # - High R (reddish)
     # - R significantly greater than G and B (not beige/neutral)
     # - Moderate overall brightness (not too dark, not background bright)
-    # - Visible (alpha > 0)
-
-    is_reddish = (r > 180) & (r > g + 30) & (r > b + 30)  # R much higher than G/B
-    is_pink_range = (r > 180) & (r < 255) & (g > 120) & (g < 200) & (b > 120) & (b < 200)
-    is_visible = a > 128
+    # - Visible (alpha > 128)
+    # All evaluated as one lookup-table gather (see pixel_classifier.py)
+    classifier = LUNG_RULES.compile()
+    bits = classifier.classify(damage_array)
+    a = damage_array[:, :, 3]
 
     # Pink = reddish + in pink range + visible
-    is_pink_healthy = (is_reddish | is_pink_range) & is_visible
+    is_pink_healthy = classifier.match(bits, 'pink', 'visible')
 
     # NOT pink = everything else that's visible
-    is_not_pink = ~is_pink_healthy & is_visible
+    is_not_pink = classifier.match(bits, 'visible', exclude=('pink',))
 
     # Create TOP layer
     top_layer = damage_array.copy()
@@ -57,19 +52,41 @@ for level in range(6):
     top_layer[a == 0, :] = [0, 0, 0, 0]
 
     # Save
-    top_layer_img = Image.fromarray(top_layer, mode='RGBA')
-    output_path = f'assets/ui/health/top_layer_damage_{level}.webp'
+    top_layer_img = Image.fromarray(top_layer)
+    output_path = f'assets/ui/health/top_layers/top_layer_damage_{level}.webp'
     top_layer_img.save(output_path, 'WEBP', lossless=True, quality=100)
 
-    # Stats
-    pink_percent = (np.sum(is_pink_healthy) / (damage_array.shape[0] * damage_array.shape[1])) * 100
-    not_pink_percent = (np.sum(is_not_pink) / (damage_array.shape[0] * damage_array.shape[1])) * 100
-    transparent_percent = (np.sum(a == 0) / (damage_array.shape[0] * damage_array.shape[1])) * 100
+    total = damage_array.shape[0] * damage_array.shape[1]
+    return {
+        'pink_percent': np.sum(is_pink_healthy) / total * 100,
+        'not_pink_percent': np.sum(is_not_pink) / total * 100,
+        'transparent_percent': np.sum(a == 0) / total * 100,
+        'output_path': output_path,
+    }
+
+
+def main():
+    print("=== Creating HOLE masks with PINK detection ===\n")
+
+    LUNG_RULES.compile()  # build the lookup table once, before workers need it
+
+    start = time.perf_counter()
+    results = run_parallel(process_level, DAMAGE_LEVELS)
+    wall = time.perf_counter() - start
+
+    for result in results:
+        stats = result.value
+        print(f"Processing damage level {result.item}:")
+        print(f"  PINK (healthy) - HOLES: {stats['pink_percent']:.1f}%")
+        print(f"  NOT pink (damaged+bg): {stats['not_pink_percent']:.1f}%")
+        print(f"  Transparent background: {stats['transparent_percent']:.1f}%")
+        print(f"  Saved: {stats['output_path']}\n")
+
+    print_timings(results, wall, label="level")
+
+    print("\n=== DONE ===")
+    print("Holes cut where PINK (healthy) pixels detected")
 
-    print(f"  PINK (healthy) - HOLES: {pink_percent:.1f}%")
-    print(f"  NOT pink (damaged+bg): {not_pink_percent:.1f}%")
-    print(f"  Transparent background: {transparent_percent:.1f}%")
-    print(f"  Saved: {output_path}\n")
 
-print("=== DONE ===")
-print("Holes cut where PINK (healthy) pixels detected")
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,8 @@ from PIL import Image
 import numpy as np
 import os
 
+from sprite_cache import load_rgba
+
 print("=== Creating MASKED breathing sprites ===\n")
 
 # Create output directory
@@ -25,12 +27,8 @@ for level in range(6):
     damage_path = f'assets/ui/health/damage/health_damage_{level}.webp'
     breathing_path = f'assets/ui/health/breathing/health_breathing_{level}.webp'
 
-    damage = Image.open(damage_path).convert('RGBA')
-    breathing = Image.open(breathing_path).convert('RGBA')
-
-    # Convert to arrays
-    damage_array = np.array(damage)
-    breathing_array = np.array(breathing)
+    damage_array = load_rgba(damage_path)
+    breathing_array = load_rgba(breathing_path)
 
     # Extract alpha channels
     damage_alpha = damage_array[:, :, 3]
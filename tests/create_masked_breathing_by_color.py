@@ -4,48 +4,40 @@ Create MASKED breathing sprites by COLOR detection.
 
 Detect lung pixels in damage sprite (pink OR dark) vs background (beige).
 Mask breathing sprite to only show where lungs exist.
+
+Damage levels are processed in parallel (see sprite_pool.py).
 """
 
-from PIL import Image
-import numpy as np
 import os
+import time
 
-print("=== Creating MASKED breathing by COLOR ===\n")
-
-os.makedirs('assets/ui/health/breathing_masked', exist_ok=True)
+from PIL import Image
+import numpy as np
 
-for level in range(6):
-    print(f"Processing level {level}:")
+from pixel_classifier import LUNG_RULES
+from sprite_cache import load_rgba
+from sprite_pool import DAMAGE_LEVELS, run_parallel, print_timings
 
-    # Load sprites
-    damage = Image.open(f'assets/ui/health/damage/health_damage_{level}.webp').convert('RGBA')
-    breathing = Image.open(f'assets/ui/health/breathing/health_breathing_{level}.webp').convert('RGBA')
 
-    damage_array = np.array(damage)
-    breathing_array = np.array(breathing)
+def process_level(level):
+    """Mask one breathing sprite by its damage sprite and return pixel statistics"""
+    # Load sprites (decoded once, then memory-mapped from the sprite cache)
+    damage_array = load_rgba(f'assets/ui/health/damage/health_damage_{level}.webp')
+    breathing_array = load_rgba(f'assets/ui/health/breathing/health_breathing_{level}.webp')
 
     # Detect LUNG pixels in damage sprite (not background/gone)
     # Lungs are either PINK (healthy) or DARK (damaged)
     # Background is BEIGE (high RGB, neutral)
 
-    r = damage_array[:, :, 0].astype(float)
-    g = damage_array[:, :, 1].astype(float)
-    b = damage_array[:, :, 2].astype(float)
-    a = damage_array[:, :, 3]
-
-    # Background/gone areas: beige color RGB(247, 232, 210) ± tolerance
+    # Background/gone areas: beige color RGB(247, 232, 210) ± 20 per channel
     # Detected from sampling: (247.0, 232.0, 210.0)
-    beige_r, beige_g, beige_b = 247, 232, 210
-    tolerance = 20
-
-    is_beige = (
-        (np.abs(r - beige_r) < tolerance) &
-        (np.abs(g - beige_g) < tolerance) &
-        (np.abs(b - beige_b) < tolerance)
-    )
+    # Evaluated as one lookup-table gather (see pixel_classifier.py)
+    classifier = LUNG_RULES.compile()
+    bits = classifier.classify(damage_array)
+    is_beige = classifier.match(bits, 'beige')
 
     # Lung pixels = NOT beige AND visible
-    is_lung = ~is_beige & (a > 128)
+    is_lung = classifier.match(bits, 'visible', exclude=('beige',))
 
     # Create masked breathing
     masked_breathing = breathing_array.copy()
@@ -54,20 +46,44 @@ for level in range(6):
     masked_breathing[~is_lung] = [0, 0, 0, 0]
 
     # Save
-    masked_img = Image.fromarray(masked_breathing, mode='RGBA')
+    masked_img = Image.fromarray(masked_breathing)
     output_path = f'assets/ui/health/breathing_masked/health_breathing_{level}_masked.webp'
     masked_img.save(output_path, 'WEBP', lossless=True, quality=100)
 
-    # Stats
     total_pixels = damage_array.shape[0] * damage_array.shape[1]
-    lung_pixels = np.sum(is_lung)
-    beige_pixels = np.sum(is_beige)
-    lung_percent = (lung_pixels / total_pixels) * 100
-    beige_percent = (beige_pixels / total_pixels) * 100
+    return {
+        'lung_pixels': int(np.sum(is_lung)),
+        'beige_pixels': int(np.sum(is_beige)),
+        'total_pixels': total_pixels,
+        'output_path': output_path,
+    }
+
+
+def main():
+    print("=== Creating MASKED breathing by COLOR ===\n")
+
+    os.makedirs('assets/ui/health/breathing_masked', exist_ok=True)
+
+    LUNG_RULES.compile()  # build the lookup table once, before workers need it
+
+    start = time.perf_counter()
+    results = run_parallel(process_level, DAMAGE_LEVELS)
+    wall = time.perf_counter() - start
+
+    for result in results:
+        stats = result.value
+        lung_percent = stats['lung_pixels'] / stats['total_pixels'] * 100
+        beige_percent = stats['beige_pixels'] / stats['total_pixels'] * 100
+        print(f"Processing level {result.item}:")
+        print(f"  Lung pixels (kept): {stats['lung_pixels']:,} ({lung_percent:.1f}%)")
+        print(f"  Beige/gone (removed): {stats['beige_pixels']:,} ({beige_percent:.1f}%)")
+        print(f"  Saved: {stats['output_path']}\n")
+
+    print_timings(results, wall, label="level")
+
+    print("\n=== DONE ===")
+    print("Breathing sprites now only show where lungs exist!")
 
-    print(f"  Lung pixels (kept): {lung_pixels:,} ({lung_percent:.1f}%)")
-    print(f"  Beige/gone (removed): {beige_pixels:,} ({beige_percent:.1f}%)")
-    print(f"  Saved: {output_path}\n")
 
-print("=== DONE ===")
-print("Breathing sprites now only show where lungs exist!")
+if __name__ == "__main__":
+    main()
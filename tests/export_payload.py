@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Model what an export preset packs, rank it by size, and generate a slimmer filter.
+
+The Web preset exports with export_filter="all_resources", so its .pck
+carries every resource the import system knows about: screenshots,
+addons/gut, backups, legacy sprites. For the browser build every one of
+those bytes is a download. This tool models the preset's pack from the
+source tree, without Godot:
+
+    textures  payload as the import settings store it: compress/mode 0
+              (lossless) and 1 (lossy) are real WebP encodes of the
+              decoded pixels, 2 (VRAM) counts S3TC/BPTC and/or ETC2/ASTC
+              blocks per the preset, 3 is raw RGBA8; mipmaps add a third
+    scripts   source size (script_export_mode 0/1) or zlib size (2)
+    others    source size (scenes, fonts, audio, JSON); .import remaps added
+
+Each entry also gets its in-memory cost: RGBA8 (uncompressed) and the
+VRAM-compressed size it would have with compress/mode=2 (1 byte per pixel
+with alpha, half that without).
+
+Reachability comes from resource_graph.py. `filter` turns the unreachable
+part into an exclude_filter (whole directories collapse to 'dir/*'), and
+`files` into an explicit export_files list for export_filter="resources";
+Godot follows only ext_resource dependencies there, so the list has to
+name everything load() reaches too. `apply` writes the exclude_filter
+into the preset.
+
+Encodes run across the sprite_pool process pool and are cached in
+.build/payload_cache.json, keyed by source hash and import settings.
+
+Usage (from the project root):
+    python3 tests/export_payload.py [--preset Web] [--top 30]
+    python3 tests/export_payload.py filter [--preset Web]
+    python3 tests/export_payload.py files [--preset Web]
+    python3 tests/export_payload.py apply [--preset Web]
+"""
+
+import fnmatch
+import io
+import json
+import os
+import re
+import sys
+import zlib
+from pathlib import Path
+
+from PIL import Image
+import numpy as np
+
+import _scripts_path  # noqa: F401
+from godot_scene import iter_sections
+from project_index import ProjectIndex
+from resource_graph import ResourceGraph, format_size
+from sprite_cache import SpriteCache, load_rgba
+from sprite_pool import run_parallel
+
+PRESETS = 'export_presets.cfg'
+CACHE_PATH = Path('.build/payload_cache.json')
+# Bump when an estimate changes: invalidates the cache
+ESTIMATE_VERSION = 2
+MIPMAP_FACTOR = 4 / 3
+# Godot's defaults: rendering/textures/webp_compression/compression_method and
+# lossless_compression_factor
+WEBP_METHOD = 2
+WEBP_LOSSLESS_FACTOR = 25
+
+
+class Entry:
+    """One packed resource: payload bytes and memory cost"""
+
+    def __init__(self, path, pck, ram=0, vram=0, note=''):
+        self.path = path
+        self.pck = pck
+        self.ram = ram
+        self.vram = vram
+        self.note = note
+
+
+def load_preset(name, root='.'):
+    """(settings, options) dicts of the preset called `name`"""
+    sections = list(iter_sections((Path(root) / PRESETS).read_text(), PRESETS))
+    for section in sections:
+        if re.fullmatch(r'preset\.\d+', section.tag) and section.properties.get('name') == name:
+            options = next((s.properties for s in sections if s.tag == f'{section.tag}.options'), {})
+            return section.tag, section.properties, options
+    raise KeyError(f"no preset named {name!r} in {PRESETS}")
+
+
+def read_import(path):
+    """Properties of a .import file, all sections merged"""
+    values = {}
+    for section in iter_sections(path.read_text(errors='ignore'), str(path)):
+        values.update(section.properties)
+    return values
+
+
+def split_filter(text):
+    return [f.strip() for f in (text or '').split(',') if f.strip()]
+
+
+def matches(rel, patterns):
+    return any(fnmatch.fnmatch(rel, p.removeprefix('res://')) for p in patterns)
+
+
+class PayloadModel:
+    """Packed entries of one preset"""
+
+    def __init__(self, graph, preset='Web'):
+        self.graph = graph
+        self.root = graph.root
+        self.tag, self.settings, self.options = load_preset(preset, self.root)
+        self.hashes = SpriteCache(self.root / '.build/decode_cache')
+        self.cache = {}
+        cache = self.root / CACHE_PATH
+        if cache.exists():
+            try:
+                data = json.loads(cache.read_text())
+                if data.get('version') == ESTIMATE_VERSION:
+                    self.cache = data['sizes']
+            except (OSError, ValueError, KeyError):
+                pass
+        self._dirty = False
+        self._deferred = None
+
+    # -- what is packed -----------------------------------------------------
+
+    def packed(self):
+        """Resources the preset's filters select"""
+        mode = self.settings.get('export_filter', 'all_resources')
+        if mode == 'all_resources':
+            selected = set(self.graph.files)
+        else:
+            # "resources" / "scenes": the listed files plus their ext_resource closure
+            selected = set()
+            pending = [f.removeprefix('res://') for f in self.settings.get('export_files', [])]
+            while pending:
+                rel = pending.pop()
+                if rel in self.graph.files and rel not in selected:
+                    selected.add(rel)
+                    pending.extend(self._ext_dependencies(rel))
+        excluded = split_filter(self.settings.get('exclude_filter'))
+        included = split_filter(self.settings.get('include_filter'))
+        selected = {rel for rel in selected if not matches(rel, excluded)}
+        if included:
+            for rel in self.graph._walk():
+                if matches(rel, included) and not matches(rel, excluded):
+                    selected.add(rel)
+        return selected
+
+    def _ext_dependencies(self, rel):
+        return [dep for _, _, _, path in self.graph.index.ext_resources(rel) if path
+                for dep in self.graph.resolve(path)]
+
+    # -- sizes --------------------------------------------------------------
+
+    def entry(self, rel):
+        path = self.root / rel
+        sidecar = path.with_name(path.name + '.import')
+        remap = sidecar.stat().st_size if sidecar.exists() else 0
+        if not sidecar.exists():
+            size = path.stat().st_size
+            if rel.endswith('.gd') and self.settings.get('script_export_mode') == 2:
+                return Entry(rel, len(zlib.compress(path.read_bytes())), note='zlib tokens')
+            return Entry(rel, size)
+        settings = read_import(sidecar)
+        if settings.get('importer') != 'texture':
+            return Entry(rel, path.stat().st_size + remap, note=settings.get('importer', ''))
+        return self._texture(rel, settings, remap)
+
+    def _texture(self, rel, settings, remap):
+        path = self.root / rel
+        mode = settings.get('compress/mode', 0)
+        mip = MIPMAP_FACTOR if settings.get('mipmaps/generate') else 1.0
+        if path.suffix.lower() == '.svg':
+            # Rasterized by Godot; PIL cannot decode SVG, so only the source is counted
+            return Entry(rel, path.stat().st_size + remap, note='svg, not estimated')
+
+        pixels = load_rgba(path, self.root / '.build/decode_cache')
+        height, width = pixels.shape[:2]
+        has_alpha = bool((pixels[:, :, 3] < 255).any())
+        ram = int(width * height * 4 * mip)
+        vram = int(width * height * (1.0 if has_alpha else 0.5) * mip)
+
+        if mode == 0:
+            pck, note = self._encoded(path, lossless=True) * mip, 'lossless'
+        elif mode == 1:
+            quality = int(round(float(settings.get('compress/lossy_quality', 0.7)) * 100))
+            pck, note = self._encoded(path, lossless=False, quality=quality) * mip, f'lossy q{quality}'
+        elif mode == 2:
+            formats = [flag for flag in ('for_desktop', 'for_mobile')
+                       if self.options.get(f'vram_texture_compression/{flag}', True)]
+            pck, note = vram * len(formats), 'vram ' + '+'.join(f.removeprefix('for_') for f in formats)
+        elif mode == 3:
+            pck, note = ram, 'uncompressed'
+        else:
+            pck, note = vram, 'basis (≈1 B/px)'
+        return Entry(rel, int(pck) + remap, ram, vram, note)
+
+    def _encoded(self, path, lossless, quality=100):
+        key = f"{self.hashes.source_hash(path)}:{'lossless' if lossless else quality}"
+        if key not in self.cache:
+            job = (str(path), str(self.root / '.build/decode_cache'), lossless, quality)
+            if self._deferred is not None:
+                self._deferred[key] = job
+                return 0
+            self.cache[key] = encoded_size(job)
+            self._dirty = True
+        return self.cache[key]
+
+    def entries(self, selected=None):
+        """Entries of the packed resources (or of `selected`), largest payload first"""
+        selected = sorted(self.packed() if selected is None else selected)
+        # First pass collects the missing encodes, which then run across the pool
+        self._deferred = {}
+        for rel in selected:
+            self.entry(rel)
+        jobs, self._deferred = self._deferred, None
+        if jobs:
+            for key, result in zip(jobs, run_parallel(encoded_size, jobs.values())):
+                self.cache[key] = result.value
+            self._dirty = True
+        result = sorted((self.entry(rel) for rel in selected), key=lambda e: (-e.pck, e.path))
+        self.save_cache()
+        return result
+
+    def save_cache(self):
+        self.hashes.save()
+        if not self._dirty:
+            return
+        path = self.root / CACHE_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps({'version': ESTIMATE_VERSION, 'sizes': self.cache}, indent=1))
+        os.replace(tmp, path)
+        self._dirty = False
+
+
+def encoded_size(job):
+    """Bytes of the WebP Godot's importer would store for a sprite (runs in a pool worker)"""
+    path, cache_dir, lossless, quality = job
+    buffer = io.BytesIO()
+    image = Image.fromarray(np.asarray(load_rgba(path, cache_dir)))
+    if lossless:
+        image.save(buffer, 'WEBP', lossless=True, quality=WEBP_LOSSLESS_FACTOR, method=WEBP_METHOD)
+    else:
+        image.save(buffer, 'WEBP', quality=quality, method=WEBP_METHOD)
+    return buffer.tell()
+
+
+# -- filters ------------------------------------------------------------------
+
+def exclude_patterns(graph, keep):
+    """Shortest exclude_filter covering every resource not in `keep`: whole dirs become 'dir/*'"""
+    dead = set(graph.files) - set(keep)
+    alive_dirs = set()
+    for rel in keep:
+        parts = rel.split('/')[:-1]
+        alive_dirs.update('/'.join(parts[:i]) for i in range(1, len(parts) + 1))
+    patterns = set()
+    for rel in dead:
+        parts = rel.split('/')
+        # Topmost directory without a live resource in it
+        for i in range(1, len(parts)):
+            directory = '/'.join(parts[:i])
+            if directory not in alive_dirs:
+                patterns.add(f'{directory}/*')
+                break
+        else:
+            patterns.add(rel)
+    return sorted(patterns)
+
+
+def apply_exclude_filter(tag, patterns, root='.'):
+    """Rewrite exclude_filter= of preset section `tag` in export_presets.cfg"""
+    path = Path(root) / PRESETS
+    text = path.read_text()
+    start = text.index(f'[{tag}]')
+    end = text.find('\n[', start + 1)
+    end = len(text) if end < 0 else end
+    block = re.sub(r'^exclude_filter=".*"$', f'exclude_filter="{", ".join(patterns)}"',
+                   text[start:end], count=1, flags=re.MULTILINE)
+    path.write_text(text[:start] + block + text[end:])
+
+
+def report(model, entries, top):
+    alive = model.graph.reachable()
+    total = sum(e.pck for e in entries)
+    live = [e for e in entries if e.path in alive]
+    print(f"Preset {model.settings.get('name')!r}: export_filter={model.settings.get('export_filter')!r}, "
+          f"{len(entries)} resources packed")
+    print(f"  modelled pack:     {format_size(total).strip()}")
+    print(f"  reachable only:    {format_size(sum(e.pck for e in live)).strip()} ({len(live)} resources)")
+    print(f"  RGBA8 in memory:   {format_size(sum(e.ram for e in live)).strip()} (reachable textures)")
+    print(f"  VRAM-compressed:   {format_size(sum(e.vram for e in live)).strip()} (if compress/mode=2)")
+
+    print(f"\nTop {min(top, len(entries))} contributors:")
+    print(f"  {'pck':>11s}  {'RGBA8':>11s}  {'VRAM':>11s}  {'':4s}  path")
+    for e in entries[:top]:
+        flag = 'live' if e.path in alive else 'DEAD'
+        ram = format_size(e.ram) if e.ram else ' ' * 11
+        vram = format_size(e.vram) if e.vram else ' ' * 11
+        print(f"  {format_size(e.pck)}  {ram}  {vram}  {flag}  {e.path}" + (f"  ({e.note})" if e.note else ''))
+
+
+def main():
+    args = sys.argv[1:]
+    preset = 'Web'
+    top = 30
+    if '--preset' in args:
+        preset = args.pop(args.index('--preset') + 1)
+        args.remove('--preset')
+    if '--top' in args:
+        top = int(args.pop(args.index('--top') + 1))
+        args.remove('--top')
+    command = args[0] if args else 'report'
+
+    with ProjectIndex() as index:
+        graph = ResourceGraph(index)
+        model = PayloadModel(graph, preset)
+        keep = sorted(graph.reachable())
+        if command == 'report':
+            report(model, model.entries(), top)
+        elif command == 'filter':
+            patterns = exclude_patterns(graph, keep)
+            saved = sum(e.pck for e in model.entries(set(graph.files) - set(keep)))
+            print(f"# {len(patterns)} patterns, saves ≈{format_size(saved).strip()} from the {preset} pack")
+            print(f'exclude_filter="{", ".join(patterns)}"')
+        elif command == 'files':
+            files = ', '.join(f'"res://{rel}"' for rel in keep)
+            print('export_filter="resources"')
+            print(f'export_files=PackedStringArray({files})')
+        elif command == 'apply':
+            patterns = exclude_patterns(graph, keep)
+            apply_exclude_filter(model.tag, patterns, graph.root)
+            print(f"Wrote {len(patterns)} exclude patterns to [{model.tag}] ({preset}) in {PRESETS}")
+        else:
+            print(__doc__)
+            return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,60 +1,65 @@
 #!/usr/bin/env python3
 """Extract region_rect data for all parallax assets"""
 
-import re
 import json
 
-with open('scenes/ParallaxScalingEditor.tscn', 'r') as f:
-    content = f.read()
+import _scripts_path  # noqa: F401
+from project_index import load_scene
 
-# Pattern to extract sprite with region data
-pattern = r'\[node name="(\w+)" type="Sprite2D"[^\[]*?texture = ExtResource\("(\d+)_\w+"\)[^\[]*?region_enabled = true[^\[]*?region_rect = Rect2\(([\d.]+),\s*([\d.]+),\s*([\d.]+),\s*([\d.]+)\)'
-
-matches = re.finditer(pattern, content, re.DOTALL)
-
-regions = {}
-for match in matches:
-    name = match.group(1)
-    x = float(match.group(3))
-    y = float(match.group(4))
-    w = float(match.group(5))
-    h = float(match.group(6))
-
-    regions[name] = {
-        "x": x,
-        "y": y,
-        "width": w,
-        "height": h
-    }
+SCENE = 'scenes/ParallaxScalingEditor.tscn'
+OUTPUT = 'data/parallax_regions.json'
 
 # Categorize by layer
 far_assets = ['LotusPark', 'LaalKila', 'Hauskhas', 'Hanuman']
 mid_assets = ['BuildingGeneric', 'TwoStoreyBuilding', 'Restaurant', 'Shop', 'Pharmacy']
 front_assets = ['Tree1', 'Tree2', 'Tree3', 'FruitStall', 'Billboard']
 
-print("="*70)
-print("REGION RECTANGLES FOR PARALLAX ASSETS")
-print("="*70)
-
-for layer_name, asset_list in [('FAR', far_assets), ('MID', mid_assets), ('FRONT', front_assets)]:
-    print(f"\n{layer_name} LAYER:")
-    for asset in asset_list:
-        if asset in regions:
-            r = regions[asset]
-            print(f"  {asset:20s} Rect2({r['x']:4.0f}, {r['y']:4.0f}, {r['width']:4.0f}, {r['height']:4.0f})")
-        else:
-            print(f"  {asset:20s} NO REGION (uses full texture)")
-
-# Save to JSON
-output = {
-    "far": {name: regions.get(name) for name in far_assets},
-    "mid": {name: regions.get(name) for name in mid_assets},
-    "front": {name: regions.get(name) for name in front_assets}
-}
-
-with open('data/parallax_regions.json', 'w') as f:
-    json.dump(output, f, indent=2)
-
-print(f"\n{'='*70}")
-print("Saved to data/parallax_regions.json")
-print(f"{'='*70}")
+
+def extract_regions(scene):
+    """data/parallax_regions.json contents for a parsed editor scene"""
+    # Sprites with a texture and an enabled region
+    regions = {}
+    for node in scene.find(type='Sprite2D'):
+        rect = node.get('region_rect')
+        if node.get('texture') is None or not node.get('region_enabled') or rect is None:
+            continue
+        regions[node.name] = {
+            "x": rect.x,
+            "y": rect.y,
+            "width": rect.width,
+            "height": rect.height
+        }
+
+    return {
+        "far": {name: regions.get(name) for name in far_assets},
+        "mid": {name: regions.get(name) for name in mid_assets},
+        "front": {name: regions.get(name) for name in front_assets}
+    }
+
+
+def main():
+    output = extract_regions(load_scene(SCENE))
+
+    print("="*70)
+    print("REGION RECTANGLES FOR PARALLAX ASSETS")
+    print("="*70)
+
+    for layer_name, layer in [('FAR', output['far']), ('MID', output['mid']), ('FRONT', output['front'])]:
+        print(f"\n{layer_name} LAYER:")
+        for asset, r in layer.items():
+            if r:
+                print(f"  {asset:20s} Rect2({r['x']:4.0f}, {r['y']:4.0f}, {r['width']:4.0f}, {r['height']:4.0f})")
+            else:
+                print(f"  {asset:20s} NO REGION (uses full texture)")
+
+    # Save to JSON
+    with open(OUTPUT, 'w') as f:
+        json.dump(output, f, indent=2)
+
+    print(f"\n{'='*70}")
+    print(f"Saved to {OUTPUT}")
+    print(f"{'='*70}")
+
+
+if __name__ == "__main__":
+    main()
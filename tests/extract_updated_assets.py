@@ -1,21 +1,16 @@
 #!/usr/bin/env python3
 """Extract updated asset data from ParallaxScalingEditor.tscn after user edits"""
 
-import re
 import json
+
 import numpy as np
 
-# Parse the ParallaxScalingEditor.tscn file
-with open('scenes/ParallaxScalingEditor.tscn', 'r') as f:
-    content = f.read()
+import _scripts_path  # noqa: F401
+from parallax_fit import fit_all, predict, report, select_model
+from project_index import load_scene
 
-# Extract asset data
-assets = {
-    'far': {},
-    'mid': {},
-    'front': {},
-    'ground': {}
-}
+SCENE = 'scenes/ParallaxScalingEditor.tscn'
+OUTPUT = 'data/parallax_scales.json'
 
 # Asset categorization based on spawner layers
 far_assets = ['LotusPark', 'LaalKila', 'Hauskhas', 'Hanuman']
@@ -23,123 +18,164 @@ mid_assets = ['BuildingGeneric', 'TwoStoreyBuilding', 'Restaurant', 'Shop', 'Pha
 front_assets = ['Tree1', 'Tree2', 'Tree3', 'FruitStall', 'Billboard']
 ground_assets = ['VimBase']
 
-# Regex pattern to extract sprite data
-pattern = r'\[node name="(\w+)" type="Sprite2D".*?position = Vector2\(([\d.]+), ([\d.]+)\).*?scale = Vector2\(([\d.]+), ([\d.]+)\)'
-
-matches = re.finditer(pattern, content, re.DOTALL)
-
-for match in matches:
-    name = match.group(1)
-    x = float(match.group(2))
-    y = float(match.group(3))
-    scale_x = float(match.group(4))
-    scale_y = float(match.group(5))
-
-    # Use average scale if x and y differ slightly
-    scale = (scale_x + scale_y) / 2.0
-
-    # Categorize asset
-    if name in far_assets:
-        assets['far'][name] = {'scale': scale, 'y': y}
-    elif name in mid_assets:
-        assets['mid'][name] = {'scale': scale, 'y': y}
-    elif name in front_assets:
-        assets['front'][name] = {'scale': scale, 'y': y}
-    elif name in ground_assets:
-        assets['ground'][name] = {'scale': scale, 'y': y}
-    elif name == 'RoadTile':
-        # Extract road tile data
-        assets['road'] = {'scale': scale, 'y': y}
-
-# Extract camera position
-camera_match = re.search(r'\[node name="Camera2D".*?position = Vector2\(([\d.]+), ([\d.]+)\)', content, re.DOTALL)
-camera_x = float(camera_match.group(1))
-camera_y = float(camera_match.group(2))
-
-# Extract reference lines
-ground_match = re.search(r'\[node name="GroundReference".*?points = PackedVector2Array\([\d.]+, ([\d.]+)', content, re.DOTALL)
-horizon_match = re.search(r'\[node name="HorizonReference".*?points = PackedVector2Array\([\d.]+, ([\d.]+)', content, re.DOTALL)
-
-ground_y = float(ground_match.group(1))
-horizon_y = float(horizon_match.group(1))
-
-# Collect all scale-y pairs for regression
-scale_y_pairs = []
-for category in ['far', 'mid', 'front', 'ground']:
-    for asset_name, data in assets[category].items():
-        scale_y_pairs.append((data['scale'], data['y']))
-
-# Sort by scale for analysis
-scale_y_pairs.sort()
-
-# Perform quadratic regression: y = a + b*scale + c*scale²
-scales = np.array([p[0] for p in scale_y_pairs])
-y_values = np.array([p[1] for p in scale_y_pairs])
-
-# Fit quadratic polynomial
-coefficients = np.polyfit(scales, y_values, 2)
-quad_c = coefficients[0]  # scale² coefficient
-quad_b = coefficients[1]  # scale coefficient
-quad_a = coefficients[2]  # constant
-
-# Calculate fit quality
-y_predicted = quad_a + quad_b * scales + quad_c * scales * scales
-residuals = y_values - y_predicted
-mae = np.mean(np.abs(residuals))
-
-print("=" * 60)
-print("EXTRACTED ASSET DATA FROM PARALLAXSCALINGEDITOR.TSCN")
-print("=" * 60)
-print(f"\nCamera Position: ({camera_x}, {camera_y})")
-print(f"Ground Line: y = {ground_y}")
-print(f"Horizon Line: y = {horizon_y}")
-
-print(f"\n{'='*60}")
-print("QUADRATIC REGRESSION RESULTS")
-print(f"{'='*60}")
-print(f"Formula: y = {quad_a:.2f} + ({quad_b:.2f})*scale + ({quad_c:.2f})*scale²")
-print(f"Mean Absolute Error: {mae:.2f} pixels")
-
-print(f"\n{'='*60}")
-print("ASSET DATA BY LAYER")
-print(f"{'='*60}")
-
-for category in ['far', 'mid', 'front', 'ground']:
-    if assets[category]:
-        print(f"\n{category.upper()} LAYER:")
-        for name, data in sorted(assets[category].items(), key=lambda x: x[1]['scale'], reverse=True):
-            predicted_y = quad_a + quad_b * data['scale'] + quad_c * data['scale'] * data['scale']
-            error = data['y'] - predicted_y
-            print(f"  {name:20s} scale={data['scale']:.3f}  y={data['y']:7.2f}  (error: {error:+6.2f}px)")
-
-if 'road' in assets:
-    print(f"\nROAD:")
-    print(f"  RoadTile             scale={assets['road']['scale']:.3f}  y={assets['road']['y']:7.2f}")
-
-# Create JSON output
-output = {
-    "formula": {
-        "quad_a": round(quad_a, 2),
-        "quad_b": round(quad_b, 2),
-        "quad_c": round(quad_c, 2),
-        "description": f"y = {quad_a:.2f} + ({quad_b:.2f})*scale + ({quad_c:.2f})*scale²",
-        "mae": round(mae, 2)
-    },
-    "camera": {
-        "x": camera_x,
-        "y": camera_y
-    },
-    "reference_lines": {
-        "ground_y": ground_y,
-        "horizon_y": horizon_y
-    },
-    "assets": assets
-}
-
-# Save to JSON
-with open('data/parallax_scales.json', 'w') as f:
-    json.dump(output, f, indent=2)
-
-print(f"\n{'='*60}")
-print("Saved updated data to data/parallax_scales.json")
-print(f"{'='*60}")
+
+def extract_assets(scene):
+    """Scale and y of every positioned sprite, by layer (plus 'road' for the road tile)"""
+    assets = {
+        'far': {},
+        'mid': {},
+        'front': {},
+        'ground': {}
+    }
+
+    # Sprites with a position and a scale
+    for node in scene.find(type='Sprite2D'):
+        if 'position' not in node.properties or 'scale' not in node.properties:
+            continue
+        name = node.name
+        x, y = node['position']
+        scale_x, scale_y = node['scale']
+
+        # Use average scale if x and y differ slightly
+        scale = (scale_x + scale_y) / 2.0
+
+        # Categorize asset
+        if name in far_assets:
+            assets['far'][name] = {'scale': scale, 'y': y}
+        elif name in mid_assets:
+            assets['mid'][name] = {'scale': scale, 'y': y}
+        elif name in front_assets:
+            assets['front'][name] = {'scale': scale, 'y': y}
+        elif name in ground_assets:
+            assets['ground'][name] = {'scale': scale, 'y': y}
+        elif name == 'RoadTile':
+            # Extract road tile data
+            assets['road'] = {'scale': scale, 'y': y}
+    return assets
+
+
+def scale_y_pairs(assets):
+    """Sorted (scale, y) of every layered asset: the regression input"""
+    pairs = []
+    for category in ['far', 'mid', 'front', 'ground']:
+        for asset_name, data in assets[category].items():
+            pairs.append((data['scale'], data['y']))
+    # Sort by scale for analysis
+    return sorted(pairs)
+
+
+def fit_scale_formula(pairs):
+    """Quadratic regression y = a + b*scale + c*scale²: (a, b, c, mean absolute error)"""
+    scales = np.array([p[0] for p in pairs])
+    y_values = np.array([p[1] for p in pairs])
+
+    # Fit quadratic polynomial
+    coefficients = np.polyfit(scales, y_values, 2)
+    quad_c = coefficients[0]  # scale² coefficient
+    quad_b = coefficients[1]  # scale coefficient
+    quad_a = coefficients[2]  # constant
+
+    # Calculate fit quality
+    y_predicted = quad_a + quad_b * scales + quad_c * scales * scales
+    residuals = y_values - y_predicted
+    mae = np.mean(np.abs(residuals))
+    return quad_a, quad_b, quad_c, mae
+
+
+def extract_scales(scene, fit=fit_scale_formula, select=None):
+    """data/parallax_scales.json contents for a parsed editor scene
+
+    `select(pairs)`, when given, supplies the "model" block
+    (parallax_fit.select_model: the best of several model families)
+    """
+    assets = extract_assets(scene)
+    pairs = scale_y_pairs(assets)
+    quad_a, quad_b, quad_c, mae = fit(pairs)
+
+    # Extract camera position
+    camera_x, camera_y = scene.find_one('Camera2D')['position']
+
+    # Extract reference lines (y of their first point)
+    ground_y = scene.find_one('GroundReference')['points'][0].y
+    horizon_y = scene.find_one('HorizonReference')['points'][0].y
+
+    output = {
+        "formula": {
+            "quad_a": round(quad_a, 2),
+            "quad_b": round(quad_b, 2),
+            "quad_c": round(quad_c, 2),
+            "description": f"y = {quad_a:.2f} + ({quad_b:.2f})*scale + ({quad_c:.2f})*scale²",
+            "mae": round(mae, 2)
+        },
+        "camera": {
+            "x": camera_x,
+            "y": camera_y
+        },
+        "reference_lines": {
+            "ground_y": ground_y,
+            "horizon_y": horizon_y
+        },
+        "assets": assets
+    }
+    if select is not None:
+        # Next to the formula it competes with
+        output = {"formula": output.pop("formula"), "model": select(pairs), **output}
+    return output
+
+
+def main():
+    output = extract_scales(load_scene(SCENE), select=select_model)
+    assets = output['assets']
+    formula = output['formula']
+    quad_a, quad_b, quad_c, mae = fit_scale_formula(scale_y_pairs(assets))
+
+    print("=" * 60)
+    print("EXTRACTED ASSET DATA FROM PARALLAXSCALINGEDITOR.TSCN")
+    print("=" * 60)
+    print(f"\nCamera Position: ({output['camera']['x']}, {output['camera']['y']})")
+    print(f"Ground Line: y = {output['reference_lines']['ground_y']}")
+    print(f"Horizon Line: y = {output['reference_lines']['horizon_y']}")
+
+    print(f"\n{'='*60}")
+    print("QUADRATIC REGRESSION RESULTS")
+    print(f"{'='*60}")
+    print(f"Formula: {formula['description']}")
+    print(f"Mean Absolute Error: {mae:.2f} pixels")
+
+    print(f"\n{'='*60}")
+    print("MODEL FAMILIES")
+    print(f"{'='*60}")
+    fits = fit_all(scale_y_pairs(assets))
+    report(fits)
+    print(f"Best: {output['model']['family']}  {output['model']['expression']}")
+    print("(quadratic errors below; model errors in brackets)")
+
+    print(f"\n{'='*60}")
+    print("ASSET DATA BY LAYER")
+    print(f"{'='*60}")
+
+    for category in ['far', 'mid', 'front', 'ground']:
+        if assets[category]:
+            print(f"\n{category.upper()} LAYER:")
+            for name, data in sorted(assets[category].items(), key=lambda x: x[1]['scale'], reverse=True):
+                predicted_y = quad_a + quad_b * data['scale'] + quad_c * data['scale'] * data['scale']
+                error = data['y'] - predicted_y
+                model_error = data['y'] - predict(fits[0], data['scale'])
+                print(f"  {name:20s} scale={data['scale']:.3f}  y={data['y']:7.2f}  (error: {error:+6.2f}px)"
+                      f"  [{model_error:+6.2f}px]")
+
+    if 'road' in assets:
+        print(f"\nROAD:")
+        print(f"  RoadTile             scale={assets['road']['scale']:.3f}  y={assets['road']['y']:7.2f}")
+
+    # Save to JSON
+    with open(OUTPUT, 'w') as f:
+        json.dump(output, f, indent=2)
+
+    print(f"\n{'='*60}")
+    print(f"Saved updated data to {OUTPUT}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+"""
+Play thousands of headless runs at once: ChunkManager, SpawnCoordinator and AQIManager in NumPy.
+
+Balancing meant playing 83-minute runs (one metre per unpaused second to
+AQIManager.total_distance). This simulator advances every run of a batch
+in lockstep, one array operation per rule and fixed step (--dt), with
+the game's own numbers read from the scripts and data/chunks:
+
+    Game            distance += dt while the world is not paused; chunk 2
+                    after 60 m (check_chunk_transition), with its initial
+                    pickups
+    ChunkManager    obstacle points spawn once time_accumulated reaches
+                    their delay, one per step, in list order; all spawned
+                    resets the flags and the timer. Pickup points do the
+                    same after pickup_respawn_delay with their probability
+                    rolled every frame (masks need mask_spawn_threshold
+                    seconds without a mask: the player never wears one)
+    ObstacleSpawner no car while another is right of x=-200, pool_size
+                    cars; each moves at scroll speed plus a 100-200 px/s
+                    of its own until x=-950, then parks for 45 s and goes
+                    back to the pool
+    SpawnCoordinator  an obstacle within 250 x 80 px of a visible pickup
+                    is dropped, a pickup is moved to the first clear lane
+                    (or dropped)
+    AQIManager      1 %/min decay plus every active AQISource, clamped to
+                    min_aqi..max_aqi, lost at max_aqi; at total_distance
+                    lost unless 3 filters were dropped, all still active
+                    and AQI <= win_aqi_threshold
+    AQISource       NONE / LINEAR (1 - r/range) / INVERSE (1/r) /
+                    INVERSE_SQUARE (1/r^2) of the distance r from where it
+                    registered (r in 100 m for the inverse models, >= 0.1):
+                    cars (CarAQISource) while moving, filters
+                    (FilterAQISource) for their lifespan, trees
+                    (TreeAQISource) forever
+    Filters         dropped at the --filters distances; each pauses the
+                    world for Filter's cleanup plus PlayerInventory's
+                    one-second speed-up and may start the clean-air period
+                    (no cars for clean_air_duration)
+    Trees           FrontLayerSpawner's spawns (every 2.5-5 unpaused s)
+                    become trees with TreeSpawnManager's odds for
+                    --saplings; their sum over distance is one FFT
+                    convolution per run, done before the loop
+
+The pool is simulated as the code behaves: ObstacleSpawner.return_to_pool
+leaves cars visible (so no slot is ever reused: at most pool_size cars per
+run) and re-activates their CarAQISource, which still measures from the
+car's first spawn. --fixed-pool instead hides returned cars, keeps their
+source off until reuse and restarts it where the car respawns.
+
+Batches of --batch runs are spread over sprite_pool's process pool
+(SPRITE_JOBS sets the worker count), each with its own seed from --seed.
+Runs end early when lost, so throughput is reported in simulated metres
+and full-length runs per minute, not runs.
+
+Out of scope: player health, masks being picked up, coins, boost and EV
+chargers (the battery allows about a minute of boost and three 11 s
+stops per run).
+
+Usage (from the project root):
+    python3 tests/gameplay_sim.py [--runs N] [--seed N] [--dt S] [--batch N]
+                                  [--filters D1,D2,D3] [--jitter M] [--saplings N] [--fixed-pool]
+"""
+
+import json
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from gdscript_hotpath import Script
+from parallax_offsets import assignments, members
+from parallax_pool_sim import FILTER_RESUME, PHYSICS_FPS
+from sprite_pool import default_workers, run_parallel
+
+RUNS = 10000
+BATCH = 5000
+DT = 0.25
+# Player policy: filters as late as three 16 s pauses allow while all stay active
+FILTERS = (4990.0, 4994.0, 4998.0)
+CHUNKS = ('data/chunks/chunk_001.json', 'data/chunks/chunk_002.json')
+SCRIPTS = {
+    'aqi': 'scripts/aqi/AQIManager.gd',
+    'car': 'scripts/aqi/CarAQISource.gd',
+    'filter': 'scripts/aqi/FilterAQISource.gd',
+    'tree': 'scripts/aqi/TreeAQISource.gd',
+    'tree_spawn': 'scripts/aqi/TreeSpawnManager.gd',
+    'coordinator': 'scripts/components/spawner/SpawnCoordinator.gd',
+    'chunks': 'scripts/components/spawner/ChunkManager.gd',
+    'obstacles': 'scripts/components/spawner/ObstacleSpawner.gd',
+    'pickups': 'scripts/components/spawner/PickupSpawner.gd',
+    'front': 'scripts/components/parallax/FrontLayerSpawner.gd',
+    'clean_air': 'scripts/vfx/CleanAirPeriodManager.gd',
+    'cleanup': 'scripts/Filter.gd',
+    'gameplay': 'config/gameplay.json',
+}
+# Literals inside function bodies
+CHUNK_TRANSITION = 60.0                     # Game.check_chunk_transition
+CAR_RELATIVE_SPEED = (100.0, 200.0)         # Obstacle._ready
+CAR_OFFSCREEN_X = -950.0                    # Obstacle._process
+CAR_PARK_TIME = 45.0
+TRAFFIC_CLEAR_X = -200.0                    # ObstacleSpawner.spawn_obstacle
+PICKUP_DESPAWN_X = -200.0                   # Pickup._process
+TREE_CAPS = (0.50, 0.35, 0.25)              # TreeSpawnManager.get_spawn_probabilities
+TREE_BOOST = (1.0, 0.75, 0.5)
+TREE_BASE = 0.01                            # TreeAQISource._ready
+RANGE_UNIT = 100.0                          # AQISource._get_range_multiplier
+RANGE_MIN = 0.1
+TREE_GRID = 1.0                             # metres per tree table cell
+FFT_ROWS = 256
+OUTCOMES = ('running', 'won', 'AQI reached critical level!', 'Did not deploy all 3 filters!',
+            'Filters expired before reaching goal!', 'AQI too high at finish!')
+RUNNING, WON, CRITICAL, NOT_DEPLOYED, EXPIRED, TOO_HIGH = range(len(OUTCOMES))
+PARKED = 3
+
+Source = namedtuple('Source', 'increases range_type base_effect effective_range')
+Chunk = namedtuple('Chunk', 'x y delay valid mask probability')
+Policy = namedtuple('Policy', 'filters jitter saplings fixed_pool')
+Result = namedtuple('Result', 'outcome distance end_distance aqi peak aqi_from counts')
+
+
+def _script(root, key):
+    path = SCRIPTS[key]
+    return Script(path, (Path(root) / path).read_text(encoding='utf-8'))
+
+
+def _enums(script, function='_init'):
+    """name -> enum member name of each `name = Enum.MEMBER` in a function's body"""
+    found = {}
+    body = script.functions[function].body if function in script.functions else []
+    for statement in body:
+        words = [t[1] for t in statement.tokens]
+        if len(words) == 5 and words[1] == '=' and words[3] == '.':
+            found[words[0]] = words[4]
+    return found
+
+
+def source(script, **defaults):
+    values = {'base_effect': 1.0, 'effective_range': 1000.0, **defaults}
+    values.update(assignments(script, '_init'))
+    enums = _enums(script)
+    return Source(enums.get('source_type') == 'INCREASES_AQI', enums.get('range_type', 'NONE'),
+                  values['base_effect'], values['effective_range'])
+
+
+def range_multiplier(source, distance):
+    """AQISource._get_range_multiplier of |distance| (any shape)"""
+    distance = np.abs(distance)
+    if source.range_type == 'LINEAR':
+        return np.maximum(0.0, 1.0 - distance / source.effective_range)
+    if source.range_type == 'INVERSE':
+        return 1.0 / np.maximum(distance / RANGE_UNIT, RANGE_MIN)
+    if source.range_type == 'INVERSE_SQUARE':
+        return 1.0 / np.maximum(distance / RANGE_UNIT, RANGE_MIN) ** 2
+    return np.ones_like(distance)
+
+
+class Rules:
+    """The game's numbers, read from its scripts, config and chunks"""
+
+    def __init__(self, root='.'):
+        root = Path(root)
+        self.aqi = members(_script(root, 'aqi'))
+        self.car = source(_script(root, 'car'))
+        self.filter = source(_script(root, 'filter'))
+        self.filter_lifespan = members(_script(root, 'filter'))['lifespan']
+        tree = _script(root, 'tree')
+        self.tree = source(tree)
+        self.tree_multipliers = [members(tree)['TREE_MULTIPLIERS'][float(k)] for k in (1, 2, 3)]
+        self.sapling_boost = members(_script(root, 'tree_spawn'))['sapling_boost']
+        coordinator = members(_script(root, 'coordinator'))
+        self.separation = (coordinator['MIN_SEPARATION_HORIZONTAL'], coordinator['MIN_SEPARATION_VERTICAL'])
+        chunk_manager = members(_script(root, 'chunks'))
+        self.pickup_respawn_delay = chunk_manager['pickup_respawn_delay']
+        self.car_pool = int(members(_script(root, 'obstacles'))['pool_size'])
+        pickups = members(_script(root, 'pickups'))
+        self.pickup_pool = int(pickups['pool_size'])
+        self.lanes = np.array(pickups['lane_positions'])
+        front = assignments(_script(root, 'front'))
+        self.tree_interval = (front['spawn_interval_min'], front['spawn_interval_max'])
+        clean_air = members(_script(root, 'clean_air'))
+        self.clean_air = (clean_air['aqi_threshold_for_clean_air'], clean_air['clean_air_duration'])
+        self.filter_pause = members(_script(root, 'cleanup'))['cleanup_duration'] + FILTER_RESUME
+        with open(root / SCRIPTS['gameplay']) as f:
+            self.scroll_speed = float(json.load(f)['world']['scroll_speed'])
+        self.chunks = [self._chunk(root / path) for path in CHUNKS]
+
+    @staticmethod
+    def _chunk(path):
+        with open(path) as f:
+            data = json.load(f)
+        return data
+
+    def chunk_arrays(self, key, delay_default, probability_default):
+        """Chunk of point arrays (chunks, points), padded with invalid points"""
+        points = [c.get(key, []) for c in self.chunks]
+        width = max(len(p) for p in points)
+        shape = (len(points), width)
+        x, y, delay = np.zeros(shape), np.zeros(shape), np.full(shape, np.inf)
+        valid, mask, probability = np.zeros(shape, bool), np.zeros(shape, bool), np.zeros(shape)
+        for i, chunk in enumerate(points):
+            for j, point in enumerate(chunk):
+                x[i, j], y[i, j] = point.get('x', 960), point.get('y', 300)
+                delay[i, j] = point.get('delay', delay_default)
+                valid[i, j] = True
+                mask[i, j] = point.get('type', 'mask') == 'mask'
+                probability[i, j] = point.get('probability', probability_default)
+        return Chunk(x, y, delay, valid, mask, probability)
+
+
+def tree_odds(rules, saplings):
+    """(runs, 3) chances of tree_1..3 per front-layer spawn"""
+    boost = np.asarray(saplings, float)[:, None] * rules.sapling_boost
+    return np.minimum(boost * np.array(TREE_BOOST), np.array(TREE_CAPS))
+
+
+def tree_table(rules, saplings, rng, length):
+    """(runs, cells) AQI reduction per second of all trees spawned so far, by distance cell
+
+    Trees spawn on the front layer's timer, which runs on the same unpaused
+    seconds as the distance, so where they spawn does not depend on
+    anything else in the run.
+    """
+    odds = tree_odds(rules, saplings)
+    runs = len(odds)
+    if not odds.any():
+        return None
+    lo, hi = rules.tree_interval
+    count = int(length * TREE_GRID / lo) + 2
+    intervals = rng.uniform(lo, hi, (runs, count))
+    intervals[:, 0] = rng.uniform(0.5, lo, runs)
+    at = np.cumsum(intervals, axis=1)
+    # tree_3, tree_2, tree_1 in that order, as should_spawn_tree_type rolls them
+    roll = rng.random((runs, count))
+    cumulative = np.cumsum(odds[:, ::-1], axis=1)
+    kind = (roll[:, :, None] < cumulative[:, None, :]).argmax(axis=2)
+    tree = roll < cumulative[:, -1:]
+    weight = np.where(tree, TREE_BASE * np.array(rules.tree_multipliers[::-1])[kind], 0.0)
+    cell = np.minimum((at / TREE_GRID).astype(np.int64), length)
+    keep = cell < length
+    index = (np.arange(runs)[:, None] * length + cell)[keep]
+    mass = np.bincount(index, weights=weight[keep], minlength=runs * length).reshape(runs, length)
+    kernel = range_multiplier(rules.tree, np.arange(length) * TREE_GRID)
+    size = 1 << int(np.ceil(np.log2(2 * length)))
+    spectrum = np.fft.rfft(kernel, size)
+    table = np.empty((runs, length), np.float32)
+    for start in range(0, runs, FFT_ROWS):
+        rows = np.fft.rfft(mass[start:start + FFT_ROWS], size, axis=1)
+        table[start:start + FFT_ROWS] = np.fft.irfft(rows * spectrum, size, axis=1)[:, :length]
+    return table
+
+
+class Batch:
+    """State of `runs` runs advancing in lockstep"""
+
+    def __init__(self, rules, policy, runs, rng, dt=DT):
+        self.rules, self.policy, self.rng, self.dt = rules, policy, rng, dt
+        self.n = n = runs
+        self.rows = np.arange(n)
+        self.t = 0.0
+        self.distance = np.zeros(n)
+        self.aqi = np.full(n, rules.aqi['starting_aqi'])
+        self.peak = self.aqi.copy()
+        self.outcome = np.zeros(n, np.int8)
+        self.end_distance = np.zeros(n)
+        self.pause = np.zeros(n)
+        self.clean_air = np.zeros(n)
+        # Filters
+        jitter = rng.uniform(-policy.jitter, policy.jitter, (n, 3)) if policy.jitter else 0.0
+        self.drops = np.sort(np.broadcast_to(np.asarray(policy.filters, float) + jitter, (n, 3)), axis=1)
+        self.dropped = np.zeros(n, np.int64)
+        self.next_drop = self.drops[:, 0].copy()    # inf once all three are down
+        self.filter_at = np.full((n, 3), np.nan)
+        self.filter_time = np.full((n, 3), -np.inf)
+        # ChunkManager
+        self.obstacle_points = rules.chunk_arrays('spawn_points', 0.0, 1.0)
+        self.pickup_points = rules.chunk_arrays('pickup_points', 5.0, 0.3)
+        self.chunk = np.zeros(n, np.int64)
+        self.time_accumulated = np.zeros(n)
+        self.spawned = np.zeros((n, self.obstacle_points.valid.shape[1]), bool)
+        self.pickup_time = np.zeros(n)
+        self.pickup_index = np.zeros(n, np.int64)
+        self.respawned = np.zeros((n, self.pickup_points.valid.shape[1]), bool)
+        self.obstacle_due = self._due(self.obstacle_points, self.obstacle_points.valid[self.chunk], self.rows)
+        self.pickup_due = self._due(self.pickup_points, self.pickup_points.valid[self.chunk], self.rows)
+        # Cars: 0 free, 1 moving, 2 parked off-screen, 3 back in the pool. Slot-major
+        # (pool_size, runs), so the slots used so far are one contiguous block
+        k = rules.car_pool
+        self.car_state = np.zeros((k, n), np.int8)
+        self.car_visible = np.zeros((k, n), bool)
+        self.car_x = np.zeros((k, n))
+        self.car_y = np.zeros((k, n))
+        self.car_speed = rng.uniform(*CAR_RELATIVE_SPEED, (k, n))
+        self.car_at = np.zeros((k, n))
+        self.car_parked = np.zeros((k, n))
+        # Slots low .. width-1 are the ones any run still moves, times or takes AQI from
+        self.low = self.width = 0
+        # Pickups
+        m = rules.pickup_pool
+        self.pickup_visible = np.zeros((n, m), bool)
+        self.pickup_x = np.zeros((n, m))
+        self.pickup_y = np.zeros((n, m))
+        # Trees
+        self.cells = int(rules.aqi['total_distance'] / TREE_GRID) + 1
+        self.trees = tree_table(rules, np.full(n, policy.saplings), rng, self.cells)
+        # Counters
+        names = ('cars', 'car_traffic', 'car_pickup', 'car_pool', 'car_clean_air', 'masks', 'mask_moved',
+                 'mask_blocked', 'mask_pool')
+        self.counts = {name: np.zeros(n, np.int64) for name in names}
+        self.aqi_from = {name: np.zeros(n) for name in ('cars', 'returned cars', 'filters', 'trees', 'decay')}
+        self._initial_pickups(self.rows)
+
+    # -- helpers ----------------------------------------------------------------
+
+    @property
+    def running(self):
+        return self.outcome == RUNNING
+
+    def world_speed(self):
+        """Game scroll speed per run: 0 while a filter pauses the world, then the one-second tween"""
+        if not self.pause.any():
+            return np.full(self.n, self.rules.scroll_speed)
+        ramp = np.clip(1.0 - self.pause / FILTER_RESUME, 0.0, 1.0)
+        return np.where(self.pause > 0, self.rules.scroll_speed * ramp, self.rules.scroll_speed)
+
+    def _end(self, rows, outcome):
+        rows = rows[self.outcome[rows] == RUNNING]
+        self.outcome[rows] = outcome
+        self.end_distance[rows] = self.distance[rows]
+
+    def _near(self, visible, xs, ys, x, y):
+        """Any visible object within the coordinator's separation of (x, y), per row"""
+        h, v = self.rules.separation
+        return (visible & (np.abs(xs - x[:, None]) < h) & (np.abs(ys - y[:, None]) < v)).any(axis=1)
+
+    # -- spawning ---------------------------------------------------------------
+
+    def _spawn_pickups(self, rows, x, y):
+        """PickupSpawner.spawn_pickup for one pickup in each of `rows`"""
+        if not len(rows):
+            return
+        h, v = self.rules.separation
+        w = self.width
+        lanes = np.column_stack([y, np.broadcast_to(self.rules.lanes, (len(rows), len(self.rules.lanes)))])
+        # _near per lane, with the x test (the same for every lane) done once
+        level = self.car_visible[:w, rows].T & (np.abs(self.car_x[:w, rows].T - x[:, None]) < h)
+        cy = self.car_y[:w, rows].T
+        clear = np.column_stack([~(level & (np.abs(cy - lanes[:, i, None]) < v)).any(axis=1)
+                                 for i in range(lanes.shape[1])])
+        found = clear.any(axis=1)
+        lane = lanes[np.arange(len(rows)), clear.argmax(axis=1)]
+        np.add.at(self.counts['mask_blocked'], rows[~found], 1)
+        np.add.at(self.counts['mask_moved'], rows[found & ~clear[:, 0]], 1)
+        rows, x, lane = rows[found], x[found], lane[found]
+        free = ~self.pickup_visible[rows]
+        has = free.any(axis=1)
+        np.add.at(self.counts['mask_pool'], rows[~has], 1)
+        rows, slot = rows[has], free[has].argmax(axis=1)
+        self.pickup_visible[rows, slot] = True
+        self.pickup_x[rows, slot] = x[has]
+        self.pickup_y[rows, slot] = lane[has]
+        np.add.at(self.counts['masks'], rows, 1)
+
+    def _initial_pickups(self, rows):
+        """Spawner.set_current_chunk: the first mask surely, everything else on its probability"""
+        points = self.pickup_points
+        chunk = self.chunk[rows]
+        first = np.ones(len(rows), bool)
+        for j in range(points.valid.shape[1]):
+            valid = points.valid[chunk, j]
+            mask = points.mask[chunk, j]
+            roll = self.rng.random(len(rows)) < points.probability[chunk, j]
+            go = valid & np.where(mask & first, True, roll)
+            first &= ~(valid & mask)
+            self._spawn_pickups(rows[go], points.x[chunk[go], j], points.y[chunk[go], j])
+
+    def _due(self, points, pending, rows):
+        """Delay of the first pending point per row; 0 (now) once none is pending, to loop"""
+        delay = np.where(pending, points.delay[self.chunk[rows]], np.inf).min(axis=1)
+        return np.where(np.isfinite(delay), delay, 0.0)
+
+    def _obstacles(self, running):
+        """ChunkManager.get_next_obstacle_spawn and ObstacleSpawner.spawn_obstacle"""
+        points = self.obstacle_points
+        rows = np.nonzero(running & (self.time_accumulated >= self.obstacle_due))[0]
+        if not len(rows):
+            return
+        valid = points.valid[self.chunk[rows]]
+        loop = rows[~(valid & ~self.spawned[rows]).any(axis=1)]
+        self.spawned[loop] = False
+        self.time_accumulated[loop] = 0.0
+        ready = valid & ~self.spawned[rows] & (points.delay[self.chunk[rows]] <= self.time_accumulated[rows, None])
+        has = ready.any(axis=1)
+        rows, index = rows[has], ready[has].argmax(axis=1)
+        self.spawned[rows, index] = True
+        changed = np.union1d(loop, rows)
+        self.obstacle_due[changed] = self._due(points, points.valid[self.chunk[changed]] & ~self.spawned[changed],
+                                               changed)
+        if not len(rows):
+            return
+        chunk = self.chunk[rows]
+        x, y = points.x[chunk, index], points.y[chunk, index]
+        w = self.width
+        clean = self.clean_air[rows] > 0
+        traffic = ((self.car_state[:w, rows] == 1) & (self.car_x[:w, rows] > TRAFFIC_CLEAR_X)).any(axis=0) & ~clean
+        near = self._near(self.pickup_visible[rows], self.pickup_x[rows], self.pickup_y[rows], x, y) & ~clean & ~traffic
+        free = ~self.car_visible[:, rows].T
+        empty = ~free.any(axis=1) & ~clean & ~traffic & ~near
+        for name, hit in (('car_clean_air', clean), ('car_traffic', traffic), ('car_pickup', near), ('car_pool', empty)):
+            np.add.at(self.counts[name], rows[hit], 1)
+        go = ~(clean | traffic | near | empty)
+        rows, slot = rows[go], free[go].argmax(axis=1)
+        if not len(rows):
+            return
+        first_use = self.car_state[slot, rows] == 0
+        self.car_state[slot, rows] = 1
+        self.car_visible[slot, rows] = True
+        self.car_x[slot, rows], self.car_y[slot, rows] = x[go], y[go]
+        # The CarAQISource registers (and takes its distance) when first attached
+        if self.policy.fixed_pool:
+            self.car_at[slot, rows] = self.distance[rows]
+        else:
+            self.car_at[slot[first_use], rows[first_use]] = self.distance[rows[first_use]]
+        self.width = max(w, int(slot.max()) + 1)
+        np.add.at(self.counts['cars'], rows, 1)
+
+    def _pickups(self, running):
+        """ChunkManager.get_next_pickup_spawn and Spawner's masks-only respawn"""
+        if self.t < self.rules.pickup_respawn_delay:
+            return
+        points = self.pickup_points
+        self.pickup_time += self.dt
+        rows = np.nonzero(running & (self.pickup_time >= self.pickup_due))[0]
+        if not len(rows):
+            return
+        chunk = self.chunk[rows]
+        valid = points.valid[chunk]
+        loop = self.pickup_index[rows] >= valid.sum(axis=1)
+        self.respawned[rows[loop]] = False
+        self.pickup_index[rows[loop]] = 0
+        self.pickup_time[rows[loop]] = 0.0
+        ready = valid & ~self.respawned[rows] & (points.delay[chunk] <= self.pickup_time[rows, None])
+        # Rolled every frame until one passes
+        chance = 1.0 - (1.0 - points.probability[chunk]) ** (PHYSICS_FPS * self.dt)
+        passed = ready & (self.rng.random(ready.shape) < chance)
+        has = passed.any(axis=1)
+        index = passed[has].argmax(axis=1)
+        spawned = rows[has]
+        self.respawned[spawned, index] = True
+        self.pickup_index[spawned] += 1
+        self.pickup_due[rows] = self._due(points, valid & ~self.respawned[rows], rows)
+        chunk = self.chunk[spawned]
+        mask = points.mask[chunk, index]
+        self._spawn_pickups(spawned[mask], points.x[chunk[mask], index[mask]], points.y[chunk[mask], index[mask]])
+
+    # -- step -------------------------------------------------------------------
+
+    def step(self):
+        rules, dt = self.rules, self.dt
+        running = self.running
+
+        # Player: drop the next filter once its distance is reached
+        rows = np.nonzero(running & (self.pause <= 0) & (self.distance >= self.next_drop))[0]
+        if len(rows):
+            slot = self.dropped[rows]
+            self.filter_at[rows, slot] = self.distance[rows]
+            self.filter_time[rows, slot] = self.t
+            self.dropped[rows] += 1
+            left = self.dropped[rows] < 3
+            self.next_drop[rows] = np.where(left, self.drops[rows, np.minimum(self.dropped[rows], 2)], np.inf)
+            self.pause[rows] = rules.filter_pause
+            threshold, duration = rules.clean_air
+            start = rows[(self.dropped[rows] >= 3) & (self.aqi[rows] <= threshold)]
+            self.clean_air[start] = duration
+
+        # Game._process: distance, win check, chunk transition
+        advancing = running & (self.pause <= 0)
+        self.distance += np.where(advancing, dt, 0.0)
+        finished = np.nonzero(advancing & (self.distance >= rules.aqi['total_distance']))[0]
+        if len(finished):
+            active = ((self.t - self.filter_time[finished]) < rules.filter_lifespan).sum(axis=1)
+            self._end(finished[self.dropped[finished] < 3], NOT_DEPLOYED)
+            self._end(finished[active < 3], EXPIRED)
+            self._end(finished[self.aqi[finished] > rules.aqi['win_aqi_threshold']], TOO_HIGH)
+            self._end(finished, WON)
+        if len(rules.chunks) > 1:
+            switch = np.nonzero(advancing & (self.chunk == 0) & (self.distance >= CHUNK_TRANSITION))[0]
+            if len(switch):
+                self.chunk[switch] = 1
+                self.spawned[switch] = False
+                self.respawned[switch] = False
+                self.time_accumulated[switch] = 0.0
+                self.obstacle_due[switch] = self._due(self.obstacle_points, self.obstacle_points.valid[self.chunk[switch]],
+                                                      switch)
+                self.pickup_due[switch] = self._due(self.pickup_points, self.pickup_points.valid[self.chunk[switch]],
+                                                    switch)
+                self._initial_pickups(switch)
+
+        # Spawner._process, then ChunkManager._process
+        self._obstacles(running)
+        self._pickups(running)
+        self.time_accumulated += dt
+
+        # Cars and pickups move; only the slots some run still needs
+        lo, w = self.low, self.width
+        speed = self.world_speed()
+        state, x, parked_time = self.car_state[lo:w], self.car_x[lo:w], self.car_parked[lo:w]
+        moving = state == 1
+        x -= (speed + self.car_speed[lo:w]) * (moving * dt)
+        off = moving & (x < CAR_OFFSCREEN_X)
+        state[off] = 2
+        parked_time[off] = 0.0
+        parked = state == 2
+        parked_time += parked * dt
+        back = parked & (parked_time >= CAR_PARK_TIME)
+        if self.policy.fixed_pool:
+            state[back] = 0
+            self.car_visible[lo:w][back] = False
+        else:
+            state[back] = PARKED
+        self.pickup_x -= self.pickup_visible * (speed * dt)[:, None]
+        self.pickup_visible &= self.pickup_x >= PICKUP_DESPAWN_X
+
+        # AQIManager._process
+        sign = 1.0 if rules.car.increases else -1.0
+        car = sign * rules.car.base_effect * range_multiplier(rules.car, self.distance - self.car_at[lo:w])
+        cars = (car * (state == 1)).sum(axis=0)
+        returned = (car * (state == PARKED)).sum(axis=0)
+        filters = np.zeros(self.n)
+        live = (self.t - self.filter_time) < rules.filter_lifespan
+        if live.any():
+            sign = 1.0 if rules.filter.increases else -1.0
+            effect = sign * rules.filter.base_effect * range_multiplier(rules.filter, self.distance[:, None] - self.filter_at)
+            filters = np.where(live, effect, 0.0).sum(axis=1)
+        trees = 0.0
+        if self.trees is not None:
+            cell = np.minimum((self.distance / TREE_GRID).astype(np.int64), self.cells - 1)
+            trees = -self.trees[self.rows, cell]
+        decay = -self.aqi * (rules.aqi['natural_decay_percent'] / 100.0) / 60.0
+        gate = np.where(running, dt, 0.0)
+        for name, value in (('cars', cars), ('returned cars', returned), ('filters', filters), ('trees', trees),
+                            ('decay', decay)):
+            self.aqi_from[name] += value * gate
+        aqi = self.aqi + (cars + returned + filters + trees + decay) * gate
+        self.aqi = np.clip(aqi, rules.aqi['min_aqi'], rules.aqi['max_aqi'])
+        np.maximum(self.peak, self.aqi, out=self.peak)
+        self._end(np.nonzero(running & (self.aqi >= rules.aqi['max_aqi']))[0], CRITICAL)
+
+        self.pause = np.maximum(self.pause - dt, 0.0)
+        self.clean_air = np.maximum(self.clean_air - dt, 0.0)
+        self.t += dt
+        self._retire_slots()
+
+    def _retire_slots(self):
+        """Move `low` past slots that every run is done with
+
+        Without --fixed-pool a returned car keeps its slot for good, and its
+        source only weakens as the distance grows, so once it is out of
+        range (and every other run's car in that slot is too, or the run is
+        over) the slot never matters again. The cars spawn on the same
+        chunk timer in every run, so slots retire in order.
+        """
+        if self.policy.fixed_pool:
+            return
+        running = self.running
+        while self.low < self.width:
+            j = self.low
+            near = range_multiplier(self.rules.car, self.distance - self.car_at[j]) > 0
+            if (running & ((self.car_state[j] != PARKED) | near)).any():
+                return
+            self.low += 1
+
+    def run(self):
+        limit = 2 * self.rules.aqi['total_distance']
+        while self.running.any() and self.t < limit:
+            self.step()
+        return self
+
+    def result(self):
+        return Result(self.outcome, self.distance, self.end_distance, self.aqi, self.peak, self.aqi_from,
+                      self.counts)
+
+
+def play(job):
+    """Result of one finished batch; job is (rules, policy, runs, seed, dt)"""
+    rules, policy, runs, seed, dt = job
+    return Batch(rules, policy, runs, np.random.default_rng(seed), dt).run().result()
+
+
+def simulate(rules, policy, runs, seed=0, dt=DT, batch=BATCH, workers=None):
+    """Results of `runs` runs in total, in batches of `batch` across `workers` processes"""
+    sizes = [min(batch, runs - start) for start in range(0, runs, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(rules, policy, size, s, dt) for size, s in zip(sizes, seeds)]
+    return [r.value for r in run_parallel(play, jobs, workers)]
+
+
+def report(batches, seconds, total_distance, workers):
+    outcome = np.concatenate([b.outcome for b in batches])
+    runs = len(outcome)
+    end = np.concatenate([b.end_distance for b in batches])
+    aqi = np.concatenate([b.aqi for b in batches])
+    peak = np.concatenate([b.peak for b in batches])
+    metres = sum(b.distance.sum() for b in batches)
+    print(f"{runs} runs, {metres:,.0f} m in {seconds:.1f} s on {workers} worker(s): {metres / seconds * 60:,.0f} m/min "
+          f"= {metres / total_distance / seconds * 60:,.0f} full {total_distance:g} m runs/min\n")
+    print("Outcome")
+    for code, reason in enumerate(OUTCOMES):
+        hit = outcome == code
+        if hit.any():
+            print(f"  {hit.mean():6.1%}  {reason:40s} at {np.median(end[hit]):7.0f} m median "
+                  f"({np.percentile(end[hit], 5):.0f}-{np.percentile(end[hit], 95):.0f})")
+    print(f"\nAQI      final p5/p50/p95 {np.percentile(aqi, 5):.0f} / {np.median(aqi):.0f} / "
+          f"{np.percentile(aqi, 95):.0f}   peak p50 {np.median(peak):.0f}")
+    print("AQI added per run (mean, before clamping)")
+    for name in batches[0].aqi_from:
+        total = np.concatenate([b.aqi_from[name] for b in batches])
+        print(f"  {name:14s} {total.mean():+9.1f}")
+    print("Spawns per run (mean)")
+    labels = {'cars': 'cars spawned', 'car_traffic': 'cars blocked by a car on screen',
+              'car_pickup': 'cars blocked by a pickup', 'car_pool': 'cars with the pool empty',
+              'car_clean_air': 'cars skipped for clean air', 'masks': 'masks spawned',
+              'mask_moved': 'masks moved to another lane', 'mask_blocked': 'masks blocked in every lane',
+              'mask_pool': 'masks with the pool empty'}
+    for name, label in labels.items():
+        total = np.concatenate([b.counts[name] for b in batches])
+        print(f"  {total.mean():8.2f}  {label}")
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--runs': RUNS, '--seed': 0, '--dt': DT, '--batch': BATCH, '--filters': None,
+               '--jitter': 0.0, '--saplings': 0}
+    fixed_pool = False
+    i = 0
+    while i < len(args):
+        if args[i] == '--fixed-pool':
+            fixed_pool = True
+            i += 1
+            continue
+        if args[i] not in options or i + 1 >= len(args):
+            print(__doc__)
+            return 2
+        options[args[i]] = args[i + 1]
+        i += 2
+    filters = FILTERS
+    if options['--filters']:
+        filters = tuple(float(v) for v in options['--filters'].split(','))
+        if len(filters) != 3:
+            print("--filters takes three distances")
+            return 2
+    policy = Policy(filters, float(options['--jitter']), int(options['--saplings']), fixed_pool)
+    rules = Rules()
+    runs, batch = int(options['--runs']), int(options['--batch'])
+    workers = min(default_workers(), -(-runs // batch))
+    started = time.perf_counter()
+    batches = simulate(rules, policy, runs, int(options['--seed']), float(options['--dt']), batch, workers)
+    report(batches, time.perf_counter() - started, rules.aqi['total_distance'], workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
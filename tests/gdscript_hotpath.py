@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+"""
+Per-frame cost linter for GDScript.
+
+Work done in _process / _physics_process is paid every frame:
+ParallaxLayerSpawner walked get_parent() three times and copied
+active_objects per tick, PigeonSpawnManager re-filtered active_pigeons
+with a fresh lambda, Obstacle printed from _process. This linter finds
+every function reachable from those callbacks and flags, on those paths:
+
+    load               load() / ResourceLoader.load() (cache lookup or disk read)
+    print              print*, push_warning / push_error
+    node lookup        $Path, %Unique, get_node, get_parent, find_child, groups ...
+    allocation         Array / Dictionary literals, lambdas, duplicate(), keys(),
+                       values(), new(), instantiate(), str()
+    string formatting  "..." % args, string concatenation
+    container O(n)     filter / map / reduce / any / all, sort, find, has, erase ...
+
+Calls are followed through the script and the scripts it extends, self.
+and super., autoloads, class_name statics, members declared with a
+project class type, and otherwise through a method name that only one
+project script defines. Signals and dynamic calls (call(), Callable) are
+not followed.
+
+Findings that run on every frame (no if/elif/else/match branch anywhere
+on a call path from a root; loops do not count) come first, then the
+guarded ones. Within each group they are ranked by an estimated cost per
+frame: a rough per-call cost (CALLS / METHODS, microseconds on a
+mid-range device) times how often the statement runs per frame. That
+frequency uses static branch-prediction heuristics (guard_odds()): a
+guard on a threshold, a flag the block flips or a bail-out null check
+holds on RARE of the frames, any other branch on BRANCH of them (an
+else takes what its if/elif chain leaves), an early return scales the
+rest of the function the same way, and each enclosing loop multiplies
+by LOOP_TRIPS. Costs add up along every call path from a root, times the
+nodes running that root: the scripts' nodes in MAIN_SCENE and the scenes
+it instances, plus the scenes a spawner instantiates in a loop over a
+numeric member (pool_size). The numbers are for ranking, not a profile:
+run the game's profiler before tuning a constant.
+
+Usage (from the project root):
+    python3 tests/gdscript_hotpath.py              # top findings
+    python3 tests/gdscript_hotpath.py --all        # every finding
+    python3 tests/gdscript_hotpath.py FILE.gd ...  # findings located in these scripts
+"""
+
+import sys
+from collections import defaultdict, namedtuple
+from pathlib import Path
+
+import _scripts_path  # noqa: F401
+from gdscript_scan import ScanError, statements
+from godot_scene import ParseError, iter_sections
+from project_index import ProjectIndex
+
+ROOTS = ('_process', '_physics_process')
+BRANCH = 0.5
+RARE = 0.01
+LOOP_TRIPS = 10
+# The game scene (project.godot's main scene is the start screen); node
+# instances are counted from here
+MAIN_SCENE = 'scenes/Main.tscn'
+MAX_DEPTH = 8
+TOP = 30
+
+# name -> (rule, estimated microseconds per call); node lookups also count as methods (a.get_node())
+CALLS = {
+    'load': ('load', 200.0),
+    'print': ('print', 30.0), 'prints': ('print', 30.0), 'printt': ('print', 30.0),
+    'print_rich': ('print', 30.0), 'print_debug': ('print', 40.0), 'printerr': ('print', 30.0),
+    'push_warning': ('print', 40.0), 'push_error': ('print', 40.0),
+    'get_node': ('node lookup', 1.0), 'get_node_or_null': ('node lookup', 1.0),
+    'find_child': ('node lookup', 20.0), 'find_children': ('node lookup', 30.0),
+    'get_nodes_in_group': ('node lookup', 10.0), 'get_first_node_in_group': ('node lookup', 5.0),
+    'get_children': ('node lookup', 3.0), 'get_parent': ('node lookup', 0.3),
+    'get_tree': ('node lookup', 0.2), 'get_viewport': ('node lookup', 0.2),
+    'str': ('allocation', 1.0),
+}
+# Flagged only as methods (after '.'): the free functions of the same name are cheap
+METHODS = {
+    'duplicate': ('allocation', 5.0), 'keys': ('allocation', 3.0), 'values': ('allocation', 3.0),
+    'new': ('allocation', 5.0), 'instantiate': ('allocation', 50.0),
+    'filter': ('container O(n)', 10.0), 'map': ('container O(n)', 10.0),
+    'reduce': ('container O(n)', 10.0), 'any': ('container O(n)', 5.0), 'all': ('container O(n)', 5.0),
+    'sort': ('container O(n)', 15.0), 'sort_custom': ('container O(n)', 25.0),
+    'find': ('container O(n)', 3.0), 'rfind': ('container O(n)', 3.0), 'has': ('container O(n)', 1.0),
+    'erase': ('container O(n)', 3.0), 'count': ('container O(n)', 3.0), 'slice': ('container O(n)', 3.0),
+    'reverse': ('container O(n)', 3.0), 'max': ('container O(n)', 3.0), 'min': ('container O(n)', 3.0),
+    'load': ('load', 200.0),
+}
+NODE_PATH = ('node lookup', 1.0)
+ARRAY_LITERAL = ('allocation', 1.0)
+DICT_LITERAL = ('allocation', 2.0)
+LAMBDA = ('allocation', 1.0)
+FORMAT = ('string formatting', 2.0)
+CONCAT = ('string formatting', 1.0)
+
+# A '[' after these starts an Array literal rather than a subscript
+_VALUE_END = {')', ']', '}'}
+_KEYWORDS = {'return', 'in', 'and', 'or', 'not', 'if', 'elif', 'else', 'while', 'await', 'yield'}
+
+
+# One statement of a function body: `factor` is its per-call frequency,
+# `loops` the header tokens of the for/while blocks around it, `guarded`
+# whether an if/elif/else/match branch (or a likely early return) stands
+# between it and the top of the function
+Statement = namedtuple('Statement', 'line factor tokens loops guarded')
+
+_BLOCKS = ('if', 'elif', 'else', 'for', 'while')
+_BAIL = {'return', 'continue', 'break', 'pass', 'print', 'prints', 'printerr', 'push_warning', 'push_error'}
+_THRESHOLD = {'<', '>', '<=', '>='}
+
+
+def _rows(text):
+    """(line, indent, tokens) of every statement, one-line block bodies split off one level deeper"""
+    for line, indent, tokens in statements(text):
+        values = [t[1] for t in tokens]
+        colon = _header_end(values) if values[0] in _BLOCKS and values[-1] != ':' else None
+        if colon is None:
+            yield line, indent, tokens
+        else:
+            yield line, indent, tokens[:colon + 1]
+            yield line, indent + 1, tokens[colon + 1:]
+
+
+def _header_end(values):
+    """Index of the ':' ending a block header, or None"""
+    depth = 0
+    start = values.index('in') if values[0] == 'for' and 'in' in values else 0
+    for i in range(start, len(values) - 1):
+        if values[i] in ('(', '[', '{'):
+            depth += 1
+        elif values[i] in (')', ']', '}'):
+            depth -= 1
+        elif values[i] == ':' and depth == 0:
+            return i
+    return None
+
+
+def _body(rows, k):
+    """Statements of the block opened by rows[k]"""
+    indent = rows[k][1]
+    body = []
+    for row in rows[k + 1:]:
+        if row[1] <= indent:
+            break
+        body.append(row)
+    return body
+
+
+def _bails(body):
+    """The block only reports and leaves: a null check or an error path"""
+    return bool(body) and all(row[2][0][1] in _BAIL for row in body) \
+        and body[-1][2][0][1] in ('return', 'continue', 'break')
+
+
+def _split(tokens, word):
+    """Top-level operands of `word` (and / or)"""
+    parts, depth, part = [], 0, []
+    for token in tokens:
+        if token[1] in ('(', '[', '{'):
+            depth += 1
+        elif token[1] in (')', ']', '}'):
+            depth -= 1
+        if depth == 0 and token[1] in (word, '&&' if word == 'and' else '||'):
+            parts.append(part)
+            part = []
+        else:
+            part.append(token)
+    parts.append(part)
+    return [p for p in parts if p]
+
+
+def _term_odds(term, body):
+    values = [t[1] for t in term]
+    depth = 0
+    for value in values:
+        depth += value in ('(', '[', '{')
+        depth -= value in (')', ']', '}')
+        if depth == 0 and value in _THRESHOLD:
+            return RARE
+    negated = values[0] in ('not', '!')
+    target = values[1:] if negated else values
+    if target and all(t[0] == 'name' or t[1] == '.' for t in term[negated:]):
+        if target[0] == 'self':
+            target = target[2:]
+        # A flag the block flips (or a reference it fetches) holds once per change
+        for _, _, tokens in body:
+            words = [t[1] for t in tokens]
+            if words[0] == 'self':
+                words = words[2:]
+            if words[:len(target) + 1] == target + ['=']:
+                return RARE
+    if negated and _bails(body):
+        return RARE
+    return BRANCH
+
+
+def guard_odds(condition, body):
+    """Share of frames on which an if/elif condition holds, by static heuristics
+
+    Threshold and counter comparisons (timers, distances, indices), flags
+    the block itself sets or clears (`if not x:` ... `x = ...`, one-shots)
+    and `not x` guards that only bail out (null checks) hold on few frames:
+    RARE. Anything else is a coin flip: BRANCH. An and
+    takes its least likely operand, an or adds its operands up.
+    """
+    total = 0.0
+    for disjunct in _split(condition, 'or'):
+        total += min(_term_odds(term, body) for term in _split(disjunct, 'and'))
+    return min(total, 1.0) if total else BRANCH
+
+
+class Function:
+    """One func and its statements"""
+
+    def __init__(self, script, name, line):
+        self.script = script
+        self.name = name
+        self.line = line
+        self.body = []  # Statement
+
+    @property
+    def key(self):
+        return self.script, self.name
+
+    def __repr__(self):
+        return f"{Path(self.script).stem}.{self.name}"
+
+
+class Script:
+    def __init__(self, path, text):
+        self.path = path
+        self.text = text.split('\n')
+        self.functions = {}
+        self.member_types = {}
+        self.members = {}  # name -> initializer tokens
+        self.extends = None
+        self.class_name = None
+        self._parse(text)
+
+    def _parse(self, text):
+        rows = list(_rows(text))
+        current = None
+        blocks = []  # (indent, factor, loop header tokens or None, guarded, bail-out odds or None)
+        after = []   # (indent, factor, guarded) left by an early return at that indent
+        chains = {}  # indent -> odds of the if/elif branches so far
+        for k, (line, indent, tokens) in enumerate(rows):
+            values = [t[1] for t in tokens]
+            first = values[0]
+            while blocks and blocks[-1][0] >= indent:
+                closed = blocks.pop()
+                if closed[4] is not None:
+                    after.append((closed[0], 1.0 - closed[4], closed[4] > RARE))
+            after = [a for a in after if a[0] <= indent]
+            chains = {i: odds for i, odds in chains.items() if i <= indent}
+            if first not in ('elif', 'else'):
+                chains.pop(indent, None)
+            if current is not None and indent <= current_indent:
+                current = None
+            if first == 'static' and len(values) > 1:
+                values = values[1:]
+                first = values[0]
+            if first == 'func' and len(values) > 1:
+                current, current_indent = Function(self.path, values[1], line), indent
+                blocks, after, chains = [], [], {}
+                self.functions.setdefault(values[1], current)
+                continue
+            if current is None:
+                self._declaration(values, tokens)
+                continue
+            factor = 1.0
+            for _, block_factor, _, _, _ in blocks:
+                factor *= block_factor
+            for _, after_factor, _ in after:
+                factor *= after_factor
+            guarded = any(b[3] for b in blocks) or any(a[2] for a in after)
+            loops = tuple(b[2] for b in blocks if b[2])
+            current.body.append(Statement(line, factor, tokens, loops, guarded))
+            if values[-1] != ':':
+                continue
+            if first in ('for', 'while'):
+                blocks.append((indent, LOOP_TRIPS, tokens, False, None))
+            elif first == 'match':
+                blocks.append((indent, 1.0, None, False, None))
+            elif first in ('if', 'elif', 'else'):
+                body = _body(rows, k)
+                done = chains.get(indent, 0.0)
+                if first == 'else':
+                    odds = max(1.0 - done, RARE)
+                else:
+                    odds = min(guard_odds(tokens[1:-1], body), max(1.0 - done, RARE))
+                chains[indent] = done + odds
+                blocks.append((indent, odds, None, True, odds if first == 'if' and _bails(body) else None))
+            else:
+                blocks.append((indent, BRANCH, None, True, None))
+
+    def _declaration(self, values, tokens):
+        if values[0] == 'extends' and len(values) > 1:
+            self.extends = values[1].strip('"\'')
+        elif values[0] == 'class_name' and len(values) > 1:
+            self.class_name = values[1]
+            if 'extends' in values:
+                self.extends = values[values.index('extends') + 1].strip('"\'')
+        if 'var' in values or 'const' in values:
+            i = values.index('var') if 'var' in values else values.index('const')
+            if i + 3 < len(values) and values[i + 2] == ':' and tokens[i + 3][0] == 'name':
+                self.member_types[values[i + 1]] = values[i + 3]
+            if i + 1 < len(values):
+                for j in range(i + 2, len(values)):
+                    if values[j] in ('=', ':='):
+                        self.members[values[i + 1]] = tokens[j + 1:]
+                        break
+
+    def source(self, line):
+        return self.text[line - 1].strip()
+
+
+class Project:
+    """Every script's functions plus the names a call may resolve through"""
+
+    def __init__(self, index):
+        self.root = Path(index.root)
+        self.scripts = {}
+        self.errors = []
+        for rel in index.files('gd'):
+            if rel.startswith('addons/'):
+                continue
+            try:
+                self.scripts[rel] = Script(rel, (self.root / rel).read_text(encoding='utf-8'))
+            except (ScanError, UnicodeDecodeError) as e:
+                self.errors.append((rel, str(e)))
+        self.class_names = {s.class_name: rel for rel, s in self.scripts.items() if s.class_name}
+        self.autoloads = self._autoloads()
+        definers = defaultdict(list)
+        for rel, script in self.scripts.items():
+            for name in script.functions:
+                definers[name].append(rel)
+        self.unique = {name: rels[0] for name, rels in definers.items() if len(rels) == 1}
+        self.instances = self._instances(index)
+
+    def _instances(self, index):
+        """Script -> nodes running it in MAIN_SCENE, its instanced scenes and its spawners' pools"""
+        counts = defaultdict(float)
+
+        def visit(rel, times):
+            try:
+                scene = index.scene(rel)
+            except (KeyError, ParseError):
+                return
+            for node in scene.nodes:
+                if node.instance is not None and str(node.instance.path).startswith('res://'):
+                    visit(node.instance.path[len('res://'):], times)
+                script = node.get('script')
+                path = getattr(script, 'path', None)
+                if path and path.startswith('res://') and path.endswith('.gd'):
+                    counts[path[len('res://'):]] += times
+
+        visit(MAIN_SCENE, 1)
+        # Pools: .instantiate() in a loop over a numeric member, of the scenes
+        # preloaded by the members that loop's statements use
+        for rel, times in list(counts.items()):
+            script = self.scripts.get(rel)
+            if script is None:
+                continue
+            for function in script.functions.values():
+                for statement in function.body:
+                    values = [t[1] for t in statement.tokens]
+                    if 'instantiate' not in values or not statement.loops:
+                        continue
+                    header = statement.loops[-1]
+                    trips = [script.members[t[1]] for t in header if t[1] in script.members]
+                    trips = [float(init[0][1]) for init in trips if len(init) == 1 and init[0][0] == 'number']
+                    used = {t[1] for other in function.body if header in other.loops for t in other.tokens}
+                    scenes = [t[1].strip('"\'')[len('res://'):] for name in used if name in script.members
+                              for t in script.members[name]
+                              if t[0] == 'string' and t[1].strip('"\'').endswith('.tscn')]
+                    if len(trips) == 1 and scenes:
+                        for scene in scenes:
+                            visit(scene, times * trips[0] / len(scenes))
+        return counts
+
+    def _autoloads(self):
+        autoloads = {}
+        project = self.root / 'project.godot'
+        if project.exists():
+            for section in iter_sections(project.read_text(errors='ignore'), 'project.godot'):
+                if section.tag == 'autoload':
+                    for name, value in section.properties.items():
+                        path = value.lstrip('*')
+                        if path.startswith('res://') and path.endswith('.gd'):
+                            autoloads[name] = path[len('res://'):]
+        return autoloads
+
+    def script_of(self, type_name):
+        """Script for a class_name, autoload or res:// path (None for engine types)"""
+        if type_name is None:
+            return None
+        if type_name.startswith('res://'):
+            return type_name[len('res://'):] if type_name[len('res://'):] in self.scripts else None
+        return self.class_names.get(type_name) or self.autoloads.get(type_name)
+
+    def method(self, script, name, seen=()):
+        """Function `name` as seen from `script`: its own or inherited"""
+        while script in self.scripts and script not in seen:
+            found = self.scripts[script].functions.get(name)
+            if found:
+                return found
+            seen = (*seen, script)
+            script = self.script_of(self.scripts[script].extends)
+        return None
+
+    def callee(self, function, tokens, i):
+        """Project function called by the name token at tokens[i] (followed by '('), or None"""
+        name = tokens[i][1]
+        prev = tokens[i - 1][1] if i else ''
+        script = self.scripts[function.script]
+        if prev != '.':
+            return self.method(function.script, name)
+        receiver = tokens[i - 2][1] if i >= 2 else ''
+        before = tokens[i - 3][1] if i >= 3 else ''
+        if receiver == 'self' and before != '.':
+            return self.method(function.script, name)
+        if receiver == 'super' and before != '.':
+            return self.method(self.script_of(script.extends), name)
+        if tokens[i - 2][0] == 'name' and before != '.':
+            target = self.script_of(receiver) or self.script_of(script.member_types.get(receiver))
+            if target:
+                return self.method(target, name)
+        if name in self.unique and name not in CALLS and name not in METHODS:
+            return self.method(self.unique[name], name)
+        return None
+
+
+def findings_in(tokens):
+    """(rule, cost, detail) for every flagged token of one statement"""
+    found = []
+    n = len(tokens)
+    for i, (kind, value, _) in enumerate(tokens):
+        prev = tokens[i - 1] if i else ('op', '', 0)
+        nxt = tokens[i + 1] if i + 1 < n else ('op', '', 0)
+        if kind == 'nodepath':
+            found.append((*NODE_PATH, value))
+        elif kind == 'name' and nxt[1] == '(':
+            if prev[1] == '.':
+                if value in METHODS and not (value == 'load' and tokens[i - 2][1] != 'ResourceLoader'):
+                    found.append((*METHODS[value], f'.{value}()'))
+                elif value in CALLS and CALLS[value][0] == 'node lookup':
+                    found.append((*CALLS[value], f'.{value}()'))
+            elif value in CALLS:
+                found.append((*CALLS[value], f'{value}()'))
+        elif kind == 'name' and value == 'func' and i > 0:
+            found.append((*LAMBDA, 'lambda'))
+        elif kind == 'string' and nxt[1] == '%':
+            found.append((*FORMAT, '"..." %'))
+        elif kind == 'string' and (nxt[1] == '+' or prev[1] == '+'):
+            found.append((*CONCAT, 'string +'))
+        elif kind == 'op' and value == '[' and (i == 0 or (prev[0] == 'op' and prev[1] not in _VALUE_END)
+                                                or prev[1] in _KEYWORDS):
+            found.append((*ARRAY_LITERAL, '[...]'))
+        elif kind == 'op' and value == '{':
+            found.append((*DICT_LITERAL, '{...}'))
+    return found
+
+
+def analyze(project):
+    """Hot functions with their frequency, and ranked findings"""
+    calls = {}
+    for script in project.scripts.values():
+        for function in script.functions.values():
+            edges = []
+            for statement in function.body:
+                tokens = statement.tokens
+                for i, token in enumerate(tokens):
+                    if token[0] == 'name' and i + 1 < len(tokens) and tokens[i + 1][1] == '(':
+                        callee = project.callee(function, tokens, i)
+                        if callee is not None and callee is not function:
+                            edges.append((statement.factor, statement.guarded, callee))
+            calls[function.key] = edges
+
+    frequency = defaultdict(float)
+    every_frame = set()     # reached through calls none of which is guarded
+    best_path = {}
+
+    def walk(function, freq, every, path):
+        frequency[function.key] += freq
+        if every:
+            every_frame.add(function.key)
+        if (every, freq) > best_path.get(function.key, (False, 0.0, None))[:2]:
+            best_path[function.key] = (every, freq, path)
+        if len(path) >= MAX_DEPTH:
+            return
+        for factor, guarded, callee in calls[function.key]:
+            if callee not in path:
+                walk(callee, freq * factor, every and not guarded, (*path, callee))
+
+    for rel, script in project.scripts.items():
+        for name in ROOTS:
+            if name in script.functions:
+                root = script.functions[name]
+                # Every node running this callback (subclasses inherit it); 1 when no scene places one
+                count = sum(n for other, n in project.instances.items() if project.method(other, name) is root)
+                walk(root, count or 1.0, True, (root,))
+
+    results = []
+    for (rel, name), freq in frequency.items():
+        function = project.scripts[rel].functions[name]
+        per_line = {}
+        for statement in function.body:
+            every = function.key in every_frame and not statement.guarded
+            for rule, cost, detail in findings_in(statement.tokens):
+                entry = per_line.setdefault((statement.line, rule), [0.0, [], statement.factor * freq, every])
+                entry[0] += cost * statement.factor * freq
+                entry[1].append(detail)
+        for (line, rule), (cost, details, runs, every) in per_line.items():
+            results.append({'cost': cost, 'rule': rule, 'script': rel, 'line': line,
+                            'details': details, 'function': function, 'every_frame': every,
+                            'via': best_path[function.key][2], 'runs': runs})
+    results.sort(key=lambda r: (not r['every_frame'], -r['cost'], r['script'], r['line']))
+    return frequency, results
+
+
+def summarize(details):
+    counts = defaultdict(int)
+    for detail in details:
+        counts[detail] += 1
+    return ', '.join(f'{d} x{c}' if c > 1 else d for d, c in counts.items())
+
+
+def report(project, results, list_all=False):
+    print(f"Per-frame cost estimates (branch x{BRANCH}, rare guard x{RARE}, loop x{LOOP_TRIPS}; microseconds, "
+          f"for ranking only)\nEvery-frame findings (no guard on the path) first, then guarded ones\n")
+    shown = results if list_all else results[:TOP]
+    for r in shown:
+        where = f"{r['script']}:{r['line']}"
+        via = ' -> '.join(repr(f) for f in r['via'])
+        when = 'every frame' if r['every_frame'] else 'guarded'
+        print(f"{r['cost']:8.1f}  {r['rule']:17s} {where}  ({r['runs']:.2g} runs/frame, {when})")
+        print(f"          {summarize(r['details'])}  in {via}")
+        print(f"          | {project.scripts[r['script']].source(r['line'])[:100]}")
+    if len(shown) < len(results):
+        print(f"... {len(results) - len(shown)} more (--all)")
+
+    by_rule = defaultdict(float)
+    by_script = defaultdict(float)
+    for r in results:
+        by_rule[r['rule']] += r['cost']
+        by_script[r['script']] += r['cost']
+    print("\nBy rule:")
+    for rule, cost in sorted(by_rule.items(), key=lambda item: -item[1]):
+        print(f"{cost:10.1f}  {rule}")
+    print("\nBy script:")
+    for rel, cost in sorted(by_script.items(), key=lambda item: -item[1])[:15]:
+        print(f"{cost:10.1f}  {rel}")
+    for rel, error in project.errors:
+        print(f"✗ {rel}: {error} (skipped)")
+
+
+def main():
+    args = sys.argv[1:]
+    if any(a.startswith('-') and a != '--all' for a in args):
+        print(__doc__)
+        return 2
+    with ProjectIndex() as index:
+        project = Project(index)
+    _, results = analyze(project)
+    targets = {a[len('res://'):] if a.startswith('res://') else a for a in args if a != '--all'}
+    if targets:
+        results = [r for r in results if r['script'] in targets]
+    report(project, results, list_all='--all' in args or bool(targets))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Golden-image regression check for the generated health sprites.
+
+Nothing used to check that a regenerated top_layer_damage_N.webp or
+health_breathing_N_masked.webp still looks right. invert_masks.py even
+rewrites its inputs in place, so running it twice silently flips the
+masks back. tests/golden/ holds the blessed state of every generated
+sprite: golden.json with its file and pixel hashes, plus a downsampled
+thumbnail (PNG) per sprite.
+
+check compares every sprite against its golden:
+  identical    same file bytes (only a stat and a cached hash)
+  same pixels  re-encoded, but decodes to exactly the golden pixels
+  similar      pixels drifted, but the thumbnails' SSIM >= SSIM_THRESHOLD
+  DIFFERENT    SSIM below the threshold (e.g. an inverted mask)
+  MISSING      a committed sprite is gone
+  not built    a sprite sprite_build.py generates on demand is absent
+  new          matches GOLDEN_GLOBS but has no golden yet
+
+The perceptual diff is SSIM over 7x7 windows, computed with NumPy on the
+thumbnails' luma (over mid-gray) and on their alpha; the lower of the two
+counts. Results are cached in .build/golden_cache.json, keyed by the
+golden's pixel hash and the sprite's file hash, and file hashes are
+reused while size and mtime are unchanged. A check of unchanged assets
+therefore decodes nothing and finishes well under a second.
+
+Usage (from the project root):
+    python3 tests/golden_images.py              # check, exit 1 on failures
+    python3 tests/golden_images.py update       # bless the current sprites
+    python3 tests/golden_images.py update top_layer_damage_3   # only matching
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+import numpy as np
+
+from sprite_cache import SpriteCache, load_rgba
+
+GOLDEN_DIR = Path('tests/golden')
+GOLDEN_INDEX = GOLDEN_DIR / 'golden.json'
+CACHE_PATH = Path('.build/golden_cache.json')
+# Bump when the thumbnail or SSIM computation changes: invalidates the cache
+COMPARE_VERSION = 2
+
+GOLDEN_GLOBS = [
+    'assets/ui/health/top_layers/top_layer_damage_*.webp',
+    'assets/ui/health/breathing_masked/health_breathing_*_masked.webp',
+    'assets/ui/health/mask_damage_*.webp',
+]
+# Generated by sprite_build.py and not committed: absence is not a failure
+ON_DEMAND = 'assets/ui/health/mask_damage_'
+
+THUMBNAIL_SIZE = 128
+SSIM_THRESHOLD = 0.98
+SSIM_WINDOW = 7
+FAILURES = ('DIFFERENT', 'MISSING')
+
+
+def pixel_hash(pixels):
+    """sha256 of the visible pixels: RGB under alpha 0 (which encoders may rewrite) is zeroed"""
+    pixels = np.array(pixels)
+    pixels[pixels[:, :, 3] == 0] = 0
+    return hashlib.sha256(pixels.tobytes()).hexdigest()
+
+
+def thumbnail(pixels):
+    """RGBA thumbnail whose longer side is at most THUMBNAIL_SIZE"""
+    image = Image.fromarray(np.asarray(pixels))
+    image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.BOX)
+    return np.array(image)
+
+
+def _planes(thumb):
+    """Luma over mid-gray and alpha, float64 in 0-255"""
+    rgb = thumb[:, :, :3].astype(float)
+    alpha = thumb[:, :, 3:4].astype(float) / 255.0
+    over_gray = rgb * alpha + 128.0 * (1.0 - alpha)
+    luma = over_gray @ np.array([0.299, 0.587, 0.114])
+    return luma, thumb[:, :, 3].astype(float)
+
+
+def _window_mean(x):
+    return np.lib.stride_tricks.sliding_window_view(x, (SSIM_WINDOW, SSIM_WINDOW)).mean(axis=(-2, -1))
+
+
+def ssim(a, b):
+    """Mean SSIM of two equally sized 2-D planes in 0-255"""
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_a, mu_b = _window_mean(a), _window_mean(b)
+    var_a = _window_mean(a * a) - mu_a ** 2
+    var_b = _window_mean(b * b) - mu_b ** 2
+    cov = _window_mean(a * b) - mu_a * mu_b
+    score = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(score.mean())
+
+
+def perceptual_diff(golden_thumb, thumb):
+    """SSIM of two thumbnails (the lower of luma and alpha); 0.0 when the sizes differ"""
+    if golden_thumb.shape != thumb.shape:
+        return 0.0
+    return min(ssim(g, c) for g, c in zip(_planes(golden_thumb), _planes(thumb)))
+
+
+class GoldenSet:
+    """tests/golden/golden.json plus the comparison cache"""
+
+    def __init__(self, root='.'):
+        self.root = Path(root)
+        self.hashes = SpriteCache(self.root / '.build/decode_cache')
+        index = self.root / GOLDEN_INDEX
+        self.golden = json.loads(index.read_text()) if index.exists() else {}
+        self.cache = {}
+        cache = self.root / CACHE_PATH
+        if cache.exists():
+            try:
+                data = json.loads(cache.read_text())
+                if data.get('version') == COMPARE_VERSION:
+                    self.cache = data['results']
+            except (OSError, ValueError, KeyError):
+                pass
+        self._cache_dirty = False
+
+    def tracked(self):
+        """Sprites matching GOLDEN_GLOBS plus every golden, sorted"""
+        found = {os.path.relpath(p, self.root) for pattern in GOLDEN_GLOBS
+                 for p in glob.glob(str(self.root / pattern))}
+        return sorted(found | set(self.golden))
+
+    def thumb_path(self, rel_path):
+        return self.root / GOLDEN_DIR / (Path(rel_path).stem + '.png')
+
+    def compare(self, rel_path):
+        """(status, detail) for one sprite"""
+        path = self.root / rel_path
+        golden = self.golden.get(rel_path)
+        if not path.exists():
+            if rel_path.startswith(ON_DEMAND):
+                return 'not built', 'run tests/sprite_build.py'
+            return 'MISSING', ''
+        if golden is None:
+            return 'new', 'run update to bless'
+
+        file_hash = self.hashes.source_hash(path)
+        if file_hash == golden['sha256']:
+            return 'identical', ''
+
+        key = f"{golden['pixels_sha256']}:{file_hash}"
+        result = self.cache.get(key)
+        if result is None:
+            pixels = load_rgba(path, self.root / '.build/decode_cache')
+            if pixel_hash(pixels) == golden['pixels_sha256']:
+                result = {'same_pixels': True, 'ssim': 1.0}
+            else:
+                golden_thumb = np.array(Image.open(self.thumb_path(rel_path)).convert('RGBA'))
+                result = {'same_pixels': False, 'ssim': perceptual_diff(golden_thumb, thumbnail(pixels))}
+            self.cache[key] = result
+            self._cache_dirty = True
+
+        if result['same_pixels']:
+            return 'same pixels', 're-encoded'
+        status = 'similar' if result['ssim'] >= SSIM_THRESHOLD else 'DIFFERENT'
+        return status, f"ssim {result['ssim']:.4f}"
+
+    def check(self):
+        results = [(rel_path, *self.compare(rel_path)) for rel_path in self.tracked()]
+        self.save_cache()
+        return results
+
+    def update(self, targets=()):
+        """Bless the current sprites (those matching any target substring, or all)"""
+        blessed = []
+        (self.root / GOLDEN_DIR).mkdir(parents=True, exist_ok=True)
+        for rel_path in self.tracked():
+            if targets and not any(t in rel_path for t in targets):
+                continue
+            path = self.root / rel_path
+            if not path.exists():
+                continue
+            pixels = load_rgba(path, self.root / '.build/decode_cache')
+            self.golden[rel_path] = {
+                'sha256': self.hashes.source_hash(path),
+                'pixels_sha256': pixel_hash(pixels),
+                'size': [pixels.shape[1], pixels.shape[0]],
+            }
+            Image.fromarray(thumbnail(pixels)).save(self.thumb_path(rel_path), optimize=True)
+            blessed.append(rel_path)
+        index = self.root / GOLDEN_INDEX
+        index.write_text(json.dumps(self.golden, indent=1, sort_keys=True) + '\n')
+        return blessed
+
+    def save_cache(self):
+        self.hashes.save()
+        if not self._cache_dirty:
+            return
+        path = self.root / CACHE_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps({'version': COMPARE_VERSION, 'results': self.cache}, indent=1))
+        os.replace(tmp, path)
+        self._cache_dirty = False
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'check'
+    start = time.perf_counter()
+    golden = GoldenSet()
+
+    if command == 'update':
+        blessed = golden.update(sys.argv[2:])
+        for rel_path in blessed:
+            print(f"  blessed {rel_path}")
+        print(f"Blessed {len(blessed)} sprite(s) into {GOLDEN_DIR}")
+        return 0
+    if command != 'check':
+        print(__doc__)
+        return 2
+
+    results = golden.check()
+    for rel_path, status, detail in results:
+        print(f"  {status:11s} {rel_path}" + (f"  ({detail})" if detail else ""))
+    failures = [r for r in results if r[1] in FAILURES]
+    elapsed = (time.perf_counter() - start) * 1000
+    if failures:
+        print(f"✗ {len(failures)} of {len(results)} sprite(s) differ from golden ({elapsed:.0f} ms)")
+        return 1
+    print(f"✓ {len(results)} sprite(s) match golden ({elapsed:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
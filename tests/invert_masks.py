@@ -2,6 +2,9 @@
 """
 Invert the damage masks - flip white and black.
 White should be where DAMAGED (to hide), Black where HEALTHY (to show).
+
+Not idempotent: a second run flips the masks back. tests/golden_images.py
+reports flipped masks as DIFFERENT.
 """
 
 from PIL import Image
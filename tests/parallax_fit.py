@@ -0,0 +1,162 @@
+"""
+Fit whole families of scale -> y models at once and keep the one that predicts best.
+
+analyze_parallax_math.py and analyze_actual_pattern.py try one hypothesis
+at a time (a focal length, a C in ground - C/scale, a polynomial degree)
+and extract_updated_assets.py then commits to a quadratic. Here every
+family is a set of candidates that are linear in their coefficients once
+a grid parameter is fixed:
+
+    polynomial    y = a + b*s [+ c*s² [+ d*s³]]            degree 1..3
+    hyperbolic    y = a + b/s^p                            p on a grid (p=1 is ground - C/scale,
+                                                           p=0 is y = a - b*log(s))
+    perspective   y = y0 + gain*s/(1 + k*s)                k on a grid: a pinhole camera
+                                                           with a free horizon line (y0)
+                                                           and focal length (k = focal
+                                                           ratio - 1; k=0 is the
+                                                           vanishing point formula)
+
+All candidates are stacked into one (candidates, points, MAX_TERMS) design
+array, zero-padded, and solved in a single batched pseudo-inverse. The
+hat matrix of the same pass gives each candidate's leave-one-out
+residuals (e_i / (1 - h_ii)) without refitting, so candidates are ranked
+by the error they make on the sprite they did not see rather than by
+in-sample error, which always favours more terms.
+
+select_model() is the "model" block of data/parallax_scales.json, which
+extract_updated_assets.py and parallax_watch.py write next to the
+quadratic "formula" block the spawners evaluate.
+
+Usage:
+    from parallax_fit import fit_all, predict, select_model
+    fits = fit_all(pairs)                  # (scale, y) pairs, best first
+    fits[0].family, predict(fits[0], 0.5)
+    select_model(pairs)['params']
+
+    python3 tests/extract_updated_assets.py   # ranks the families, writes the winner
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+MAX_TERMS = 4
+DEGREES = (1, 2, 3)
+# p=0 is the limit of the family, y = a - b*log(s)
+POWERS = np.round(np.arange(0.0, 3.001, 0.05), 2)
+# Perspective poles stay beyond POLE_MARGIN times the largest scale
+POLE_MARGIN = 1.5
+K_GRID = 400
+K_MAX = 20.0
+# Leverage at which a point's leave-one-out residual is undefined
+LEVERAGE_LIMIT = 1 - 1e-9
+
+Candidate = namedtuple('Candidate', 'family grid terms')
+Fit = namedtuple('Fit', 'family grid coefficients mae loo_mae')
+
+
+def candidates(scales):
+    """Every (family, grid value) to fit, with its design-column builder"""
+    found = [Candidate(f'polynomial-{d}', d, d + 1) for d in DEGREES]
+    found += [Candidate('hyperbolic', float(p), 2) for p in POWERS]
+    k_min = -1.0 / (POLE_MARGIN * max(scales))
+    found += [Candidate('perspective', float(k), 2)
+              for k in np.unique(np.round(np.concatenate([np.linspace(k_min, 0, K_GRID // 2, endpoint=False),
+                                                          np.geomspace(1e-3, K_MAX, K_GRID // 2), [0.0]]), 4))]
+    return found
+
+
+def columns(candidate, s):
+    """Design columns of one candidate at scales `s` (any shape): list of arrays"""
+    family, grid = candidate.family, candidate.grid
+    if family.startswith('polynomial'):
+        return [s ** i for i in range(grid + 1)]
+    if family == 'hyperbolic':
+        return [np.ones_like(s), s ** -grid if grid else -np.log(s)]
+    return [np.ones_like(s), s / (1 + grid * s)]
+
+
+def design(cands, s):
+    """(candidates, points, MAX_TERMS) design array, unused terms zero"""
+    x = np.zeros((len(cands), len(s), MAX_TERMS))
+    for i, candidate in enumerate(cands):
+        for j, column in enumerate(columns(candidate, s)):
+            x[i, :, j] = column
+    return x
+
+
+def fit_all(pairs):
+    """Fits of every candidate, best leave-one-out error first"""
+    s = np.array([p[0] for p in pairs], dtype=float)
+    y = np.array([p[1] for p in pairs], dtype=float)
+    cands = candidates(s)
+    x = design(cands, s)
+    pinv = np.linalg.pinv(x)                              # (C, T, N)
+    beta = pinv @ y                                       # (C, T)
+    residual = y - np.einsum('cnt,ct->cn', x, beta)       # (C, N)
+    leverage = np.einsum('cnt,ctn->cn', x, pinv)          # diag of the hat matrix
+    with np.errstate(divide='ignore', invalid='ignore'):
+        loo = np.where(leverage < LEVERAGE_LIMIT, residual / (1 - leverage), np.inf)
+    mae = np.abs(residual).mean(axis=1)
+    loo_mae = np.abs(loo).mean(axis=1)
+    fits = [Fit(c.family, c.grid, beta[i, :c.terms], float(mae[i]), float(loo_mae[i]))
+            for i, c in enumerate(cands)]
+    return sorted(fits, key=lambda f: (f.loo_mae, len(f.coefficients), f.family))
+
+
+def best_per_family(fits):
+    """family -> its best fit; `fits` ranked as fit_all returns them"""
+    best = {}
+    for fit in fits:
+        best.setdefault(fit.family, fit)
+    return best
+
+
+def predict(fit, s):
+    s = np.asarray(s, dtype=float)
+    cand = Candidate(fit.family, fit.grid, len(fit.coefficients))
+    return sum(c * col for c, col in zip(fit.coefficients, columns(cand, s)))
+
+
+def params(fit):
+    """Named constants of a fit, rounded as the other parallax data"""
+    c = [round(float(v), 4) for v in fit.coefficients]
+    if fit.family.startswith('polynomial'):
+        return dict(zip('abcd', c))
+    if fit.family == 'hyperbolic':
+        return {'a': c[0], 'b': c[1], 'p': fit.grid}
+    return {'y0': c[0], 'gain': c[1], 'k': fit.grid}
+
+
+def expression(fit):
+    p = params(fit)
+    if fit.family.startswith('polynomial'):
+        terms = ['', '*scale', '*scale²', '*scale³']
+        return 'y = ' + ' + '.join(f'({v:.2f}){terms[i]}' if i else f'{v:.2f}' for i, v in enumerate(p.values()))
+    if fit.family == 'hyperbolic':
+        if not p['p']:
+            return f"y = {p['a']:.2f} - ({p['b']:.2f})*log(scale)"
+        return f"y = {p['a']:.2f} + ({p['b']:.2f})/scale^{p['p']:g}"
+    return f"y = {p['y0']:.2f} + ({p['gain']:.2f})*scale/(1 + ({p['k']:g})*scale)"
+
+
+def report(fits):
+    """Print the best candidate of each family, best first"""
+    print(f"{len(fits)} candidates, ranked by leave-one-out MAE")
+    print(f"  {'family':14s} {'loo MAE':>8s} {'MAE':>7s}  expression")
+    for name, fit in sorted(best_per_family(fits).items(), key=lambda item: item[1].loo_mae):
+        print(f"  {name:14s} {fit.loo_mae:8.2f} {fit.mae:7.2f}  {expression(fit)}")
+
+
+def select_model(pairs):
+    """The "model" block of data/parallax_scales.json: the leave-one-out winner"""
+    fits = fit_all(pairs)
+    best = fits[0]
+    return {
+        "family": best.family,
+        "params": params(best),
+        "expression": expression(best),
+        "mae": round(best.mae, 2),
+        "loo_mae": round(best.loo_mae, 2),
+        "families": {name: round(fit.loo_mae, 2) for name, fit in best_per_family(fits).items()},
+    }
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Bake the parallax spawners' per-asset spawn layout into data/parallax_layout.json.
+
+ParallaxLayerSpawner._spawn_object used to work out, on every spawn and
+from has()/get() lookups on the config Dictionary: the region and its
+bottom-center pivot, the scaled sprite height, the quadratic world y,
+the camera conversion, the pivot correction and three offsets. None of
+that changes between spawns. This build step does it once per texture
+config and writes, per layer, the textures' res:// paths (the spawner
+keeps the preloaded Texture2D at the same index) and one row of COLUMNS
+per config:
+
+    region_*         x, y, w, h of the region; 0, 0, 0, 0 without one
+    width, height    unscaled size of the region, or of the texture
+    offset_x/_y      sprite offset for a bottom-center pivot: -w/2, -h
+    scale            sprite scale
+    asset_y_offset   the config's y_offset
+    base_y           position.y before the random y_variance:
+                     quad(scale) - camera_y + h*scale/2 + global + layer + asset
+
+with what went into base_y: quad_a/b/c and camera_y ("constants"),
+global_y_offset and layer_y_offset per layer, asset_y_offset per row.
+The offsets are the ones ParallaxLayerSpawner spawns with: the solved
+ones from data/parallax_offsets.json (tests/parallax_offsets.py) when
+the layer sets use_solved_offsets, the scripts' values otherwise.
+
+The spawner loads the table in _ready and then spawns with one index:
+texture, region, offset, scale and base_y reads plus one randf_range().
+If the table no longer matches its constants, texture_configs, offsets
+or texture sizes, it warns and bakes the same rows itself.
+
+Usage (from the project root):
+    python3 tests/parallax_layout.py            # rebuild the table
+    python3 tests/parallax_layout.py --check    # exit 1 if it is out of date
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+from parallax_offsets import LAYERS, OUTPUT as OFFSETS, Setup
+
+OUTPUT = 'data/parallax_layout.json'
+COLUMNS = ('region_x', 'region_y', 'region_w', 'region_h', 'width', 'height',
+           'offset_x', 'offset_y', 'scale', 'asset_y_offset', 'base_y')
+# Bump when the table's layout changes: the spawner rejects other versions
+LAYOUT_VERSION = 1
+
+
+def solved_offsets(root):
+    """data/parallax_offsets.json contents, or {} without one"""
+    path = Path(root) / OFFSETS
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def build(setup, solved):
+    """data/parallax_layout.json contents"""
+    c = setup.constants
+    layers = {}
+    for layer in LAYERS:
+        spawner = setup.spawners.get(layer)
+        if spawner is None:
+            continue
+        global_offset = spawner.get('global_y_offset', 0.0)
+        layer_offset = spawner.get('layer_y_offset', 0.0)
+        asset_offsets = {}
+        entry = solved.get('layers', {}).get(layer, {})
+        if entry and spawner.get('use_solved_offsets', False):
+            global_offset = solved.get('global_y_offset', global_offset)
+            layer_offset = entry.get('layer_y_offset', layer_offset)
+            asset_offsets = entry.get('assets', {})
+        table = {"constants": [c['quad_a'], c['quad_b'], c['quad_c'], c['camera_y']],
+                 "global_y_offset": global_offset, "layer_y_offset": layer_offset, "textures": [], "rows": []}
+        for asset in setup.assets:
+            if asset.layer != layer:
+                continue
+            path = f'res://{asset.texture}'
+            asset_offset = asset_offsets.get(path, asset.y_offset)
+            s = asset.scale
+            width, height = asset.size
+            base_y = (c['quad_a'] + c['quad_b'] * s + c['quad_c'] * s * s - c['camera_y']
+                      + height * s / 2 + global_offset + layer_offset + asset_offset)
+            region = list(asset.region) if asset.region else [0.0, 0.0, 0.0, 0.0]
+            row = region + [width, height, -width / 2, -height, s, asset_offset, round(base_y, 3)]
+            table["textures"].append(path)
+            table["rows"].append([float(v) for v in row])
+        layers[layer] = table
+    return {"version": LAYOUT_VERSION, "columns": list(COLUMNS), "layers": layers}
+
+
+def dumps(layout):
+    """JSON text of a layout, one line per row"""
+    rows = {}
+    for layer, table in layout["layers"].items():
+        for i, row in enumerate(table["rows"]):
+            rows[f"{layer}/{i}"] = json.dumps(row)
+    marked = {**layout, "layers": {layer: {**table, "rows": [f"@{layer}/{i}" for i in range(len(table["rows"]))]}
+                                   for layer, table in layout["layers"].items()}}
+    text = json.dumps(marked, indent=2)
+    for key, row in rows.items():
+        text = text.replace(f'"@{key}"', row)
+    return text
+
+
+def main():
+    args = sys.argv[1:]
+    if any(a != '--check' for a in args):
+        print(__doc__)
+        return 2
+    setup = Setup()
+    layout = build(setup, solved_offsets(setup.root))
+    text = dumps(layout)
+    path = setup.root / OUTPUT
+    current = path.read_text() if path.exists() else None
+    if '--check' in args:
+        if current != text:
+            print(f"✗ {OUTPUT} is out of date: run python3 tests/parallax_layout.py")
+            return 1
+        print(f"✓ {OUTPUT} is up to date")
+        return 0
+    if current == text:
+        print(f"{OUTPUT} already up to date")
+        return 0
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    tmp.write_text(text)
+    os.replace(tmp, path)
+    counts = ', '.join(f"{layer} {len(table['rows'])}" for layer, table in layout['layers'].items())
+    print(f"Saved {OUTPUT} ({counts})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
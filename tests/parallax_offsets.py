@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Solve every parallax y offset at once against the scene's lines and camera.
+
+calculate_correct_offsets.py, diagnose_layer_offsets.py,
+recalc_with_camera_offset.py and debug_parallax_positions.py each pick
+their own target y and assume their own global_y_offset (0, 210, 240)
+while ParallaxLayerSpawner exports 380. This tool reads what the game
+actually runs and solves global_y_offset, each spawner's layer_y_offset
+and each texture config's y_offset jointly.
+
+A spawned sprite's bottom edge (its position: the spawner pivots sprites
+at the bottom center) is
+
+    quad(scale) - camera_y + height/2 + global + layer + asset
+
+with quad_a/b/c and camera_y from ParallaxLayerSpawner.gd and height the
+region (or texture) height times the config's scale. The pooled sprites
+are children of a plain Node under the ParallaxBackground, a CanvasLayer
+that does not follow the viewport, so that position is in screen pixels
+from the top-left of the viewport, not world y minus the camera y (the
+spawner's camera_y is just part of the formula). Screen y maps to world y
+through Main.tscn's Camera2D, centred on its position plus its offset
+(--camera-offset Y replaces the offset, e.g. -80.915 as in
+recalc_with_camera_offset.py) at its zoom:
+
+    world y = camera y + (screen y - viewport_height / 2) / zoom
+
+Constraints, in world y (RULES, from docs/ADJUST_PARALLAX_HEIGHT.md):
+
+    far      bottom 40-60 px above the road line
+    mid      bottom 10-20 px above the road line
+    front    bottom on the road line +- 5 px
+    all      bottom below the horizon line, top edge inside the viewport,
+             each band narrowed by the spawner's y_variance
+
+The road line is Main.tscn's Road node, the horizon line the editor's
+HorizonReference. The solver minimizes the distance of each bottom from
+its band's middle plus a small penalty on asset offsets (ASSET_WEIGHT)
+and a smaller one on layer offsets (LAYER_WEIGHT), so shared shifts go
+to the global and layer offsets and assets only carry what is their own.
+It is a bounded least-squares problem over all offsets and bottoms
+(bounded_lstsq: active-set, numpy only). Assets too tall to fit their
+band with the top on screen are reported and kept on the band.
+
+The result goes to data/parallax_offsets.json. ParallaxLayerSpawner only
+applies it with use_solved_offsets on (off by default: the inspector
+values stay in charge until the solved ones are checked in the engine),
+and tests/parallax_layout.py bakes it into the spawn layout the same way.
+
+Usage (from the project root):
+    python3 tests/parallax_offsets.py [--camera-offset Y] [--dry-run]
+"""
+
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import _scripts_path  # noqa: F401
+from extract_updated_assets import OUTPUT as SCALES
+from gdscript_hotpath import Script
+from godot_scene import Rect2
+from project_index import load_scene
+
+SPAWNER_DIR = 'scripts/components/parallax'
+BASE_SPAWNER = 'ParallaxLayerSpawner.gd'
+MAIN_SCENE = 'scenes/Main.tscn'
+OUTPUT = 'data/parallax_offsets.json'
+LAYERS = ('far', 'mid', 'front')
+
+Rule = namedtuple('Rule', 'low high')  # bottom band relative to the road line, px (negative = above)
+RULES = {
+    'far': Rule(-60.0, -40.0),
+    'mid': Rule(-20.0, -10.0),
+    'front': Rule(-5.0, 5.0),
+}
+ASSET_WEIGHT = 0.01
+LAYER_WEIGHT = 0.001
+# Keeps the global/layer split unique without pulling the global offset anywhere
+GLOBAL_WEIGHT = 1e-6
+MAX_ITERATIONS = 200
+
+# size: unscaled (width, height) of the region, or of the texture without one; height is scaled
+Asset = namedtuple('Asset', 'layer texture region size scale height y_offset')
+
+
+# -- GDScript literals ------------------------------------------------------
+
+def _literal(tokens, i=0):
+    """(value, next index) of the constant expression at tokens[i]
+
+    Numbers, strings, null/true/false, unary minus, [...] and {...},
+    Rect2(...) and preload("path") (its path).
+    """
+    kind, value, _ = tokens[i]
+    if value == '-':
+        number, i = _literal(tokens, i + 1)
+        return -number, i
+    if kind == 'number':
+        return float(value.replace('_', '')), i + 1
+    if kind == 'string':
+        return value.strip('"\''), i + 1
+    if value in ('null', 'true', 'false'):
+        return {'null': None, 'true': True, 'false': False}[value], i + 1
+    if value in ('[', '{'):
+        close = ']' if value == '[' else '}'
+        items, i = [], i + 1
+        while tokens[i][1] != close:
+            item, i = _literal(tokens, i)
+            if value == '{':
+                assert tokens[i][1] == ':', f"line {tokens[i][2]}: expected ':'"
+                item_value, i = _literal(tokens, i + 1)
+                item = (item, item_value)
+            items.append(item)
+            if tokens[i][1] == ',':
+                i += 1
+        return (items if value == '[' else dict(items)), i + 1
+    if kind == 'name' and tokens[i + 1][1] == '(':
+        args, i = [], i + 2
+        while tokens[i][1] != ')':
+            arg, i = _literal(tokens, i)
+            args.append(arg)
+            if tokens[i][1] == ',':
+                i += 1
+        if value == 'Rect2':
+            return Rect2(*args), i + 1
+        if value in ('preload', 'load'):
+            return args[0], i + 1
+    raise ValueError(f"line {tokens[i][2]}: not a constant: {value}")
+
+
+def assignments(script, function='_ready'):
+    """name -> constant value of each `name = constant` in a function's body"""
+    found = {}
+    body = script.functions[function].body if function in script.functions else []
+    for statement in body:
+        tokens = statement.tokens
+        if len(tokens) > 2 and tokens[0][0] == 'name' and tokens[1][1] == '=':
+            try:
+                found[tokens[0][1]], _ = _literal(tokens, 2)
+            except (ValueError, IndexError, AssertionError):
+                pass
+    return found
+
+
+def members(script):
+    """name -> constant initializer of the script's member variables"""
+    found = {}
+    for name, tokens in script.members.items():
+        try:
+            found[name], _ = _literal(tokens)
+        except (ValueError, IndexError, AssertionError):
+            pass
+    return found
+
+
+# -- inputs ------------------------------------------------------------------
+
+def texture_size(root, rel):
+    with Image.open(Path(root) / rel) as image:
+        return image.size
+
+
+class Setup:
+    """What the game runs: spawner constants, texture configs, camera and lines"""
+
+    def __init__(self, root='.', camera_offset=None):
+        self.root = Path(root)
+        spawner_dir = self.root / SPAWNER_DIR
+        base = Script(f'{SPAWNER_DIR}/{BASE_SPAWNER}', (spawner_dir / BASE_SPAWNER).read_text(encoding='utf-8'))
+        self.constants = members(base)
+        self.spawners = {}
+        self.assets = []
+        for path in sorted(spawner_dir.glob('*LayerSpawner.gd')):
+            layer = path.name[:-len('LayerSpawner.gd')].lower()
+            if layer not in LAYERS:
+                continue
+            values = dict(self.constants)
+            values.update(assignments(Script(f'{SPAWNER_DIR}/{path.name}', path.read_text(encoding='utf-8'))))
+            self.spawners[layer] = values
+            for config in values.get('texture_configs', []):
+                texture = config['texture'][len('res://'):]
+                region = config.get('region')
+                scale = config.get('scale') or values['base_scale']
+                size = (region.width, region.height) if region else texture_size(self.root, texture)
+                self.assets.append(Asset(layer, texture, region, size, scale, size[1] * scale,
+                                         config.get('y_offset', 0.0)))
+
+        main = load_scene(self.root / MAIN_SCENE, self.root)
+        camera = main.find_one('Camera2D')
+        self.camera_offset = camera['offset'].y if camera_offset is None else camera_offset
+        self.camera_y = camera['position'].y + self.camera_offset
+        zoom = camera.get('zoom')
+        self.zoom = zoom.y if zoom is not None else 1.0
+        self.road_y = main.node('Road')['position'].y
+        with open(self.root / SCALES) as f:
+            self.horizon_y = json.load(f)['reference_lines']['horizon_y']
+        settings = (self.root / 'project.godot').read_text()
+        self.viewport_height = int(re.search(r'^window/size/viewport_height=(\d+)', settings, re.MULTILINE).group(1))
+
+    def to_screen(self, world_y):
+        """Screen y (the spawners' frame) of a world y"""
+        return (world_y - self.camera_y) * self.zoom + self.viewport_height / 2
+
+    def to_world(self, screen_y):
+        return self.camera_y + (screen_y - self.viewport_height / 2) / self.zoom
+
+    def base(self, asset):
+        """Bottom of `asset` in the spawners' frame before any offset"""
+        c = self.constants
+        s = asset.scale
+        return c['quad_a'] + c['quad_b'] * s + c['quad_c'] * s * s - c['camera_y'] + asset.height / 2
+
+    def band(self, asset):
+        """(low, high, target) for the asset's bottom in the spawners' frame; low > high if it cannot fit"""
+        rule = RULES[asset.layer]
+        variance = self.spawners[asset.layer].get('y_variance', 0.0)
+        low = self.to_screen(max(self.road_y + rule.low, self.horizon_y)) + variance
+        high = self.to_screen(self.road_y + rule.high) - variance
+        # Sprites are not zoomed (screen space): the top edge stays below the screen's
+        low = max(low, asset.height + variance)
+        target = self.to_screen(self.road_y + (rule.low + rule.high) / 2)
+        return low, high, target
+
+    def current(self, asset):
+        """Bottom of `asset` in the spawners' frame with the offsets the scripts set now"""
+        values = self.spawners[asset.layer]
+        return self.base(asset) + values.get('global_y_offset', 0.0) + values.get('layer_y_offset', 0.0) + asset.y_offset
+
+
+# -- solver ------------------------------------------------------------------
+
+def bounded_lstsq(a, b, lower, upper, iterations=MAX_ITERATIONS):
+    """x minimizing |a x - b|² with lower <= x <= upper (Lawson-Hanson style active set)"""
+    n = a.shape[1]
+    x = np.clip(np.linalg.lstsq(a, b, rcond=None)[0], lower, upper)
+    state = np.where(x <= lower, -1, np.where(x >= upper, 1, 0))
+    for _ in range(iterations):
+        free = state == 0
+        if free.any():
+            z = np.linalg.lstsq(a[:, free], b - a[:, ~free] @ x[~free], rcond=None)[0]
+            lo, hi = lower[free], upper[free]
+            if np.all((z >= lo) & (z <= hi)):
+                x[free] = z
+            else:
+                # Step from x towards z up to the first bound; pin what it reaches
+                step = z - x[free]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    limits = np.where(step < 0, (lo - x[free]) / step, np.where(step > 0, (hi - x[free]) / step, np.inf))
+                alpha = min(1.0, float(np.min(limits)))
+                moved = x[free] + alpha * step
+                indices = np.nonzero(free)[0]
+                x[indices] = np.clip(moved, lo, hi)
+                state[indices[moved <= lo + 1e-9]] = -1
+                state[indices[moved >= hi - 1e-9]] = 1
+                continue
+        # Release the pinned variable whose gradient points most into the box
+        gradient = a.T @ (b - a @ x)
+        pull = np.where(state == -1, gradient, np.where(state == 1, -gradient, 0.0))
+        j = int(np.argmax(pull))
+        if pull[j] <= 1e-9:
+            break
+        state[j] = 0
+    return x
+
+
+class Solution:
+    def __init__(self, setup, global_offset, layer_offsets, asset_offsets, bottoms, infeasible):
+        self.setup = setup
+        self.global_offset = global_offset
+        self.layer_offsets = layer_offsets
+        self.asset_offsets = asset_offsets
+        self.bottoms = bottoms
+        self.infeasible = infeasible
+
+
+def solve(setup):
+    """Global, per-layer and per-asset offsets, all in one bounded least-squares problem
+
+    Variables: [global, layer offsets..., bottoms...]; asset offsets are
+    bottom - base - global - layer.
+    """
+    assets = setup.assets
+    n_layers, n = len(LAYERS), len(assets)
+    width = 1 + n_layers + n
+    rows, rhs = [], []
+    lower = np.full(width, -np.inf)
+    upper = np.full(width, np.inf)
+    infeasible = []
+    for i, asset in enumerate(assets):
+        low, high, target = setup.band(asset)
+        if low > high:
+            infeasible.append(asset)
+            low = high
+        u = 1 + n_layers + i
+        lower[u], upper[u] = low, high
+        row = np.zeros(width)
+        row[u] = 1.0
+        rows.append(row)
+        rhs.append(min(max(target, low), high))
+        # Asset offset u - global - layer - base, kept small
+        row = np.zeros(width)
+        row[u], row[0], row[1 + LAYERS.index(asset.layer)] = 1.0, -1.0, -1.0
+        rows.append(row * np.sqrt(ASSET_WEIGHT))
+        rhs.append(setup.base(asset) * np.sqrt(ASSET_WEIGHT))
+    for k in range(n_layers):
+        row = np.zeros(width)
+        row[1 + k] = np.sqrt(LAYER_WEIGHT)
+        rows.append(row)
+        rhs.append(0.0)
+    row = np.zeros(width)
+    row[0] = np.sqrt(GLOBAL_WEIGHT)
+    rows.append(row)
+    rhs.append(0.0)
+
+    x = bounded_lstsq(np.array(rows), np.array(rhs), lower, upper)
+    global_offset = float(x[0])
+    layer_offsets = {layer: float(x[1 + k]) for k, layer in enumerate(LAYERS)}
+    bottoms = x[1 + n_layers:]
+    asset_offsets = [float(bottoms[i] - setup.base(a) - global_offset - layer_offsets[a.layer])
+                     for i, a in enumerate(assets)]
+    return Solution(setup, global_offset, layer_offsets, asset_offsets, [float(b) for b in bottoms], infeasible)
+
+
+# -- output ------------------------------------------------------------------
+
+def resource(solution):
+    """data/parallax_offsets.json contents: what ParallaxLayerSpawner reads"""
+    setup = solution.setup
+    layers = {layer: {"layer_y_offset": round(solution.layer_offsets[layer], 2), "assets": {}} for layer in LAYERS}
+    for asset, offset in zip(setup.assets, solution.asset_offsets):
+        layers[asset.layer]["assets"][f"res://{asset.texture}"] = round(offset, 2)
+    return {
+        "camera_y": round(setup.camera_y, 3),
+        "viewport_height": setup.viewport_height,
+        "road_y": setup.road_y,
+        "horizon_y": setup.horizon_y,
+        "global_y_offset": round(solution.global_offset, 2),
+        "layers": layers,
+    }
+
+
+def report(solution):
+    setup = solution.setup
+    print(f"Camera y {setup.camera_y:.2f} (offset {setup.camera_offset:+.3f}, zoom {setup.zoom:g}), "
+          f"road line {setup.road_y:g} (screen y {setup.to_screen(setup.road_y):.1f}), "
+          f"horizon {setup.horizon_y:g}, viewport {setup.viewport_height} px tall")
+    current_global = setup.constants.get('global_y_offset', 0.0)
+    print(f"\nglobal_y_offset: {current_global:g} -> {solution.global_offset:.2f}")
+    for layer in LAYERS:
+        current = setup.spawners[layer].get('layer_y_offset', 0.0)
+        rule = RULES[layer]
+        print(f"\n{layer.upper()} (bottom {rule.low:+g}..{rule.high:+g} px from the road)  "
+              f"layer_y_offset: {current:g} -> {solution.layer_offsets[layer]:.2f}")
+        print(f"  {'texture':44s} {'now':>8s} {'solved':>8s}   {'bottom now':>10s} {'solved':>8s}")
+        for asset, offset, bottom in zip(setup.assets, solution.asset_offsets, solution.bottoms):
+            if asset.layer != layer:
+                continue
+            low, high, _ = setup.band(asset)
+            now = setup.current(asset)
+            outside = '' if low - 0.01 <= now <= high + 0.01 else '  ✗ now outside'
+            tall = '  ! too tall for the band' if asset in solution.infeasible else ''
+            print(f"  {os.path.basename(asset.texture):44s} {asset.y_offset:8.1f} {offset:8.2f}   "
+                  f"{setup.to_world(now):10.1f} {setup.to_world(bottom):8.1f}{outside}{tall}")
+    outside = sum(1 for a in setup.assets
+                  if not setup.band(a)[0] - 0.01 <= setup.current(a) <= setup.band(a)[1] + 0.01)
+    print(f"\n{outside} of {len(setup.assets)} configs sit outside their band with the current offsets "
+          f"(bottoms in world y)")
+    if solution.infeasible:
+        print(f"{len(solution.infeasible)} config(s) are taller than their band allows with the top on screen: "
+              f"lower their scale")
+
+
+def main():
+    args = sys.argv[1:]
+    camera_offset = None
+    if '--camera-offset' in args:
+        camera_offset = float(args[args.index('--camera-offset') + 1])
+    if any(a.startswith('--') and a not in ('--camera-offset', '--dry-run') for a in args):
+        print(__doc__)
+        return 2
+    setup = Setup(camera_offset=camera_offset)
+    solution = solve(setup)
+    report(solution)
+    if '--dry-run' not in args:
+        path = Path(OUTPUT)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(resource(solution), indent=2))
+        os.replace(tmp, path)
+        print(f"\nSaved offsets to {OUTPUT}; rebuild the spawn layout: python3 tests/parallax_layout.py")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
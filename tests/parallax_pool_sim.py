@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Replay scroll-speed traces through the parallax spawners' pools, hours of game time at once.
+
+Each ParallaxLayerSpawner keeps pool_size sprites. A spawn comes due when
+spawn_timer (which only runs while the world is not paused) reaches a
+randf_range(spawn_interval_min, spawn_interval_max) draw. If the pool is
+empty then, nothing spawns: the timer keeps running and the spawn waits
+for the first sprite to scroll past despawn_x, so the gaps between
+objects silently grow. How often that happens depends on how fast the
+world scrolls (game.scroll_speed * motion_scale: boost multiplies it,
+EV chargers and filters stop it), which nobody can see by playing.
+
+This simulator steps the spawner's _physics_process exactly, one event
+per spawn rather than one iteration per frame: the trace becomes
+per-frame cumulative scroll distance and unpaused time, a spawn's due
+frame and a sprite's despawn, enter-screen and leave-screen frames are
+searchsorted() lookups in them, and the pool is a heap of despawn
+frames. It reports per layer and pool size:
+
+    starved     share of spawns that came due with the pool empty, and
+                the mean wait until a sprite came back
+    peak        most sprites active at once; with an unlimited pool this
+                is the demand, and any pool above it never gets used
+    on screen   time-averaged and peak sprites overlapping the view
+                (x 0 .. viewport width: the sprites sit under ParallaxBG,
+                a CanvasLayer, so their positions are screen pixels and
+                the camera does not move them), and the share of time
+                the layer shows nothing
+
+and recommends the smallest pool that starves at most --target of the
+spawns (TARGET), so each pool holds the sprites its layer needs and no more.
+A script pool_size of DESIGN_LIMIT is a design choice, not a budget (the
+far layer shows one monument at a time): its waits are how the layer
+spaces its sprites, so it is reported as is and never grown.
+
+Spawner settings, texture configs and sizes come from the scripts, as
+tests/parallax_offsets.py reads them. Texture choice is uniform over the
+configs (the front layer's TreeSpawnManager odds are ignored: they only
+change which width scrolls by).
+
+Traces are either a CSV file (--trace) with a "time,speed,paused" header,
+speed interpolated linearly between rows and paused held until the next
+row, or a synthetic session (the default) built from the game's own
+numbers: config/gameplay.json's scroll speed and battery, EVCharger's
+slow-down/charge/speed-up (paused from the stop until speed is back) and
+Filter's cleanup (paused, then PlayerInventory's one-second tween). How
+often the player boosts and drops filters is a guess (SESSION_*).
+
+Usage (from the project root):
+    python3 tests/parallax_pool_sim.py [--hours H] [--seed N] [--trace trace.csv] [--target RATE]
+"""
+
+import csv
+import heapq
+import json
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from gdscript_hotpath import Script
+from parallax_offsets import LAYERS, Setup, members
+
+PHYSICS_FPS = 60
+HOURS = 4.0
+TARGET = 0.01
+# Pool sizes tried per layer: 1 .. max(MAX_POOL, the script's pool_size, demand)
+MAX_POOL = 8
+# Pools this small are one-at-a-time by design: reported, not resized
+DESIGN_LIMIT = 1
+GAMEPLAY = 'config/gameplay.json'
+EV_CHARGER = 'scripts/EVCharger.gd'
+FILTER = 'scripts/Filter.gd'
+PICKUP_SPAWNER = 'scripts/components/spawner/PickupSpawner.gd'
+# PlayerInventory tweens the world back to speed over this long after a filter
+FILTER_RESUME = 1.0
+# Synthetic session: seconds between player actions, boost burst lengths,
+# share of cruise stretches that end in a filter drop, and the time a
+# charger takes to reach the player once the battery runs low
+SESSION_CRUISE = (4.0, 20.0)
+SESSION_BOOST = (1.0, 6.0)
+SESSION_FILTER_CHANCE = 0.05
+SESSION_CHARGER_DELAY = 6.0
+
+Trace = namedtuple('Trace', 'speed paused')
+Layer = namedtuple('Layer', 'name pool_size interval spawn_x despawn_x motion_scale half_widths')
+Result = namedtuple('Result', 'pool due starved wait peak mean_on_screen peak_on_screen empty')
+
+
+# -- traces ------------------------------------------------------------------
+
+def read_trace(path, fps=PHYSICS_FPS):
+    """Trace of a "time,speed,paused" CSV file"""
+    with open(path, newline='') as f:
+        rows = [(float(r['time']), float(r['speed']), r.get('paused', '0').strip().lower() in ('1', 'true'))
+                for r in csv.DictReader(f)]
+    if not rows:
+        raise ValueError(f"{path}: no rows")
+    rows.sort()
+    times = np.array([r[0] for r in rows])
+    frames = np.arange(int(times[-1] * fps)) / fps
+    speed = np.interp(frames, times, [r[1] for r in rows])
+    paused = np.array([r[2] for r in rows])[np.searchsorted(times, frames, side='right') - 1]
+    return Trace(speed, paused)
+
+
+def _ramp(speed, seconds, shape, fps):
+    """Per-frame speeds easing 0 -> 1 of `speed` as `shape`(progress)"""
+    progress = np.minimum(np.arange(1, int(round(seconds * fps)) + 1) / (seconds * fps), 1.0)
+    return speed * shape(progress)
+
+
+def session(seconds, rng, root='.', fps=PHYSICS_FPS):
+    """Synthetic trace: cruising, boost bursts while the battery lasts, chargers and filters"""
+    root = Path(root)
+    with open(root / GAMEPLAY) as f:
+        config = json.load(f)
+    speed = float(config['world']['scroll_speed'])
+    battery_config = config['battery']
+    boost = speed * battery_config['boost_speed_mult']
+    charger = members(Script(EV_CHARGER, (root / EV_CHARGER).read_text(encoding='utf-8')))
+    cleanup = members(Script(FILTER, (root / FILTER).read_text(encoding='utf-8')))['cleanup_duration']
+    low = members(Script(PICKUP_SPAWNER, (root / PICKUP_SPAWNER).read_text(encoding='utf-8')))['battery_low_threshold']
+    ramp = charger['transition_duration']
+
+    speeds, pauses = [], []
+
+    def hold(value, duration, paused=False):
+        n = int(round(duration * fps))
+        speeds.append(np.full(n, value))
+        pauses.append(np.full(n, paused))
+
+    def ease(values, paused):
+        speeds.append(values)
+        pauses.append(np.full(len(values), paused))
+
+    battery = battery_config['max_battery']
+    total = 0
+    while total < seconds * fps:
+        hold(speed, rng.uniform(*SESSION_CRUISE))
+        if battery > 0:
+            burst = min(rng.uniform(*SESSION_BOOST), battery / battery_config['drain_per_sec'])
+            hold(boost, burst)
+            battery -= burst * battery_config['drain_per_sec']
+        if battery <= low:
+            # EVCharger: ease-out slow down, charge stopped, ease-in speed up (paused until done)
+            hold(speed, SESSION_CHARGER_DELAY)
+            ease(speed - _ramp(speed, ramp, lambda p: 1 - (1 - p) ** 2, fps), False)
+            hold(0.0, charger['charge_duration'], True)
+            ease(_ramp(speed, ramp, lambda p: p ** 2, fps), True)
+            battery = battery_config['max_battery']
+        elif rng.random() < SESSION_FILTER_CHANCE:
+            hold(0.0, cleanup, True)
+            ease(_ramp(speed, FILTER_RESUME, lambda p: p, fps), True)
+        total = sum(len(s) for s in speeds)
+    n = int(seconds * fps)
+    return Trace(np.concatenate(speeds)[:n], np.concatenate(pauses)[:n])
+
+
+# -- spawners ----------------------------------------------------------------
+
+def layers(setup):
+    """Layer of each spawner, in LAYERS order"""
+    found = []
+    for name in LAYERS:
+        values = setup.spawners.get(name)
+        if values is None:
+            continue
+        half_widths = np.array([a.size[0] * a.scale / 2 for a in setup.assets if a.layer == name])
+        found.append(Layer(name, int(values['pool_size']),
+                           (values['spawn_interval_min'], values['spawn_interval_max']),
+                           values['spawn_x'], values['despawn_x'], values['motion_scale'], half_widths))
+    return found
+
+
+def view(root='.'):
+    """(left, right) x of the visible area in the layers' (screen) frame"""
+    settings = (Path(root) / 'project.godot').read_text()
+    width = int(settings.split('window/size/viewport_width=')[1].split()[0])
+    return 0.0, float(width)
+
+
+class Timeline:
+    """Cumulative scroll distance and unpaused time of a trace, by frame"""
+
+    def __init__(self, trace, fps=PHYSICS_FPS):
+        self.frames = len(trace.speed)
+        self.dt = 1.0 / fps
+        # distance[k] / unpaused[k]: totals over frames 0 .. k-1
+        self.distance = np.concatenate([[0.0], np.cumsum(trace.speed * self.dt)])
+        self.unpaused = np.concatenate([[0.0], np.cumsum(~trace.paused) * self.dt])
+
+    def due(self, since, interval):
+        """First frame whose spawn_timer reaches `interval`, counting from unpaused time `since`"""
+        return int(np.searchsorted(self.unpaused, since + interval - 1e-9)) - 1
+
+    def first_unpaused(self, frame):
+        """First unpaused frame at or after `frame`"""
+        if frame >= self.frames:
+            return self.frames
+        return int(np.searchsorted(self.unpaused, self.unpaused[frame], side='right')) - 1
+
+    def beyond(self, frame, scrolled, strict=True):
+        """First frame from `frame` on after which the world has scrolled past `scrolled`"""
+        if scrolled < 0:
+            return frame
+        target = self.distance[frame] + scrolled
+        return int(np.searchsorted(self.distance, target, side='right' if strict else 'left')) - 1
+
+
+def simulate(layer, timeline, pool, rng, left, right):
+    """Result of `layer` with `pool` sprites over `timeline`"""
+    n = timeline.frames
+    lo, hi = layer.interval
+    travel = layer.motion_scale
+    # Screen counts change on these frames: +1 on enter, -1 on leave
+    changes = np.zeros(n + 2, dtype=np.int64)
+    returns = []            # despawn frames of the active sprites (heap)
+    since = 0.0
+    next_time = rng.uniform(0.5, lo)
+    due = starved = peak = 0
+    wait = 0.0
+    while True:
+        frame = timeline.due(since, next_time)
+        if frame < 0 or frame >= n:
+            break
+        while returns and returns[0] < frame:
+            heapq.heappop(returns)
+        due += 1
+        if len(returns) >= pool:
+            starved += 1
+            # Back in the pool for the next frame's check, spawned on its first unpaused frame
+            freed = heapq.heappop(returns)
+            while returns and returns[0] <= freed:
+                heapq.heappop(returns)
+            spawned = timeline.first_unpaused(freed + 1)
+            if spawned >= n:
+                break
+            wait += (spawned - frame) * timeline.dt
+            frame = spawned
+            while returns and returns[0] < frame:
+                heapq.heappop(returns)
+        if travel <= 0:
+            despawn = n
+            enter = leave = frame
+        else:
+            per_px = 1.0 / travel
+            despawn = timeline.beyond(frame, (layer.spawn_x - layer.despawn_x) * per_px)
+            half = layer.half_widths[rng.integers(len(layer.half_widths))]
+            enter = timeline.beyond(frame, (layer.spawn_x - half - right) * per_px)
+            leave = min(timeline.beyond(frame, (layer.spawn_x + half - left) * per_px, strict=False), despawn)
+        if enter < leave:
+            changes[min(enter, n)] += 1
+            changes[min(leave, n)] -= 1
+        heapq.heappush(returns, despawn)
+        peak = max(peak, len(returns))
+        since = timeline.unpaused[frame + 1]
+        next_time = rng.uniform(lo, hi)
+    on_screen = np.cumsum(changes)[:n]
+    return Result(pool, due, starved, wait / starved if starved else 0.0, peak,
+                  float(on_screen.mean()), int(on_screen.max(initial=0)), float((on_screen == 0).mean()))
+
+
+def sweep(layer, timeline, seed, left, right):
+    """Results for pools 1 .. enough; the last has as many sprites as the layer ever wanted"""
+    if layer.pool_size <= DESIGN_LIMIT:
+        return [simulate(layer, timeline, layer.pool_size, np.random.default_rng(seed), left, right)]
+    results = []
+    pool = 1
+    while True:
+        result = simulate(layer, timeline, pool, np.random.default_rng(seed), left, right)
+        results.append(result)
+        if result.starved == 0 and pool >= max(MAX_POOL, layer.pool_size):
+            return results
+        pool += 1
+
+
+def recommend(layer, results, target):
+    """Smallest pool starving at most `target` of its spawns (the script's, at the design limit)"""
+    if layer.pool_size <= DESIGN_LIMIT:
+        return layer.pool_size
+    for result in results:
+        if result.due and result.starved / result.due <= target:
+            return result.pool
+    return results[-1].pool
+
+
+def report(layer, results, target):
+    print(f"\n{layer.name} layer: pool_size {layer.pool_size}, spawn every {layer.interval[0]:g}-{layer.interval[1]:g} s, "
+          f"{layer.spawn_x:g} -> {layer.despawn_x:g} px at motion_scale {layer.motion_scale:g}")
+    limited = layer.pool_size <= DESIGN_LIMIT
+    print(f"  {'pool':>4s} {'spawns':>7s} {'held' if limited else 'starved':>8s} {'wait':>6s} {'peak':>5s} "
+          f"{'on screen':>9s} {'max':>4s} {'empty':>6s}")
+    best = recommend(layer, results, target)
+    for r in results:
+        mark = '*' if r.pool == layer.pool_size else ' '
+        mark += '<' if r.pool == best else ' '
+        rate = r.starved / r.due if r.due else 0.0
+        print(f"{mark}{r.pool:4d} {r.due:7d} {rate:8.1%} {r.wait:5.1f}s {r.peak:5d} "
+              f"{r.mean_on_screen:9.2f} {r.peak_on_screen:4d} {r.empty:6.1%}")
+    demand = results[-1].peak
+    current = next((r for r in results if r.pool == layer.pool_size), None)
+    if limited:
+        verdict = (f"{layer.pool_size} at a time by design; {current.starved / current.due if current.due else 0.0:.1%} "
+                   f"of spawns wait {current.wait:.1f} s for the sprite to leave")
+    elif current is not None and current.due and current.starved / current.due > target:
+        verdict = f"starves {current.starved / current.due:.1%} of spawns"
+    elif layer.pool_size > demand:
+        verdict = f"{layer.pool_size - demand} sprite(s) never used"
+    else:
+        verdict = "fits"
+    if limited:
+        print(f"  pool_size {layer.pool_size} kept: {verdict}")
+    else:
+        print(f"  demand peaks at {demand}; recommended pool_size {best} (current {layer.pool_size}: {verdict})")
+    return best
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--hours': HOURS, '--seed': 0, '--trace': None, '--target': TARGET}
+    i = 0
+    while i < len(args):
+        if args[i] not in options or i + 1 >= len(args):
+            print(__doc__)
+            return 2
+        options[args[i]] = args[i + 1]
+        i += 2
+    seed = int(options['--seed'])
+    target = float(options['--target'])
+    if options['--trace']:
+        trace = read_trace(options['--trace'])
+        source = options['--trace']
+    else:
+        trace = session(float(options['--hours']) * 3600, np.random.default_rng(seed))
+        source = 'synthetic session'
+    timeline = Timeline(trace)
+    seconds = timeline.frames / PHYSICS_FPS
+    print(f"{source}: {seconds / 3600:.2f} h, mean speed {trace.speed.mean():.0f} px/s, "
+          f"paused {trace.paused.mean():.1%}, stopped {(trace.speed == 0).mean():.1%}")
+    left, right = view()
+    print(f"view x {left:g} .. {right:g}   (* = script's pool_size, < = recommended: starves <= {target:.1%})")
+    for layer in layers(Setup()):
+        report(layer, sweep(layer, timeline, seed, left, right), target)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
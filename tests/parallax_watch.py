@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Watch ParallaxScalingEditor.tscn and keep data/parallax_*.json up to date.
+
+After each edit in the scaling editor, extract_regions.py,
+extract_asset_configs.py and extract_updated_assets.py had to be re-run
+by hand, each parsing the same scene again. This watcher waits for saves
+(inotify on Linux, stat polling elsewhere), lets a burst of writes settle
+for DEBOUNCE seconds, parses the scene once and feeds it to all three
+extractors:
+
+    data/parallax_regions.json        extract_regions.extract_regions
+    data/parallax_asset_configs.json  extract_asset_configs.extract_asset_configs
+    data/parallax_scales.json         extract_updated_assets.extract_scales
+
+A save that leaves the scene's bytes unchanged is ignored. The quadratic
+scale -> y fit and the model selection (parallax_fit.py) are redone only
+when the (scale, y) pairs changed; editing a region or the camera reuses
+the previous fit. An output is rewritten only when its JSON text
+differs, so untouched files keep their mtime and stay out of `git
+status`.
+
+Usage (from the project root):
+    python3 tests/parallax_watch.py            # watch until Ctrl+C
+    python3 tests/parallax_watch.py --once     # regenerate once and exit
+    python3 tests/parallax_watch.py --poll     # force stat polling
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+import _scripts_path  # noqa: F401
+from extract_asset_configs import extract_asset_configs
+from extract_regions import extract_regions
+from extract_updated_assets import extract_scales, fit_scale_formula
+from godot_scene import ParseError, parse_scene
+from parallax_fit import select_model
+
+SCENE = 'scenes/ParallaxScalingEditor.tscn'
+DEBOUNCE = 0.3
+POLL_INTERVAL = 0.5
+
+OUTPUTS = {
+    'data/parallax_regions.json': extract_regions,
+    'data/parallax_asset_configs.json': extract_asset_configs,
+    'data/parallax_scales.json': None,  # extract_scales, with the cached fit
+}
+
+# inotify(7) event bits
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+_EVENT = struct.Struct('iIII')
+
+
+def write_if_changed(path, data):
+    """Write `data` as the extractors do (json.dump, indent=2); False if the file already says that"""
+    text = json.dumps(data, indent=2)
+    path = Path(path)
+    try:
+        if path.read_text() == text:
+            return False
+    except OSError:
+        pass
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    tmp.write_text(text)
+    os.replace(tmp, path)
+    return True
+
+
+class Regenerator:
+    """Scene bytes -> the three outputs, remembering the last scene digest and fit"""
+
+    def __init__(self, root='.'):
+        self.root = Path(root)
+        self.digest = None
+        self._fit_key = None
+        self._fit = None
+
+    def _fits(self, pairs):
+        key = tuple(pairs)
+        if key != self._fit_key:
+            self._fit_key, self._fit = key, (fit_scale_formula(pairs), select_model(pairs))
+        return self._fit
+
+    def fit(self, pairs):
+        return self._fits(pairs)[0]
+
+    def select(self, pairs):
+        return self._fits(pairs)[1]
+
+    def run(self, force=False):
+        """Regenerate if the scene changed: list of (output, written), or None when skipped"""
+        data = (self.root / SCENE).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest == self.digest and not force:
+            return None
+        scene = parse_scene(data.decode('utf-8'), SCENE)
+        results = []
+        for output, extract in OUTPUTS.items():
+            content = extract(scene) if extract else extract_scales(scene, fit=self.fit, select=self.select)
+            results.append((output, write_if_changed(self.root / output, content)))
+        self.digest = digest
+        return results
+
+
+# -- change notification -------------------------------------------------------
+
+class InotifyWatcher:
+    """Waits for writes to one file through inotify on its directory (editors save via rename)"""
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.name = os.path.basename(path).encode()
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.path.dirname(os.path.abspath(path)).encode(), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed')
+
+    def _drain(self):
+        """True if any pending event concerns the watched file"""
+        hit = False
+        while True:
+            try:
+                buffer = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return hit
+            offset = 0
+            while offset < len(buffer):
+                _, _, _, length = _EVENT.unpack_from(buffer, offset)
+                offset += _EVENT.size
+                hit |= buffer[offset:offset + length].rstrip(b'\0') == self.name
+                offset += length
+
+    def wait(self):
+        """Block until the file was written and no further writes came for DEBOUNCE seconds"""
+        while True:
+            select.select([self.fd], [], [])
+            if self._drain():
+                break
+        while select.select([self.fd], [], [], DEBOUNCE)[0]:
+            self._drain()
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Stat polling fallback: (size, mtime_ns) changes, settled for DEBOUNCE seconds"""
+
+    def __init__(self, path):
+        self.path = path
+        self.last = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_size, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def wait(self):
+        while self._stat() == self.last:
+            time.sleep(POLL_INTERVAL)
+        while True:
+            current = self._stat()
+            time.sleep(DEBOUNCE)
+            if self._stat() == current:
+                break
+        self.last = self._stat()
+
+    def close(self):
+        pass
+
+
+def make_watcher(path, poll=False):
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(path)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(path)
+
+
+def report(results, seconds):
+    stamp = time.strftime('%H:%M:%S')
+    if results is None:
+        print(f"[{stamp}] {SCENE} saved without changes")
+        return
+    written = [output for output, changed in results if changed]
+    detail = ', '.join(written) if written else 'all outputs already up to date'
+    print(f"[{stamp}] regenerated in {seconds * 1000:.0f} ms: {detail}")
+
+
+def main():
+    args = sys.argv[1:]
+    regenerator = Regenerator()
+
+    start = time.perf_counter()
+    report(regenerator.run(force=True), time.perf_counter() - start)
+    if '--once' in args:
+        return 0
+
+    watcher = make_watcher(SCENE, poll='--poll' in args)
+    print(f"Watching {SCENE} ({type(watcher).__name__}), Ctrl+C to stop")
+    try:
+        while True:
+            watcher.wait()
+            start = time.perf_counter()
+            try:
+                report(regenerator.run(), time.perf_counter() - start)
+            except (OSError, ParseError, UnicodeDecodeError) as e:
+                # Half-written or mid-rename scene: the next save retries
+                print(f"✗ {SCENE}: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
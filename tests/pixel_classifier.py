@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Lookup-table pixel classifier for the lung sprites.
+
+The mask generators used to classify pixels by promoting whole images to
+float64 and building several full-size boolean temporaries per rule.
+Here a rule set is compiled once into a 2^24-entry table indexed by the
+24-bit RGB value; bit i of table[rgb] says whether rule i holds for that
+colour. Classifying a sprite is then a single uint8 gather per pixel:
+
+    classifier = LUNG_RULES.compile()
+    bits = classifier.classify(rgba)
+    is_pink_healthy = classifier.match(bits, 'pink', 'visible')
+    is_lung = classifier.match(bits, 'visible', exclude=('beige',))
+
+Alpha cannot live in an RGB table, so the rule set's alpha threshold is
+applied while gathering and reported as the extra VISIBLE bit (bit 7).
+
+Compiled tables are versioned artifacts: they are cached under
+.build/classifier/ keyed by rule set name and version, and their sha256
+is printed by the CLI so a rule change shows up as a new digest. Bump the
+version whenever a rule's predicate changes.
+
+Usage:
+    python3 tests/pixel_classifier.py           # compile, print digests and class coverage
+    python3 tests/pixel_classifier.py verify    # compare LUT against the float rules on every sprite
+"""
+
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from sprite_cache import load_rgba
+
+CACHE_DIR = '.build/classifier'
+VISIBLE_BIT = 7
+MAX_RULES = VISIBLE_BIT  # bits 0..6 are free for rules
+
+
+class Rule:
+    """A named predicate over broadcastable r, g, b float arrays"""
+
+    def __init__(self, name, predicate):
+        self.name = name
+        self.predicate = predicate
+
+
+class RuleSet:
+    """Ordered rules compiled together into one table (one bit per rule)"""
+
+    def __init__(self, name, version, rules, alpha_threshold=128):
+        if len(rules) > MAX_RULES:
+            raise ValueError(f"{name}: at most {MAX_RULES} rules fit in a uint8 table")
+        self.name = name
+        self.version = version
+        self.rules = list(rules)
+        self.alpha_threshold = alpha_threshold
+        self._compiled = None
+
+    @property
+    def tag(self):
+        return f"{self.name}-v{self.version}"
+
+    def build_table(self):
+        """Evaluate every rule on all 2^24 colours; index = r | g << 8 | b << 16"""
+        table = np.zeros((256, 256, 256), dtype=np.uint8)  # [b, g, r]
+        g, r = np.meshgrid(np.arange(256.0), np.arange(256.0), indexing='ij')
+        for b_value in range(256):
+            b = np.full_like(r, b_value)
+            plane = table[b_value]
+            for bit, rule in enumerate(self.rules):
+                plane |= rule.predicate(r, g, b).astype(np.uint8) << bit
+        return table.reshape(-1)
+
+    def compile(self, cache_dir=CACHE_DIR):
+        """Load the compiled table from the cache, building it on first use"""
+        if self._compiled is not None:
+            return self._compiled
+
+        path = Path(cache_dir) / f'{self.tag}.npy'
+        table = None
+        if path.exists():
+            try:
+                table = np.load(path, mmap_mode='r')
+                if table.shape != (1 << 24,) or table.dtype != np.uint8:
+                    table = None
+            except (OSError, ValueError):
+                table = None
+        if table is None:
+            table = self.build_table()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+            with open(tmp, 'wb') as f:
+                np.save(f, table)
+            os.replace(tmp, path)
+
+        self._compiled = Classifier(self, table)
+        return self._compiled
+
+
+class Classifier:
+    """A compiled RuleSet: classify() gathers, match() tests named bits"""
+
+    def __init__(self, rule_set, table):
+        self.rule_set = rule_set
+        self.table = table
+        self.bits = {rule.name: 1 << i for i, rule in enumerate(rule_set.rules)}
+        self.bits['visible'] = 1 << VISIBLE_BIT
+
+    def digest(self):
+        return hashlib.sha256(np.ascontiguousarray(self.table).tobytes()).hexdigest()
+
+    def classify(self, rgba):
+        """(H, W) uint8 class bits for an (H, W, 4) uint8 RGBA array"""
+        rgba = np.ascontiguousarray(rgba, dtype=np.uint8)
+        # Little-endian RGBA bytes read as uint32 = r | g<<8 | b<<16 | a<<24
+        packed = rgba.view('<u4')[:, :, 0]
+        bits = self.table[packed & 0x00FFFFFF]
+        bits |= (rgba[:, :, 3] > self.rule_set.alpha_threshold).view(np.uint8) << VISIBLE_BIT
+        return bits
+
+    def mask(self, *names):
+        value = 0
+        for name in names:
+            value |= self.bits[name]
+        return value
+
+    def match(self, bits, *names, exclude=()):
+        """Pixels where every named bit is set and none of the `exclude` bits are"""
+        wanted = self.mask(*names)
+        return (bits & (wanted | self.mask(*exclude))) == wanted
+
+    def coverage(self):
+        """Fraction of the RGB cube each rule accepts"""
+        counts = np.bincount(np.asarray(self.table), minlength=256)
+        values = np.arange(256)
+        return {
+            name: counts[(values & bit) != 0].sum() / (1 << 24)
+            for name, bit in self.bits.items() if name != 'visible'
+        }
+
+
+# ---------------------------------------------------------------------------
+# Lung sprite rules (from create_holes_by_color.py, create_holes_pink_detection.py
+# and create_masked_breathing_by_color.py)
+# ---------------------------------------------------------------------------
+
+# Background/gone areas: beige colour sampled with sample_colors.py
+BEIGE_RGB = (247, 232, 210)
+BEIGE_TOLERANCE = 20
+
+
+def is_healthy_bright(r, g, b):
+    """Bright (mean > 150) with a reddish tint (R dominates G and B by 0.8x)"""
+    brightness = (r + g + b) / 3.0
+    return (brightness > 150) & (r > g * 0.8) & (r > b * 0.8)
+
+
+def is_pink(r, g, b):
+    """Strongly reddish, or inside the pink RGB box"""
+    is_reddish = (r > 180) & (r > g + 30) & (r > b + 30)
+    is_pink_range = (r > 180) & (r < 255) & (g > 120) & (g < 200) & (b > 120) & (b < 200)
+    return is_reddish | is_pink_range
+
+
+def is_beige(r, g, b):
+    """Within ± tolerance of the beige background on every channel"""
+    beige_r, beige_g, beige_b = BEIGE_RGB
+    return (
+        (np.abs(r - beige_r) < BEIGE_TOLERANCE) &
+        (np.abs(g - beige_g) < BEIGE_TOLERANCE) &
+        (np.abs(b - beige_b) < BEIGE_TOLERANCE)
+    )
+
+
+LUNG_RULES = RuleSet('lung_colors', version=1, alpha_threshold=128, rules=[
+    Rule('healthy_bright', is_healthy_bright),
+    Rule('pink', is_pink),
+    Rule('beige', is_beige),
+])
+
+
+def verify(classifier, paths):
+    """Compare the LUT with direct float evaluation on real sprites; returns mismatches"""
+    mismatches = 0
+    for path in paths:
+        rgba = load_rgba(path)
+        r, g, b = (rgba[:, :, i].astype(float) for i in range(3))
+        visible = rgba[:, :, 3] > classifier.rule_set.alpha_threshold
+        bits = classifier.classify(rgba)
+        for rule in classifier.rule_set.rules:
+            expected = rule.predicate(r, g, b) & visible
+            got = classifier.match(bits, rule.name, 'visible')
+            bad = int(np.sum(expected != got))
+            mismatches += bad
+            if bad:
+                print(f"  [MISMATCH] {path}: {rule.name} differs on {bad} pixels")
+    return mismatches
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'info'
+
+    start = time.perf_counter()
+    classifier = LUNG_RULES.compile()
+    print(f"[classifier] {LUNG_RULES.tag} ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(f"  table sha256: {classifier.digest()}")
+    for name, fraction in classifier.coverage().items():
+        print(f"  {name:16s} {fraction * 100:6.2f}% of RGB cube")
+
+    if command == 'verify':
+        paths = sorted(str(p) for p in Path('assets/ui/health').glob('**/*.webp'))
+        mismatches = verify(classifier, paths)
+        print(f"[classifier] verified {len(paths)} sprites: {mismatches} mismatching pixels")
+        return 0 if mismatches == 0 else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
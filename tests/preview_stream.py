@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Stream preview frames straight into ffmpeg.
+
+The preview scripts used to save every frame as a PNG under /tmp, run
+ffmpeg over the PNG sequence and `rm -rf` the folder afterwards: one PNG
+encode and one PNG decode per frame plus the disk traffic. FFmpegWriter
+instead pipes raw frames over ffmpeg's stdin (-f rawvideo), so nothing
+touches the disk except the finished video.
+
+A writer thread feeds ffmpeg from a bounded queue: rendering the next
+frames overlaps with encoding, and when the encoder falls behind write()
+blocks instead of buffering the whole clip in memory.
+
+Static stretches of a clip need not be rendered again: repeat() queues
+the previous frame's bytes once more. With drop_duplicates=True ffmpeg
+drops exact repeats before the encoder (mpdecimate) and writes variable
+frame rate output (-fps_mode vfr), so a held frame is encoded once and
+simply carries a longer duration.
+
+Usage:
+    from preview_stream import FFmpegWriter, FFmpegError
+
+    try:
+        with FFmpegWriter("preview.webm", fps=30) as video:
+            for frame in frames:          # PIL images or HxWx3/4 uint8 arrays
+                video.write(frame)        # or video.repeat() for a held frame
+        print(f"✓ Video created: {video.output} ({video.size_kb():.1f} KB)")
+    except FFmpegError as e:
+        print(f"✗ Error creating video:\n{e}")
+"""
+
+import collections
+import os
+import queue
+import shutil
+import subprocess
+import threading
+
+import numpy as np
+
+FFMPEG = os.environ.get('FFMPEG', 'ffmpeg')
+DEFAULT_QUEUE_FRAMES = 8
+# Drop only exact repeats: no 8x8 block may differ at all
+DROP_DUPLICATES_FILTER = 'mpdecimate=hi=0:lo=0:frac=0'
+
+_STOP = object()
+
+
+class FFmpegError(RuntimeError):
+    """ffmpeg is missing, exited early, or returned non-zero"""
+
+
+def ffmpeg_available():
+    return shutil.which(FFMPEG) is not None
+
+
+def _frame_bytes(frame):
+    """(width, height, pix_fmt, bytes) for a PIL image or uint8 array"""
+    if isinstance(frame, np.ndarray):
+        if frame.dtype != np.uint8 or frame.ndim != 3 or frame.shape[2] not in (3, 4):
+            raise ValueError(f"expected HxWx3 or HxWx4 uint8 frame, got {frame.dtype} {frame.shape}")
+        pix_fmt = 'rgba' if frame.shape[2] == 4 else 'rgb24'
+        return frame.shape[1], frame.shape[0], pix_fmt, frame.tobytes()
+
+    if frame.mode not in ('RGB', 'RGBA'):
+        frame = frame.convert('RGBA')
+    pix_fmt = 'rgba' if frame.mode == 'RGBA' else 'rgb24'
+    return frame.width, frame.height, pix_fmt, frame.tobytes()
+
+
+class FFmpegWriter:
+    """
+    Encode frames written one by one into `output`.
+
+    The frame size and input pixel format (rgb24 or rgba) come from the
+    first frame; every later frame must match it. `codec`, `pix_fmt` and
+    `bitrate` are the output settings the preview scripts used before.
+    `drop_duplicates` turns repeated frames into longer frame durations
+    (variable frame rate output).
+    """
+
+    def __init__(self, output, fps, codec='libvpx-vp9', pix_fmt='yuv420p',
+                 bitrate='2M', extra_args=(), queue_frames=DEFAULT_QUEUE_FRAMES,
+                 drop_duplicates=False):
+        self.output = output
+        self.fps = fps
+        self.codec = codec
+        self.pix_fmt = pix_fmt
+        self.bitrate = bitrate
+        self.extra_args = list(extra_args)
+        self.drop_duplicates = drop_duplicates
+        self.frames_written = 0
+        self.frames_repeated = 0
+
+        self._queue = queue.Queue(maxsize=max(1, queue_frames))
+        self._proc = None
+        self._feeder = None
+        self._drainer = None
+        self._stderr_tail = collections.deque(maxlen=40)
+        self._feed_error = None
+        self._shape = None
+        self._last = None
+
+    # -- process management ---------------------------------------------
+
+    def command(self, width, height, input_pix_fmt):
+        vfr = ['-vf', DROP_DUPLICATES_FILTER, '-fps_mode', 'vfr'] if self.drop_duplicates else []
+        return [
+            FFMPEG, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-pix_fmt', input_pix_fmt,
+            '-s', f'{width}x{height}',
+            '-framerate', str(self.fps),
+            '-i', 'pipe:0',
+            *vfr,
+            *self.extra_args,
+            '-c:v', self.codec,
+            '-pix_fmt', self.pix_fmt,
+            '-b:v', self.bitrate,
+            self.output,
+        ]
+
+    def _start(self, width, height, input_pix_fmt):
+        if not ffmpeg_available():
+            raise FFmpegError(f"'{FFMPEG}' not found on PATH (set FFMPEG=/path/to/ffmpeg)")
+        self._proc = subprocess.Popen(
+            self.command(width, height, input_pix_fmt),
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        self._feeder = threading.Thread(target=self._feed, name='ffmpeg-feed', daemon=True)
+        self._drainer = threading.Thread(target=self._drain, name='ffmpeg-stderr', daemon=True)
+        self._feeder.start()
+        self._drainer.start()
+
+    def _feed(self):
+        """Writer thread: move queued frames into ffmpeg's stdin"""
+        stdin = self._proc.stdin
+        while True:
+            data = self._queue.get()
+            if data is _STOP:
+                break
+            if self._feed_error is not None:
+                continue  # keep draining so write() never blocks forever
+            try:
+                stdin.write(data)
+            except (BrokenPipeError, OSError) as e:
+                self._feed_error = e
+        try:
+            stdin.close()
+        except OSError:
+            pass
+
+    def _drain(self):
+        for line in self._proc.stderr:
+            self._stderr_tail.append(line.decode(errors='replace').rstrip())
+
+    def _error(self, message):
+        details = "\n".join(self._stderr_tail)
+        return FFmpegError(f"{message}\n{details}" if details else message)
+
+    # -- public API --------------------------------------------------------
+
+    def write(self, frame):
+        """Queue one frame; blocks while `queue_frames` frames are already waiting"""
+        width, height, input_pix_fmt, data = _frame_bytes(frame)
+        if self._proc is None:
+            self._shape = (width, height, input_pix_fmt)
+            self._start(width, height, input_pix_fmt)
+        elif (width, height, input_pix_fmt) != self._shape:
+            raise ValueError(f"frame {self.frames_written} is {width}x{height} {input_pix_fmt}, "
+                             f"stream is {self._shape[0]}x{self._shape[1]} {self._shape[2]}")
+        self._put(data)
+        self._last = data
+
+    def repeat(self):
+        """Queue the previous frame again, without converting it"""
+        if self._last is None:
+            raise ValueError("no frame to repeat")
+        self._put(self._last)
+        self.frames_repeated += 1
+
+    def _put(self, data):
+        if self._feed_error is not None or self._proc.poll() is not None:
+            self.abort()
+            raise self._error(f"ffmpeg stopped accepting frames after {self.frames_written}")
+        self._queue.put(data)
+        self.frames_written += 1
+
+    def close(self):
+        """Flush queued frames and wait for ffmpeg; raises FFmpegError on failure"""
+        if self._proc is None:
+            raise FFmpegError("no frames were written")
+        self._queue.put(_STOP)
+        self._feeder.join()
+        returncode = self._proc.wait()
+        self._drainer.join()
+        if returncode != 0:
+            raise self._error(f"ffmpeg exited with code {returncode}")
+        if self._feed_error is not None:
+            raise self._error(f"writing frames failed: {self._feed_error}")
+
+    def abort(self):
+        """Stop ffmpeg without waiting for queued frames"""
+        if self._proc is None or self._proc.poll() is not None:
+            return
+        self._proc.kill()
+        self._proc.wait()
+        if self._feeder is not None:
+            self._queue.put(_STOP)
+
+    def size_kb(self):
+        return os.path.getsize(self.output) / 1024
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
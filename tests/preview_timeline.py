@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Declarative timelines for HUD animation previews, rendered in parallel.
+
+A preview used to be a monolithic frame loop with its phase math
+(DISCHARGE/CHARGE, LEVEL_DURATION, blink and fade curves) written inline.
+A timeline spec describes the same clip as plain data (dicts, lists,
+numbers, strings - a spec can live in a .json file), and render_video()
+turns it into a video.
+
+Spec:
+    {
+      "fps": 30, "duration": 60, "size": [W, H],
+      "background": [60, 60, 60, 255],
+      "max_hold": 0.5,                    # seconds, see "Held frames"
+      "layers": [                         # bottom to top
+        {"image": "assets/...webp",
+         "position": "center" | [x, y],   # default "center"
+         "start": 0, "end": 10,           # visible for start <= t < end
+         "alpha": <curve>},               # default 1
+        ...
+      ],
+      "tracks": {"name": <curve>, ...},   # named values for the overlays
+      "overlays": [
+        {"type": "text", "position": [x, y], "spacing": 20,
+         "color": [255, 255, 255], "lines": ["Time: {t:.1f}s", ...]},
+        {"type": "progress", "box": [x, y, w, h], "color": [r, g, b] | "track",
+         "background": [40, 40, 40], "markers": [0.5, ...],
+         "marker_color": [255, 255, 255], "marker_width": 2},
+      ]
+    }
+
+Curves (evaluated on the layer's local time t - start unless
+"clock": "global"; tracks always use global time):
+    0.6                                   constant
+    {"keys": [[t, v], ...]}               piecewise linear, held at the ends
+                                          ("repeat": period wraps the time)
+    {"sine": period, "low": 0, "high": 1, "until": t}
+                                          sine wave between low and high,
+                                          starting mid-way and rising; held
+                                          at "high" after "until"
+    {"steps": [[t, value], ...]}          value of the last step with t_i <= t
+                                          (any JSON value: labels, colours)
+    {"product": [<curve>, <curve>, ...]}  product of numeric curves
+
+Text lines are str.format() templates over the tracks plus t, frame,
+total_frames and duration. String track values are templates too, over
+the same values, so a "steps" label can carry a number that changes
+every frame ("Transition: {transition:.2f}s").
+
+Rendering: the frame range is cut into chunks that a process pool renders
+while the parent writes finished chunks to ffmpeg strictly in order, with
+a bounded number of chunks in flight. Inside a worker each frame only
+composites what changed: a stack whose visible layers are all opaque or
+hidden is rendered once and reused, and a stack with a single
+partially-transparent layer goes through composite_kernel.AlphaKernel.
+
+Held frames: a static stack's pixels are hashed once, when it is first
+composited. When a frame has the same content as the one before it, the
+renderer neither draws the overlays nor ships pixels; the frame is written
+as a repeat, and ffmpeg turns repeats into longer frame durations
+(variable frame rate, see preview_stream.py). Overlays are left out of the
+comparison, so they freeze during a hold; "max_hold" caps a hold so they
+still refresh every max_hold seconds (0 disables deduplication).
+
+Usage:
+    from preview_timeline import render_video
+
+    if __name__ == "__main__":        # workers re-import the script
+        render_video(spec, "preview.webm", bitrate='2M')
+
+    python3 tests/preview_timeline.py spec.json output.webm
+"""
+
+import collections
+import hashlib
+import itertools
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw
+import numpy as np
+
+from composite_kernel import AlphaKernel, modulate_alpha
+from preview_stream import FFmpegError, FFmpegWriter
+from sprite_cache import load_rgba
+from sprite_pool import default_workers
+
+DEFAULT_BACKGROUND = (60, 60, 60, 255)
+DEFAULT_MAX_HOLD = 0.5
+# Precomputed stacks kept per worker (static frames and alpha kernels)
+STACK_CACHE_SIZE = 32
+
+
+# -- curves -------------------------------------------------------------------
+
+def _keys(keys, t):
+    if t <= keys[0][0]:
+        return keys[0][1]
+    for (t0, v0), (t1, v1) in zip(keys, keys[1:]):
+        if t < t1:
+            return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+    return keys[-1][1]
+
+
+def evaluate(curve, t):
+    """Value of `curve` at time t (see the module docstring for the forms)"""
+    if not isinstance(curve, dict):
+        return curve
+    if 'keys' in curve:
+        if 'repeat' in curve:
+            t = t % curve['repeat']
+        return _keys(curve['keys'], t)
+    if 'sine' in curve:
+        low, high = curve.get('low', 0.0), curve.get('high', 1.0)
+        if 'until' in curve and t > curve['until']:
+            return high
+        wave = (math.sin(t * 2 * math.pi / curve['sine']) + 1.0) / 2.0
+        return low + wave * (high - low)
+    if 'steps' in curve:
+        value = curve['steps'][0][1]
+        for start, step in curve['steps']:
+            if t < start:
+                break
+            value = step
+        return value
+    if 'product' in curve:
+        value = 1.0
+        for factor in curve['product']:
+            value *= evaluate(factor, t)
+        return value
+    raise ValueError(f"unknown curve: {curve!r}")
+
+
+def layer_alpha(layer, t):
+    """Alpha of a layer at global time t, or None when it is not visible"""
+    start = layer.get('start', 0.0)
+    if t < start or t >= layer.get('end', math.inf):
+        return None
+    alpha = layer.get('alpha', 1.0)
+    local = t if isinstance(alpha, dict) and alpha.get('clock') == 'global' else t - start
+    return min(1.0, max(0.0, float(evaluate(alpha, local))))
+
+
+def frame_count(spec):
+    return int(round(spec['fps'] * spec['duration']))
+
+
+def hold_frames(spec):
+    """Longest run of repeated frames before the overlays are redrawn"""
+    return int(spec.get('max_hold', DEFAULT_MAX_HOLD) * spec['fps'])
+
+
+def frame_values(spec, frame):
+    """Template variables of one frame: tracks plus t/frame/total_frames/duration"""
+    t = frame / spec['fps']
+    values = {'t': t, 'frame': frame, 'total_frames': frame_count(spec),
+              'duration': spec['duration']}
+    for name, curve in spec.get('tracks', {}).items():
+        values[name] = evaluate(curve, t)
+    for name, value in values.items():
+        if isinstance(value, str):
+            values[name] = value.format(**values)
+    return values
+
+
+# -- compositing --------------------------------------------------------------
+
+class Compositor:
+    """Renders the layer stack of a spec, reusing precomputed stacks"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.size = tuple(spec['size'])
+        self.background = tuple(spec.get('background', DEFAULT_BACKGROUND))
+        self.sprites = {}
+        self.cache = collections.OrderedDict()
+
+    def sprite(self, path):
+        if path not in self.sprites:
+            self.sprites[path] = Image.fromarray(load_rgba(path))
+        return self.sprites[path]
+
+    def position(self, layer, sprite):
+        position = layer.get('position', 'center')
+        if position == 'center':
+            return ((self.size[0] - sprite.width) // 2, (self.size[1] - sprite.height) // 2)
+        return tuple(position)
+
+    def composite(self, stack):
+        """Reference path: [(layer index, alpha), ...] over the background, (H, W, 3) uint8"""
+        canvas = Image.new('RGBA', self.size, self.background)
+        for index, alpha in stack:
+            layer = self.spec['layers'][index]
+            sprite = self.sprite(layer['image'])
+            if alpha < 1.0:
+                sprite = modulate_alpha(sprite, alpha)
+            canvas.alpha_composite(sprite, dest=self.position(layer, sprite))
+        return np.array(canvas.convert('RGB'))
+
+    def alpha_plane(self, index):
+        """(H, W) uint8 alpha of one layer's sprite where it lands on the canvas"""
+        layer = self.spec['layers'][index]
+        sprite = self.sprite(layer['image'])
+        plane = Image.new('L', self.size, 0)
+        plane.paste(sprite.getchannel('A'), self.position(layer, sprite))
+        return np.array(plane)
+
+    def _cached(self, key, build):
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        value = self.cache[key] = build()
+        if len(self.cache) > STACK_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return value
+
+    def static(self, stack):
+        pixels = self.composite(stack)
+        return pixels, hashlib.blake2b(pixels.tobytes(), digest_size=16).digest()
+
+    def render(self, t):
+        """(pixels, digest) of the layers at time t; digest is None unless the stack is static"""
+        stack = []
+        for index, layer in enumerate(self.spec['layers']):
+            alpha = layer_alpha(layer, t)
+            if alpha:
+                stack.append((index, alpha))
+
+        partial = [i for i, (_, alpha) in enumerate(stack) if alpha < 1.0]
+        if not partial:
+            return self._cached(tuple(stack), lambda: self.static(stack))
+        if len(partial) == 1:
+            slot = partial[0]
+            key = tuple(index if i != slot else (index, 'alpha') for i, (index, _) in enumerate(stack))
+
+            def render_alpha(a):
+                return self.composite(stack[:slot] + [(stack[slot][0], a)] + stack[slot + 1:])
+
+            kernel = self._cached(key, lambda: AlphaKernel(render_alpha, self.alpha_plane(stack[slot][0])))
+            return kernel.frame(stack[slot][1]), None
+        return self.composite(stack), None
+
+
+def draw_overlays(image, spec, values):
+    draw = ImageDraw.Draw(image)
+    for overlay in spec.get('overlays', []):
+        kind = overlay['type']
+        if kind == 'text':
+            x, y = overlay['position']
+            color = tuple(overlay.get('color', (255, 255, 255)))
+            for line in overlay['lines']:
+                draw.text((x, y), line.format(**values), fill=color)
+                y += overlay.get('spacing', 20)
+        elif kind == 'progress':
+            x, y, width, height = overlay['box']
+            draw.rectangle([x, y, x + width, y + height], fill=tuple(overlay.get('background', (40, 40, 40))))
+            color = overlay.get('color', (255, 255, 255))
+            color = values[color] if isinstance(color, str) else color
+            filled = int(width * values['t'] / spec['duration'])
+            draw.rectangle([x, y, x + filled, y + height], fill=tuple(color))
+            for marker in overlay.get('markers', ()):
+                marker_x = x + int(marker * width)
+                draw.line([marker_x, y, marker_x, y + height],
+                          fill=tuple(overlay.get('marker_color', (255, 255, 255))),
+                          width=overlay.get('marker_width', 2))
+        else:
+            raise ValueError(f"unknown overlay type: {kind!r}")
+
+
+# -- rendering ----------------------------------------------------------------
+
+_compositor = None
+
+
+def _compositor_for(spec):
+    """One Compositor per worker process, so its caches survive across chunks"""
+    global _compositor
+    if _compositor is None or (_compositor.spec is not spec and _compositor.spec != spec):
+        _compositor = Compositor(spec)
+    return _compositor
+
+
+def render_chunk(spec, start, stop):
+    """
+    Frames [start, stop) of a spec, in order. A frame is None when it
+    repeats the previous one (never the first frame of a chunk).
+    """
+    compositor = _compositor_for(spec)
+    max_hold = hold_frames(spec)
+    frames = []
+    previous, held = None, 0
+    for frame in range(start, stop):
+        values = frame_values(spec, frame)
+        pixels, digest = compositor.render(values['t'])
+        if digest is not None and digest == previous and held < max_hold:
+            frames.append(None)
+            held += 1
+            continue
+        previous, held = digest, 0
+        image = Image.fromarray(pixels)
+        draw_overlays(image, spec, values)
+        frames.append(np.asarray(image))
+    return frames
+
+
+def chunks(total, chunk_frames):
+    return [(start, min(start + chunk_frames, total)) for start in range(0, total, chunk_frames)]
+
+
+def render_frames(spec, workers=None, chunk_frames=None):
+    """
+    Yield every frame of `spec` in order, rendered across a process pool;
+    None stands for a repeat of the previous frame.
+
+    At most 2 chunks per worker are in flight, so memory stays bounded no
+    matter how long the clip is. SPRITE_JOBS=1 renders inline.
+    """
+    ranges = chunks(frame_count(spec), chunk_frames or spec['fps'])
+    workers = min(workers or default_workers(), len(ranges)) if ranges else 1
+
+    if workers <= 1:
+        for start, stop in ranges:
+            yield from render_chunk(spec, start, stop)
+        return
+
+    ranges = iter(ranges)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque(pool.submit(render_chunk, spec, start, stop)
+                                    for start, stop in itertools.islice(ranges, 2 * workers))
+        while pending:
+            for start, stop in itertools.islice(ranges, 1):
+                pending.append(pool.submit(render_chunk, spec, start, stop))
+            yield from pending.popleft().result()
+
+
+def render_video(spec, output, workers=None, progress=None, **writer_args):
+    """
+    Render `spec` into `output` through FFmpegWriter (extra keyword
+    arguments go to the writer). `progress(frame, values)` is called for
+    every frame in order. Raises FFmpegError when encoding fails.
+    """
+    writer_args.setdefault('drop_duplicates', hold_frames(spec) > 0)
+    with FFmpegWriter(output, fps=spec['fps'], **writer_args) as video:
+        for frame, pixels in enumerate(render_frames(spec, workers)):
+            if progress is not None:
+                progress(frame, frame_values(spec, frame))
+            if pixels is None:
+                video.repeat()
+            else:
+                video.write(pixels)
+    return video
+
+
+def load_spec(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("usage: preview_timeline.py SPEC.json OUTPUT.webm")
+        return 2
+    spec = load_spec(sys.argv[1])
+    start = time.perf_counter()
+    try:
+        video = render_video(spec, sys.argv[2])
+    except FFmpegError as e:
+        print(f"✗ Error creating video:\n{e}")
+        return 1
+    print(f"✓ {video.frames_written} frames ({video.frames_repeated} held) -> "
+          f"{video.output} ({video.size_kb():.1f} KB) "
+          f"in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Resource dependency graph and dead-asset report.
+
+Nothing showed what the game actually pulls in, so the repo kept
+shipping assets/backups/, legacy sprites next to their replacements,
+screenshots and analysis images. export_presets.cfg exports
+"all_resources": every imported file and every scene and script goes
+into the pack whether or not anything uses it.
+
+The graph starts at project.godot's roots: run/main_scene, the autoloads
+and config/icon. It follows these edges:
+    .tscn / .tres   ext_resource paths (uid:// resolved through *.uid,
+                    *.import and scene headers)
+    .gd             preload()/load() and every other "res://..." literal;
+                    a literal ending in '/' reaches the whole directory, and
+                    %d / %s / {...} placeholders match like globs
+    .gd             extends "res://..." and class_name references
+Anything a script builds from scratch at runtime (a path without a
+res:// literal, DirAccess listings) is invisible to it: check `why` before
+deleting.
+
+Resources are the files Godot exports: anything with a .import sidecar
+plus scenes, resources, scripts, shaders and JSON. Sizes include the
+sidecar files (.import / .uid).
+
+Usage (from the project root):
+    python3 tests/resource_graph.py              # unreachable resources by directory
+    python3 tests/resource_graph.py --all        # ...listing every file
+    python3 tests/resource_graph.py why PATH     # root -> PATH chain that keeps it alive
+    python3 tests/resource_graph.py deps PATH    # direct dependencies of PATH
+"""
+
+import fnmatch
+import os
+import re
+import sys
+from collections import deque
+from pathlib import Path
+
+import _scripts_path  # noqa: F401
+from godot_scene import iter_sections
+from project_index import SKIP_DIRS, ProjectIndex
+
+RESOURCE_EXTS = {'.tscn', '.tres', '.scn', '.res', '.gd', '.gdshader', '.gdshaderinc', '.json'}
+SIDECARS = ('.import', '.uid')
+_UID = re.compile(r'uid="?(uid://\w+)')
+_PLACEHOLDER = re.compile(r'%[-+\d.]*[a-z]|\{[^}]*\}')
+
+
+def res_path(path):
+    """res:// path -> path relative to the project root ('' for res://)"""
+    return path[len('res://'):] if path.startswith('res://') else path
+
+
+class ResourceGraph:
+    """Files, their dependency edges and the roots of the project at `root`"""
+
+    def __init__(self, index):
+        self.index = index
+        self.root = Path(index.root)
+        self.files = self._resources()
+        self.uids = self._uids()
+        self.edges = {path: set() for path in self.files}
+        self.roots = self._roots()
+        self._scene_edges()
+        self._script_edges()
+
+    # -- nodes ------------------------------------------------------------
+
+    def _walk(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith('.'))
+            rel_dir = os.path.relpath(dirpath, self.root)
+            for filename in sorted(filenames):
+                rel = filename if rel_dir == '.' else os.path.join(rel_dir, filename)
+                yield rel.replace(os.sep, '/')
+
+    def _resources(self):
+        """Exported file -> size in bytes (sidecars included)"""
+        names = set(self._walk())
+        files = {}
+        for rel in names:
+            if rel.endswith(SIDECARS):
+                continue
+            if rel + '.import' in names or os.path.splitext(rel)[1] in RESOURCE_EXTS:
+                files[rel] = sum(os.path.getsize(self.root / p)
+                                 for p in (rel, rel + '.import', rel + '.uid') if p in names)
+        return files
+
+    def _uids(self):
+        """uid:// -> file, from *.uid, *.import and scene/resource headers"""
+        uids = {}
+        for rel in self.files:
+            for sidecar in ('.uid', '.import'):
+                path = self.root / (rel + sidecar)
+                if path.exists():
+                    match = _UID.search(path.read_text(errors='ignore'))
+                    if match:
+                        uids[match.group(1)] = rel
+        for rel in self.index.files('tscn') + self.index.files('tres'):
+            try:
+                header = self.index.scene(rel).header
+            except Exception:
+                continue
+            if header is not None and header.attrs.get('uid'):
+                uids[header.attrs['uid']] = rel
+        return uids
+
+    def resolve(self, reference):
+        """Files a res:// or uid:// reference reaches (several for directories and patterns)"""
+        if reference.startswith('uid://'):
+            return {self.uids[reference]} if reference in self.uids else set()
+        path = res_path(reference)
+        if path in self.files:
+            return {path}
+        if path.endswith('/') or path == '':
+            return {f for f in self.files if f.startswith(path)}
+        pattern = _PLACEHOLDER.sub('*', path)
+        if pattern != path:
+            return set(fnmatch.filter(self.files, pattern))
+        return set()
+
+    # -- edges ------------------------------------------------------------
+
+    def _roots(self):
+        roots = set()
+        project = self.root / 'project.godot'
+        if not project.exists():
+            return roots
+        for section in iter_sections(project.read_text(errors='ignore'), 'project.godot'):
+            values = []
+            if section.tag == 'application':
+                values = [section.properties.get('run/main_scene'), section.properties.get('config/icon')]
+            elif section.tag == 'autoload':
+                values = [value.lstrip('*') for value in section.properties.values()]
+            for value in values:
+                if isinstance(value, str):
+                    roots |= self.resolve(value)
+        return roots
+
+    def _scene_edges(self):
+        for rel, _, _, path in self.index.ext_resources():
+            if rel in self.edges and path:
+                self.edges[rel] |= self.resolve(path)
+
+    def _script_edges(self):
+        class_names = {name: rel for rel, _, name, _ in self.index.symbols(kind='class_name')}
+        for rel, kind, name, _ in self.index.query(
+                "SELECT file, kind, name, line FROM symbols "
+                "WHERE kind IN ('preload', 'load', 'resource', 'extends', 'ref')"):
+            if rel not in self.edges:
+                continue
+            if kind in ('ref', 'extends') and name in class_names:
+                self.edges[rel].add(class_names[name])
+            elif name.startswith(('res://', 'uid://')):
+                self.edges[rel] |= self.resolve(name)
+
+    # -- queries ----------------------------------------------------------
+
+    def reachable(self):
+        """file -> the file it was first reached from (None for roots)"""
+        parent = {root: None for root in self.roots}
+        queue = deque(sorted(self.roots))
+        while queue:
+            current = queue.popleft()
+            for dep in sorted(self.edges.get(current, ())):
+                if dep not in parent:
+                    parent[dep] = current
+                    queue.append(dep)
+        return parent
+
+    def unreachable(self):
+        """(file, size) of every resource no root reaches, largest first"""
+        alive = self.reachable()
+        return sorted(((f, size) for f, size in self.files.items() if f not in alive),
+                      key=lambda item: (-item[1], item[0]))
+
+    def why(self, rel):
+        """Chain of files from a root down to `rel`, or None if unreachable"""
+        parent = self.reachable()
+        if rel not in parent:
+            return None
+        chain = [rel]
+        while parent[chain[-1]] is not None:
+            chain.append(parent[chain[-1]])
+        return chain[::-1]
+
+
+def group_of(rel, depth=2):
+    parts = rel.split('/')
+    return '/'.join(parts[:min(depth, len(parts) - 1)]) or '.'
+
+
+def format_size(size):
+    return f"{size / 1024:8.1f} KB" if size < 1024 * 1024 else f"{size / 1024 / 1024:8.2f} MB"
+
+
+def report(graph, list_all=False):
+    alive = graph.reachable()
+    dead = graph.unreachable()
+    total = sum(graph.files.values())
+    dead_total = sum(size for _, size in dead)
+    print(f"Roots: {', '.join(sorted(graph.roots))}")
+    print(f"{len(graph.files)} resources ({format_size(total).strip()}): "
+          f"{len(alive)} reachable, {len(dead)} unreachable ({format_size(dead_total).strip()})")
+
+    groups = {}
+    for rel, size in dead:
+        count, group_size = groups.get(group_of(rel), (0, 0))
+        groups[group_of(rel)] = (count + 1, group_size + size)
+    print("\nUnreachable by directory:")
+    for group, (count, size) in sorted(groups.items(), key=lambda item: -item[1][1]):
+        print(f"  {format_size(size)}  {count:4d} files  {group}/")
+
+    shown = dead if list_all else dead[:25]
+    print(f"\n{'All' if list_all else 'Largest'} unreachable files:")
+    for rel, size in shown:
+        print(f"  {format_size(size)}  {rel}")
+    if len(shown) < len(dead):
+        print(f"  ... {len(dead) - len(shown)} more (--all)")
+
+
+def main():
+    args = sys.argv[1:]
+    with ProjectIndex() as index:
+        graph = ResourceGraph(index)
+        if args[:1] == ['why'] and len(args) == 2:
+            rel = res_path(args[1])
+            chain = graph.why(rel)
+            if chain is None:
+                print(f"{rel} is unreachable" if rel in graph.files else f"{rel} is not a resource")
+                return 1
+            for depth, step in enumerate(chain):
+                print(f"{'  ' * depth}{step}")
+            return 0
+        if args[:1] == ['deps'] and len(args) == 2:
+            for dep in sorted(graph.edges.get(res_path(args[1]), ())):
+                print(f"  {dep}")
+            return 0
+        if args and args != ['--all']:
+            print(__doc__)
+            return 2
+        report(graph, list_all='--all' in args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
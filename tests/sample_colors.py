@@ -1,13 +1,11 @@
 #!/usr/bin/env python3
 """Sample RGB values from different areas in damage sprite"""
 
-from PIL import Image
-import numpy as np
+from sprite_cache import load_rgba
 
 print("=== Sampling colors from damage_3 ===\n")
 
-damage = Image.open('assets/ui/health/damage/health_damage_3.webp').convert('RGBA')
-arr = np.array(damage)
+arr = load_rgba('assets/ui/health/damage/health_damage_3.webp')
 
 height, width = arr.shape[:2]
 
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+NumPy emulation of the project's canvas_item shaders.
+
+health_breathing, battery_crossfade, mask_timer_urgency and smog_shader
+could only be checked inside Godot, and the Python previews re-derived
+their math by hand (with drift: a breathing period of 2s where the shader
+uses 3s). Here each shader's fragment() is transcribed line by line and
+evaluated over a whole texture at once, in float32 like the GPU, for a
+given TIME and uniform set.
+
+Uniform defaults are read from the .gdshader source itself, so a changed
+default in the shader is picked up by every preview. Samplers without a
+value behave like hint_default_white.
+
+Textures are float32 (H, W, 4) arrays in [0, 1] (see load_texture). The
+output size is the size of TEXTURE, of the first sampler uniform, or the
+`size` argument (smog_shader samples nothing). Other samplers are read
+with nearest filtering at the fragment's UV.
+
+Faithfulness: the arithmetic follows the shader statement by statement in
+float32, so colours match the GPU to within one 8-bit code value. The one
+exception is smog_shader's hash(): fract(sin(x) * 43758.5453) of large x
+depends on the GPU's sin() precision, so its noise matches only in
+character, not per pixel.
+
+Usage:
+    from shader_emulation import run_shader, load_texture, to_rgba8, shader_defaults
+
+    color = run_shader('health_breathing', time=1.2,
+                       damage_texture=load_texture('assets/ui/health/damage/health_damage_3.webp'),
+                       breathing_texture=load_texture('assets/ui/health/breathing_masked/health_breathing_3_masked.webp'))
+    frame = to_rgba8(color)                                 # (H, W, 4) uint8
+    period = shader_defaults('health_breathing')['breathing_period']
+
+    python3 tests/shader_emulation.py bench [width height]  # ns per pixel per shader
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from sprite_cache import load_rgba
+
+SHADER_DIR = Path('assets/shaders')
+F32 = np.float32
+
+# name -> (fragment function, sampler uniforms)
+SHADERS = {}
+_defaults = {}
+
+_UNIFORM = re.compile(r'uniform\s+(\w+)\s+(\w+)\s*(?::[^=;]*)?(?:=\s*([^;]+))?;')
+
+
+def _parse_value(kind, text):
+    if text is None:
+        return None
+    text = text.strip()
+    if kind in ('float', 'int'):
+        return F32(text)
+    if kind == 'bool':
+        return text == 'true'
+    match = re.fullmatch(r'vec\d\((.*)\)', text)
+    if match:
+        return np.array([float(v) for v in match.group(1).split(',')], dtype=F32)
+    raise ValueError(f"unsupported default for {kind}: {text!r}")
+
+
+def shader_defaults(name):
+    """{uniform: default} parsed from assets/shaders/<name>.gdshader (samplers map to None)"""
+    if name not in _defaults:
+        source = (SHADER_DIR / f'{name}.gdshader').read_text()
+        source = re.sub(r'//[^\n]*', '', source)
+        _defaults[name] = {uniform: (None if kind.startswith('sampler') else _parse_value(kind, value))
+                           for kind, uniform, value in _UNIFORM.findall(source)}
+    return dict(_defaults[name])
+
+
+def shader(name, samplers=()):
+    """Register a fragment function for assets/shaders/<name>.gdshader"""
+    def register(fragment):
+        SHADERS[name] = (fragment, tuple(samplers))
+        return fragment
+    return register
+
+
+# -- GLSL helpers ---------------------------------------------------------------
+
+def mix(a, b, t):
+    return a + (b - a) * t
+
+
+def fract(x):
+    return x - np.floor(x)
+
+
+def smoothstep(edge0, edge1, x):
+    t = np.clip((x - edge0) / (edge1 - edge0), F32(0.0), F32(1.0))
+    return t * t * (F32(3.0) - F32(2.0) * t)
+
+
+def load_texture(path):
+    """Decoded sprite as a float32 (H, W, 4) texture in [0, 1]"""
+    return load_rgba(path).astype(F32) / F32(255.0)
+
+
+def white(shape):
+    return np.ones((*shape, 4), dtype=F32)
+
+
+def sample(texture, shape):
+    """texture(sampler, UV) with nearest filtering over an output of `shape` (H, W)"""
+    if texture.shape[:2] == tuple(shape):
+        return texture
+    height, width = shape
+    rows = ((np.arange(height) + 0.5) * texture.shape[0] / height).astype(int)
+    cols = ((np.arange(width) + 0.5) * texture.shape[1] / width).astype(int)
+    return texture[rows[:, None], cols[None, :]]
+
+
+def uv_grid(shape):
+    """UV at pixel centres, (H, W, 2)"""
+    height, width = shape
+    u = (np.arange(width, dtype=F32) + F32(0.5)) / F32(width)
+    v = (np.arange(height, dtype=F32) + F32(0.5)) / F32(height)
+    return np.stack(np.broadcast_arrays(u[None, :], v[:, None]), axis=-1)
+
+
+def to_rgba8(color):
+    """Float COLOR to what an 8-bit render target stores"""
+    return (np.clip(color, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+
+def blend_over(color, background):
+    """Godot's default canvas blend (mix) of COLOR over an opaque (H, W, 3) background in [0, 1]"""
+    alpha = color[..., 3:4]
+    return color[..., :3] * alpha + background * (F32(1.0) - alpha)
+
+
+# -- shaders --------------------------------------------------------------------
+
+@shader('health_breathing', samplers=('damage_texture', 'breathing_texture'))
+def health_breathing(u, TIME, shape):
+    dst = u['damage_texture']
+    src_raw = u['breathing_texture']
+
+    breathing_alpha = (np.sin(F32(TIME) * F32(2.0) * F32(3.14159) / u['breathing_period']) + F32(1.0)) / F32(2.0)
+    breathing_alpha *= u['breathing_strength']
+
+    src = src_raw.copy()
+    src[..., 3] *= breathing_alpha
+
+    src_a = src[..., 3:4]
+    dst_a = dst[..., 3:4]
+    final_a = src_a + dst_a * (F32(1.0) - src_a)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        final_rgb = (src[..., :3] * src_a + dst[..., :3] * dst_a * (F32(1.0) - src_a)) / final_a
+    final_rgb = np.where(final_a > 0.0, final_rgb, F32(0.0))
+
+    return np.concatenate([final_rgb, final_a], axis=-1)
+
+
+@shader('battery_crossfade', samplers=('current_texture', 'next_texture'))
+def battery_crossfade(u, TIME, shape):
+    current_color = u['current_texture'].copy()
+    next_color = u['next_texture']
+
+    current_color[..., 3] *= u['blink_alpha']
+
+    return mix(current_color, next_color, u['crossfade_weight'])
+
+
+COLOR_SAFE = np.array([0.3, 0.9, 0.8], dtype=F32)
+COLOR_WARNING = np.array([1.0, 0.9, 0.3], dtype=F32)
+COLOR_CRITICAL = np.array([1.0, 0.3, 0.3], dtype=F32)
+
+
+@shader('mask_timer_urgency', samplers=('TEXTURE',))
+def mask_timer_urgency(u, TIME, shape):
+    tex_color = u['TEXTURE']
+    urgency = u['urgency']
+
+    # Uniform branch: the same for every fragment
+    if urgency < 0.5:
+        tint_color = mix(COLOR_SAFE, COLOR_WARNING, urgency * F32(2.0))
+    else:
+        tint_color = mix(COLOR_WARNING, COLOR_CRITICAL, (urgency - F32(0.5)) * F32(2.0))
+
+    final_color = tex_color[..., :3] * tint_color
+    final_alpha = tex_color[..., 3:4] * u['pulse_alpha']
+    return np.concatenate([final_color, final_alpha], axis=-1)
+
+
+def _hash(p):
+    return fract(np.sin(p[..., 0] * F32(12.9898) + p[..., 1] * F32(78.233)) * F32(43758.5453))
+
+
+def _cubic(t):
+    return t * t * t * (t * (t * F32(6.0) - F32(15.0)) + F32(10.0))
+
+
+_CORNERS = [np.array(c, dtype=F32) for c in ((0, 0), (1, 0), (0, 1), (1, 1))]
+
+
+def _noise(p):
+    i = np.floor(p)
+    f = p - i
+    a, b, c, d = (_hash(i + corner) for corner in _CORNERS)
+    u = _cubic(f[..., 0])
+    v = _cubic(f[..., 1])
+    return mix(mix(a, b, u), mix(c, d, u), v)
+
+
+def _fbm(p):
+    value = np.zeros(p.shape[:-1], dtype=F32)
+    amplitude = F32(0.9)
+    frequency = F32(0.008)
+    for _ in range(5):
+        value += amplitude * _noise(p * frequency)
+        amplitude *= F32(0.5)
+        frequency *= F32(2.0)
+    return value
+
+
+@shader('smog_shader')
+def smog_shader(u, TIME, shape):
+    scroll_uv = uv_grid(shape)
+    scroll_uv[..., 0] -= u['noise_time'] * u['noise_speed']
+
+    fog_pattern = smoothstep(F32(0.2), F32(0.8), _fbm(scroll_uv * u['noise_scale']))
+    final_alpha = fog_pattern * u['opacity']
+
+    color = np.empty((*shape, 4), dtype=F32)
+    color[..., :3] = F32(0.55)
+    color[..., 3] = final_alpha
+    return color
+
+
+# -- driver ---------------------------------------------------------------------
+
+def run_shader(name, time=0.0, size=None, **uniforms):
+    """
+    Evaluate shader `name` over a whole output: float32 (H, W, 4) COLOR.
+    Uniforms not given keep the shader's defaults; `size` is (width, height).
+    """
+    fragment, samplers = SHADERS[name]
+    values = shader_defaults(name)
+    unknown = set(uniforms) - set(values) - set(samplers)
+    if unknown:
+        raise TypeError(f"{name} has no uniform(s) {', '.join(sorted(unknown))}")
+    values.update({key: F32(value) if np.isscalar(value) else value for key, value in uniforms.items()})
+
+    given = [values[s] for s in samplers if values.get(s) is not None]
+    if size is not None:
+        shape = (size[1], size[0])
+    elif given:
+        shape = given[0].shape[:2]
+    else:
+        raise ValueError(f"{name}: pass size=(width, height) or a texture")
+
+    for sampler in samplers:
+        texture = values.get(sampler)
+        values[sampler] = white(shape) if texture is None else sample(texture, shape)
+    return fragment(values, F32(time), shape)
+
+
+def benchmark(width=544, height=140, repeats=20):
+    """Per-pixel cost of every shader at one output size"""
+    texture = np.random.default_rng(0).random((height, width, 4), dtype=F32)
+    inputs = {
+        'health_breathing': {'damage_texture': texture, 'breathing_texture': texture},
+        'battery_crossfade': {'current_texture': texture, 'next_texture': texture, 'crossfade_weight': 0.5},
+        'mask_timer_urgency': {'TEXTURE': texture, 'urgency': 0.7},
+        'smog_shader': {'noise_time': 3.0},
+    }
+    print(f"=== Shader emulation cost at {width}x{height} ===")
+    for name in SHADERS:
+        start = time.perf_counter()
+        for frame in range(repeats):
+            run_shader(name, time=frame / 30, size=(width, height), **inputs[name])
+        seconds = (time.perf_counter() - start) / repeats
+        print(f"  {name:20s} {seconds * 1000:8.2f} ms/frame  {seconds / (width * height) * 1e9:7.1f} ns/pixel")
+
+
+def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == 'bench':
+        size = [int(v) for v in sys.argv[2:4]] or [544, 140]
+        benchmark(*size)
+        return 0
+    for name in SHADERS:
+        uniforms = ', '.join(f"{key}={'<sampler>' if value is None else value}"
+                             for key, value in shader_defaults(name).items())
+        print(f"{name}: {uniforms}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
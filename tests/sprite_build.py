@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Incremental build of the derived health HUD sprites.
+
+Every derivation step of the health pipeline is declared as a node of a
+small DAG, from the hand-drawn sources to the generated sprites:
+
+  damage/health_damage_N.webp                 → top_layers/top_layer_damage_N.webp
+  damage/health_damage_N.webp + breathing/N   → breathing_masked/health_breathing_N_masked.webp
+  damage/health_damage_0.webp + damage/N      → mask_damage_N.webp
+
+A content-hash manifest (.build/sprite_manifest.json) remembers which
+inputs each output was built from, so only stale outputs are rebuilt.
+An output is stale when it is missing, when it was edited by hand, when
+any of its inputs changed, or when the rule that produces it changed
+(bump that rule's version in declare_steps()).
+
+This replaces running create_holes_pink_detection.py,
+create_masked_breathing_by_color.py, extract_damage_masks.py and
+invert_masks.py by hand and in order. The damage masks are produced
+already inverted (white = damaged, black = healthy), so rebuilding them
+is idempotent.
+
+Usage (from the project root):
+    python3 tests/sprite_build.py                      # build stale outputs
+    python3 tests/sprite_build.py --dry-run            # list stale outputs
+    python3 tests/sprite_build.py --force              # rebuild everything
+    python3 tests/sprite_build.py top_layer_damage_3   # only matching targets
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+import numpy as np
+
+from pixel_classifier import LUNG_RULES
+from sprite_cache import CACHE_DIR, load_rgba
+from sprite_pool import run_parallel
+
+HEALTH_DIR = 'assets/ui/health'
+MANIFEST_PATH = '.build/sprite_manifest.json'
+MANIFEST_FORMAT = 1
+LEVELS = range(6)
+
+# Per-channel RGB difference (summed) above which a pixel counts as damaged
+DAMAGE_DIFF_THRESHOLD = 50
+
+
+# ---------------------------------------------------------------------------
+# Rules: pure functions from decoded RGBA arrays to one RGBA array
+# ---------------------------------------------------------------------------
+
+def cut_pink_holes(damage):
+    """TOP layer of the sandwich: cut holes where the lungs are PINK (healthy)"""
+    classifier = LUNG_RULES.compile()
+    bits = classifier.classify(damage)
+
+    top_layer = damage.copy()
+    top_layer[classifier.match(bits, 'pink', 'visible'), :] = [0, 0, 0, 0]
+    top_layer[damage[:, :, 3] == 0, :] = [0, 0, 0, 0]
+    return top_layer
+
+
+def mask_breathing(damage, breathing):
+    """MIDDLE layer: breathing sprite restricted to lungs that still exist (not beige)"""
+    classifier = LUNG_RULES.compile()
+    is_lung = classifier.match(classifier.classify(damage), 'visible', exclude=('beige',))
+
+    masked_breathing = breathing.copy()
+    masked_breathing[~is_lung] = [0, 0, 0, 0]
+    return masked_breathing
+
+
+def damage_mask(healthy, damage):
+    """Occlusion mask: white where damaged (hide), black where healthy (show)"""
+    diff = np.abs(healthy[:, :, :3].astype(float) - damage[:, :, :3].astype(float))
+    is_damaged = np.sum(diff, axis=2) > DAMAGE_DIFF_THRESHOLD
+    show = ~is_damaged & (damage[:, :, 3] > 0)
+
+    # Same pixels extract_damage_masks.py + invert_masks.py produced, in one pass
+    mask = np.zeros(damage.shape[:2] + (4,), dtype=np.uint8)
+    mask[:, :, :3] = np.where(show, 0, 255)[:, :, None]
+    mask[:, :, 3] = show * 255
+    return mask
+
+
+# ---------------------------------------------------------------------------
+# Build graph
+# ---------------------------------------------------------------------------
+
+class Step:
+    """One DAG node: `rule(*inputs)` is written to `output`"""
+
+    def __init__(self, name, rule, version, inputs, output):
+        self.name = name
+        self.rule = rule
+        self.version = version
+        self.inputs = list(inputs)
+        self.output = output
+
+    @property
+    def rule_id(self):
+        return f"{self.rule.__name__}@{self.version}"
+
+
+def declare_steps():
+    """All health sprite derivations, one step per output file"""
+    steps = []
+    healthy = f'{HEALTH_DIR}/damage/health_damage_0.webp'
+    for level in LEVELS:
+        damage = f'{HEALTH_DIR}/damage/health_damage_{level}.webp'
+        breathing = f'{HEALTH_DIR}/breathing/health_breathing_{level}.webp'
+
+        steps.append(Step(
+            f'top_layer_damage_{level}', cut_pink_holes, 1,
+            [damage],
+            f'{HEALTH_DIR}/top_layers/top_layer_damage_{level}.webp',
+        ))
+        steps.append(Step(
+            f'health_breathing_{level}_masked', mask_breathing, 1,
+            [damage, breathing],
+            f'{HEALTH_DIR}/breathing_masked/health_breathing_{level}_masked.webp',
+        ))
+        steps.append(Step(
+            f'mask_damage_{level}', damage_mask, 1,
+            [healthy, damage],
+            f'{HEALTH_DIR}/mask_damage_{level}.webp',
+        ))
+    return steps
+
+
+def topological_order(steps):
+    """Order steps so that a step producing a file runs before its consumers"""
+    producers = {step.output: step for step in steps}
+    ordered = []
+    state = {}  # step name -> 'visiting' | 'done'
+
+    def visit(step):
+        mark = state.get(step.name)
+        if mark == 'done':
+            return
+        if mark == 'visiting':
+            raise ValueError(f"Cycle in sprite build graph at {step.name}")
+        state[step.name] = 'visiting'
+        for path in step.inputs:
+            if path in producers:
+                visit(producers[path])
+        state[step.name] = 'done'
+        ordered.append(step)
+
+    for step in steps:
+        visit(step)
+    return ordered
+
+
+def build_waves(steps):
+    """
+    Group steps into waves: every step only depends on steps of earlier
+    waves, so each wave can run in parallel once the previous one is done.
+    """
+    producers = {step.output: step for step in steps}
+    depth = {}
+    for step in topological_order(steps):
+        upstream = [depth[producers[p].name] for p in step.inputs if p in producers]
+        depth[step.name] = max(upstream, default=-1) + 1
+
+    waves = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for step in steps:
+        waves[depth[step.name]].append(step)
+    return waves
+
+
+# ---------------------------------------------------------------------------
+# Manifest
+# ---------------------------------------------------------------------------
+
+class Manifest:
+    """Content hashes of every input/output plus what each output was built from"""
+
+    def __init__(self, root, path=MANIFEST_PATH):
+        self.root = Path(root)
+        self.path = self.root / path
+        self.files = {}    # rel path -> {"size", "mtime_ns", "sha256"}
+        self.outputs = {}  # rel path -> {"rule", "inputs": {rel path: sha256}, "sha256"}
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            if data.get('format') == MANIFEST_FORMAT:
+                self.files = data.get('files', {})
+                self.outputs = data.get('outputs', {})
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'format': MANIFEST_FORMAT, 'files': self.files, 'outputs': self.outputs}
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(data, indent=1, sort_keys=True))
+        os.replace(tmp, self.path)
+
+    def file_hash(self, rel_path):
+        """sha256 of a file, reusing the recorded hash while size and mtime are unchanged"""
+        st = os.stat(self.root / rel_path)
+        known = self.files.get(rel_path)
+        if known and known['size'] == st.st_size and known['mtime_ns'] == st.st_mtime_ns:
+            return known['sha256']
+        digest = hashlib.sha256((self.root / rel_path).read_bytes()).hexdigest()
+        self.files[rel_path] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+        return digest
+
+    def stale_reason(self, step):
+        """Why `step` must be rebuilt, or None when its output is up to date"""
+        for path in step.inputs:
+            if not (self.root / path).exists():
+                raise FileNotFoundError(f"{step.name}: missing input {path}")
+        if not (self.root / step.output).exists():
+            return 'output missing'
+        record = self.outputs.get(step.output)
+        if record is None:
+            return 'not in manifest'
+        if record['rule'] != step.rule_id:
+            return f"rule changed ({record['rule']} → {step.rule_id})"
+        if self.file_hash(step.output) != record['sha256']:
+            return 'output edited by hand'
+        for path in step.inputs:
+            if record['inputs'].get(path) != self.file_hash(path):
+                return f'input changed: {path}'
+        return None
+
+    def record(self, step):
+        self.outputs[step.output] = {
+            'rule': step.rule_id,
+            'inputs': {path: self.file_hash(path) for path in step.inputs},
+            'sha256': self.file_hash(step.output),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+def save_webp(array, path):
+    """Lossless WebP, written through a temp file so a crash never leaves half an output"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    Image.fromarray(array).save(tmp, 'WEBP', lossless=True, quality=100)
+    os.replace(tmp, path)
+
+
+def run_step(job):
+    """Worker entry point: build one (step, root) job"""
+    step, root = job
+    cache_dir = Path(root) / CACHE_DIR
+    arrays = [load_rgba(Path(root) / path, cache_dir) for path in step.inputs]
+    save_webp(step.rule(*arrays), Path(root) / step.output)
+
+
+def select(steps, targets):
+    if not targets:
+        return steps
+    chosen = [s for s in steps if any(t in s.name or t in s.output for t in targets)]
+    if not chosen:
+        raise SystemExit(f"No build step matches {targets}")
+    return chosen
+
+
+def build(root='.', targets=(), force=False, dry_run=False, workers=None):
+    """
+    Rebuild stale outputs, one wave of the graph at a time with the steps of
+    a wave spread over a process pool. Returns a list of (step, reason,
+    seconds) for every output that was (or, with dry_run, would be) built.
+    """
+    manifest = Manifest(root)
+    steps = declare_steps()
+    LUNG_RULES.compile()  # build the lookup table once, before workers need it
+    wanted = {s.name for s in select(steps, targets)}
+
+    built = []
+    for wave in build_waves(steps):
+        # Earlier waves have already run, so input hashes are current here
+        stale = []
+        for step in wave:
+            if step.name not in wanted:
+                continue
+            reason = 'forced' if force else manifest.stale_reason(step)
+            if reason is not None:
+                stale.append((step, reason))
+
+        if dry_run:
+            built.extend((step, reason, 0.0) for step, reason in stale)
+            continue
+
+        results = run_parallel(run_step, [(step, root) for step, _ in stale], workers)
+        for (step, reason), result in zip(stale, results):
+            manifest.record(step)
+            built.append((step, reason, result.seconds))
+
+    if not dry_run:
+        manifest.save()
+    return built
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild stale derived health sprites")
+    parser.add_argument('targets', nargs='*', help="step names or output paths to build (substring match)")
+    parser.add_argument('--root', default='.', help="project root (default: current directory)")
+    parser.add_argument('--force', action='store_true', help="rebuild even if up to date")
+    parser.add_argument('--dry-run', action='store_true', help="only report stale outputs")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    built = build(args.root, args.targets, args.force, args.dry_run, args.jobs)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    verb = "Would rebuild" if args.dry_run else "Rebuilt"
+    for step, reason, seconds in built:
+        timing = "" if args.dry_run else f"{seconds * 1000:6.0f} ms  "
+        print(f"  {timing}{step.output}  ({reason})")
+    if built:
+        print(f"{verb} {len(built)} output(s) in {elapsed:.0f} ms")
+    else:
+        print(f"All sprites up to date ({elapsed:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
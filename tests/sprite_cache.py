@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Decoded-sprite cache: RGBA pixels stored as memory-mapped .npy files.
+
+    np.array(Image.open(path).convert('RGBA'))
+
+costs a full WebP decode plus a colour conversion every time a tool runs.
+load_rgba(path) returns the same pixels as a read-only memory-mapped
+uint8 array of shape (H, W, 4). After the first decode it is a zero-copy
+view of .build/decode_cache/<sha256>.npy shared by every tool and process.
+
+Staleness: entries are keyed by the sha256 of the source file's bytes, so
+an edited sprite can never be served stale pixels. A small index maps
+each source path to its last (size, mtime, sha256) so unchanged files are
+not re-hashed on every load.
+
+Eviction: entries no longer matching any indexed source are dropped, then
+the least recently used entries go until the cache fits its size budget
+(SPRITE_CACHE_MB, default 256 MB).
+
+The returned arrays are read-only; call .copy() before editing pixels.
+
+Usage:
+    from sprite_cache import load_rgba
+    damage = load_rgba('assets/ui/health/damage/health_damage_3.webp')
+
+    python3 tests/sprite_cache.py stats
+    python3 tests/sprite_cache.py warm assets/ui/health/*/*.webp
+    python3 tests/sprite_cache.py prune
+    python3 tests/sprite_cache.py clear
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+import numpy as np
+
+CACHE_DIR = '.build/decode_cache'
+INDEX_NAME = 'index.json'
+# Bump when the decoded representation changes (e.g. colour conversion)
+DECODE_VERSION = 'rgba8-v1'
+DEFAULT_BUDGET_MB = 256
+
+
+def budget_bytes():
+    return int(float(os.environ.get('SPRITE_CACHE_MB', DEFAULT_BUDGET_MB)) * 1024 * 1024)
+
+
+def _write_atomic(path, write):
+    """Write through a per-process temp file so concurrent tools never see half a file"""
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _save_npy(path, array):
+    # np.save(str) would append '.npy' to the temp name, so hand it a file object
+    with open(path, 'wb') as f:
+        np.save(f, array)
+
+
+class SpriteCache:
+    """Decode cache rooted at `cache_dir` (created on first use)"""
+
+    def __init__(self, cache_dir=CACHE_DIR, budget=None):
+        self.dir = Path(cache_dir)
+        self.budget = budget_bytes() if budget is None else budget
+        self._index = None
+        self._dirty = False
+
+    # -- index ---------------------------------------------------------
+
+    @property
+    def index(self):
+        """source abs path -> {"size", "mtime_ns", "sha256"}"""
+        if self._index is None:
+            try:
+                data = json.loads((self.dir / INDEX_NAME).read_text())
+                self._index = data if data.pop('_version', None) == DECODE_VERSION else {}
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def save(self):
+        """Write the source hash index if it changed (callers batching source_hash() lookups)"""
+        if not self._dirty:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        data = dict(self.index, _version=DECODE_VERSION)
+        _write_atomic(self.dir / INDEX_NAME, lambda tmp: tmp.write_text(json.dumps(data, indent=1)))
+        self._dirty = False
+
+    def source_hash(self, path):
+        """sha256 of the source file, re-hashed only when its size or mtime changed"""
+        key = os.path.abspath(path)
+        st = os.stat(path)
+        known = self.index.get(key)
+        if known and known['size'] == st.st_size and known['mtime_ns'] == st.st_mtime_ns:
+            return known['sha256']
+        digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+        self.index[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+        self._dirty = True
+        return digest
+
+    def entry_path(self, digest):
+        return self.dir / f'{digest}.npy'
+
+    # -- lookups -------------------------------------------------------
+
+    def load_rgba(self, path):
+        """Read-only (H, W, 4) uint8 view of the decoded sprite"""
+        digest = self.source_hash(path)
+        entry = self.entry_path(digest)
+        if entry.exists():
+            try:
+                pixels = np.load(entry, mmap_mode='r')
+                if pixels.dtype == np.uint8 and pixels.ndim == 3 and pixels.shape[2] == 4:
+                    os.utime(entry)  # recency for LRU eviction
+                    self.save()
+                    return pixels
+            except (OSError, ValueError):
+                pass  # truncated or foreign file: decode again below
+
+        pixels = np.array(Image.open(path).convert('RGBA'))
+        self.dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(entry, lambda tmp: _save_npy(tmp, pixels))
+        self.save()
+        self.evict(keep=entry)
+        return np.load(entry, mmap_mode='r')
+
+    # -- maintenance ---------------------------------------------------
+
+    def entries(self):
+        if not self.dir.exists():
+            return []
+        return list(self.dir.glob('*.npy'))
+
+    def prune(self):
+        """Drop entries whose source changed or disappeared; returns bytes freed"""
+        # Other processes may have indexed sources since we loaded: merge their view first
+        mine = self.index
+        self._index = None
+        self._index = dict(self.index, **mine)
+        self._dirty = True
+
+        live = set()
+        for source, known in list(self.index.items()):
+            try:
+                st = os.stat(source)
+            except OSError:
+                del self.index[source]
+                self._dirty = True
+                continue
+            if known['size'] == st.st_size and known['mtime_ns'] == st.st_mtime_ns:
+                live.add(known['sha256'])
+            else:
+                live.add(self.source_hash(source))
+        self.save()
+
+        freed = 0
+        for entry in self.entries():
+            if entry.stem not in live:
+                freed += entry.stat().st_size
+                entry.unlink(missing_ok=True)
+        return freed
+
+    def evict(self, keep=None):
+        """Enforce the size budget, least recently used first (never `keep`); returns bytes freed"""
+        entries = [(p, p.stat()) for p in self.entries()]
+        total = sum(st.st_size for _, st in entries)
+        if total <= self.budget:
+            return 0
+
+        freed = self.prune()
+        entries = [(p, p.stat()) for p in self.entries()]
+        total = sum(st.st_size for _, st in entries)
+        for entry, st in sorted(entries, key=lambda e: e[1].st_mtime_ns):
+            if total <= self.budget:
+                break
+            if entry == keep:
+                continue
+            entry.unlink(missing_ok=True)
+            total -= st.st_size
+            freed += st.st_size
+        return freed
+
+    def clear(self):
+        for entry in self.entries():
+            entry.unlink(missing_ok=True)
+        (self.dir / INDEX_NAME).unlink(missing_ok=True)
+        self._index = {}
+        self._dirty = False
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            'entries': len(entries),
+            'bytes': sum(p.stat().st_size for p in entries),
+            'budget': self.budget,
+            'sources': len(self.index),
+        }
+
+
+_default_caches = {}
+
+
+def load_rgba(path, cache_dir=CACHE_DIR):
+    """Cached np.array(Image.open(path).convert('RGBA')), as a read-only memmap"""
+    cache = _default_caches.get(cache_dir)
+    if cache is None:
+        cache = _default_caches[cache_dir] = SpriteCache(cache_dir)
+    return cache.load_rgba(path)
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    cache = SpriteCache()
+
+    if command == 'stats':
+        s = cache.stats()
+        print(f"[sprite_cache] {cache.dir}: {s['entries']} entries, "
+              f"{s['bytes'] / 1024 / 1024:.1f} / {s['budget'] / 1024 / 1024:.0f} MB, "
+              f"{s['sources']} indexed sources")
+    elif command == 'warm':
+        for path in sys.argv[2:]:
+            start = time.perf_counter()
+            pixels = cache.load_rgba(path)
+            print(f"  {path}: {pixels.shape[1]}x{pixels.shape[0]} "
+                  f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+    elif command == 'prune':
+        print(f"[sprite_cache] pruned {cache.prune() / 1024:.0f} KB of stale entries")
+    elif command == 'clear':
+        cache.clear()
+        print(f"[sprite_cache] cleared {cache.dir}")
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
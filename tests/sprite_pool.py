@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Process-pool driver for per-sprite work.
+
+The sprite generators all do the same thing for each damage level (or
+charge sprite): decode, classify, re-encode lossless WebP. Encoding
+dominates and every item is independent, so the items are fanned out
+across a process pool. Results always come back in input order, each
+with its own wall time, so the printed report is deterministic no matter
+which worker finishes first.
+
+Usage:
+    from sprite_pool import run_parallel, print_timings
+
+    def process_level(level):      # must be a module-level function
+        ...
+        return stats
+
+    if __name__ == "__main__":
+        results = run_parallel(process_level, range(6))
+        for result in results:
+            print(result.item, result.value)
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import _scripts_path  # noqa: F401
+from project_index import default_workers
+
+# Levels of the health HUD sprites, in display order
+DAMAGE_LEVELS = list(range(6))
+
+
+class TaskResult:
+    """Return value of one task plus how long it took inside its worker"""
+
+    def __init__(self, item, value, seconds):
+        self.item = item
+        self.value = value
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f"TaskResult({self.item!r}, {self.seconds * 1000:.0f} ms)"
+
+
+def _timed(func, item):
+    start = time.perf_counter()
+    value = func(item)
+    return value, time.perf_counter() - start
+
+
+def run_parallel(func, items, workers=None):
+    """
+    Run func(item) for every item across a process pool.
+
+    Returns a list of TaskResult in the same order as `items`. `func` and
+    the items must be picklable (module-level functions, plain data).
+    Exceptions raised by a task propagate to the caller.
+    """
+    items = list(items)
+    workers = min(workers or default_workers(), len(items)) if items else 1
+
+    if workers <= 1:
+        return [TaskResult(item, *_timed(func, item)) for item in items]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_timed, func, item) for item in items]
+        return [TaskResult(item, *future.result()) for item, future in zip(items, futures)]
+
+
+def print_timings(results, wall_seconds, label="task"):
+    """Per-task timings and how much of the serial time the pool saved"""
+    serial = sum(r.seconds for r in results)
+    print(f"Timing ({len(results)} {label}s):")
+    for result in results:
+        print(f"  {label} {result.item}: {result.seconds * 1000:7.1f} ms")
+    speedup = serial / wall_seconds if wall_seconds > 0 else 1.0
+    print(f"  serial {serial:.2f}s | wall {wall_seconds:.2f}s | speedup x{speedup:.1f}")
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Estimate the cold-start work of a scene and recommend what to defer.
+
+Everything Main.tscn pulls in is paid before the first game frame:
+loading the packed scene loads every ext_resource and every script's
+preload() targets, and instantiating it runs each node's _init /
+_enter_tree / _ready. ObstacleSpawner and PickupSpawner build full pools
+there, and the parallax spawners preload every texture config although
+only a few are on screen. This tool replays that statically:
+
+    load        each resource once (Godot caches them): scenes with their
+                ext_resources, scripts with their preload() targets and
+                parent scripts, textures decoded to RGBA8 (mipmaps add a
+                third; VRAM-compressed imports are uploaded, not decoded)
+    instantiate every node of the scene tree, nested instances included,
+                then the startup functions of its script and what they call
+                (tests/gdscript_hotpath.py call resolution)
+    scripts     load("res://...") loads now; X.instantiate() instantiates
+                the scenes X was preloaded from; Node2D.new() and friends
+                add nodes; a loop runs as many times as its bound says
+                (range(pool_size) with pool_size from the script, the
+                scene's property override or an assignment in _ready),
+                LOOP_TRIPS when the bound is not a known number. Branches
+                count as taken, so the totals are an upper bound.
+
+Work is attributed to subsystems: the top-level children of the scene
+and each autoload. Milliseconds use rough low-end phone throughputs
+(DECODE_BYTES_PER_MS, NODE_MS, ...) and are for comparing subsystems, not
+a measurement.
+
+Recommendations:
+    defer      textures only a script loads at startup (preload / load
+               in _ready), not shown by any node of the scene: load them on
+               first use or with ResourceLoader.load_threaded_request()
+    pool       scenes instantiated POOL_WARN+ times at startup: start the
+               pool small and grow it on demand
+    per-instance load()
+               scripts whose startup functions call load() each time a
+               node is created (Pigeon.gd): hoist to a preload const.
+               Scripts of a single node of the startup tree are skipped
+
+Usage (from the project root):
+    python3 tests/startup_cost.py                       # scenes/Main.tscn
+    python3 tests/startup_cost.py --scene scenes/StartScreen.tscn
+"""
+
+import sys
+from collections import Counter
+from pathlib import Path
+
+from PIL import Image
+
+import _scripts_path  # noqa: F401
+from export_payload import MIPMAP_FACTOR, read_import
+from gdscript_hotpath import LOOP_TRIPS, Project
+from godot_scene import ExtResource, SubResourceRef
+from project_index import ProjectIndex
+from resource_graph import ResourceGraph, format_size
+
+SCENE = 'scenes/Main.tscn'
+STARTUP_FUNCTIONS = ('_init', '_enter_tree', '_ready')
+POOL_WARN = 8
+DEFER_MIN_BYTES = 1024 * 1024
+
+# Rough low-end phone figures (one little core, GLES3 upload)
+DECODE_BYTES_PER_MS = 40_000     # WebP decode to RGBA8, ~40 MB/s
+UPLOAD_BYTES_PER_MS = 400_000    # texture upload, ~400 MB/s
+NODE_MS = 0.015                  # instantiate + enter tree + _ready of a plain node
+RESOURCE_MS = 0.3                # open, parse and register a non-texture resource
+SCRIPT_MS_PER_KB = 0.1           # GDScript parse and compile
+LOAD_CALL_MS = 0.02              # load() of an already cached path
+
+# Engine classes that .new() may create which are resources, not nodes
+_NOT_NODES = ('Shape2D', 'Texture', 'Gradient', 'Noise', 'Physics', 'World2D', 'Material', 'Curve')
+_NODE_CLASSES = {'Node', 'Timer', 'Control', 'Label', 'Button', 'TextureRect', 'ColorRect', 'Panel',
+                 'CanvasLayer', 'AudioStreamPlayer', 'HTTPRequest', 'Container', 'RichTextLabel'}
+
+
+def is_node_class(name):
+    if any(part in name for part in _NOT_NODES) and not name.startswith('Collision'):
+        return False
+    return name in _NODE_CLASSES or name.endswith(('2D', '3D', 'Container'))
+
+
+class Subsystem:
+    """Cold-start work attributed to one top-level node or autoload"""
+
+    def __init__(self, name):
+        self.name = name
+        self.nodes = 0
+        self.instances = Counter()  # scene -> instantiations
+        self.created = Counter()    # engine class -> .new() calls
+        self.textures = {}          # rel -> (decoded bytes, uploaded bytes)
+        self.resources = set()      # non-texture resources loaded
+        self.script_bytes = 0
+        self.load_calls = 0
+
+    @property
+    def decoded(self):
+        return sum(decoded for decoded, _ in self.textures.values())
+
+    @property
+    def milliseconds(self):
+        return (self.decoded / DECODE_BYTES_PER_MS
+                + sum(uploaded for _, uploaded in self.textures.values()) / UPLOAD_BYTES_PER_MS
+                + self.nodes * NODE_MS
+                + len(self.resources) * RESOURCE_MS
+                + self.script_bytes / 1024 * SCRIPT_MS_PER_KB
+                + self.load_calls * LOAD_CALL_MS)
+
+
+def _references(value, scene, seen=None):
+    """ext_resource ids a property value uses, through sub_resources"""
+    seen = set() if seen is None else seen
+    if isinstance(value, ExtResource):
+        yield value.id
+    elif isinstance(value, SubResourceRef):
+        section = scene.sub_resources.get(value.id)
+        if section is not None and value.id not in seen:
+            seen.add(value.id)
+            for inner in section.properties.values():
+                yield from _references(inner, scene, seen)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _references(item, scene, seen)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _references(item, scene, seen)
+
+
+def _literal(tokens):
+    """Number for a single number token, element count for a flat [...] literal, else None"""
+    values = [t[1] for t in tokens]
+    if len(tokens) == 1 and tokens[0][0] == 'number':
+        number = float(values[0].replace('_', ''))
+        return int(number) if number.is_integer() else number
+    if values[:1] == ['['] and values[-1:] == [']']:
+        depth, count = 0, 0
+        for value in values[1:-1]:
+            if value in '([{':
+                depth += 1
+            elif value in ')]}':
+                depth -= 1
+            elif value == ',' and depth == 0:
+                count += 1
+        return 0 if len(values) == 2 else count + (values[-2] != ',')
+    return None
+
+
+class StartupModel:
+    def __init__(self, index, scene=SCENE, graph=None, project=None):
+        self.index = index
+        self.root = Path(index.root)
+        self.graph = graph or ResourceGraph(index)
+        self.project = project or Project(index)
+        self.scene = scene
+        self.subsystems = {}
+        self.origin = {}         # rel -> (how, where) it was first loaded
+        self.on_nodes = set()    # resources a scene node property uses
+        self.loads = []          # (where, rel, runs) of startup load() calls
+        self.script_runs = Counter()  # script -> instances started at startup
+        for name, rel in sorted(self.project.autoloads.items()):
+            sub = self.subsystem(f'autoload {name}')
+            self.load_resource(rel, sub, ('autoload', 'project.godot'))
+            sub.nodes += 1
+            self.run_script(rel, {}, 1, sub)
+        self.load_resource(scene, self.subsystem(Path(scene).stem), ('scene', scene), split=True)
+        self.instantiate(scene, 1, None)
+
+    def subsystem(self, name):
+        if name not in self.subsystems:
+            self.subsystems[name] = Subsystem(name)
+        return self.subsystems[name]
+
+    def _top_level(self, scene, node):
+        return self.subsystem(scene.root.name if node.path == '.' else node.path.split('/')[0])
+
+    # -- loading --------------------------------------------------------------
+
+    def resolve(self, reference):
+        found = self.graph.resolve(reference) if reference else set()
+        return sorted(found)[0] if len(found) == 1 else None
+
+    def load_resource(self, rel, sub, origin, split=False):
+        """Load `rel` once, charging `sub`; with `split` a scene charges each dependency
+        to the subsystem of the first node that uses it"""
+        if rel is None or rel in self.origin:
+            return
+        self.origin[rel] = origin
+        path = self.root / rel
+        sidecar = path.with_name(path.name + '.import')
+        if sidecar.exists():
+            settings = read_import(sidecar)
+            if settings.get('importer') == 'texture':
+                sub.textures[rel] = self._texture_bytes(path, settings)
+                return
+        sub.resources.add(rel)
+        if rel.endswith(('.tscn', '.tres')):
+            scene = self.index.scene(rel)
+            owners = {}
+            for node in scene.nodes:
+                ids = list(_references(list(node.properties.values()), scene))
+                if node.instance is not None:
+                    ids += list(_references(node.instance, scene))
+                for ext_id in ids:
+                    owners.setdefault(ext_id, node)
+            for ext_id, ext in scene.ext_resources.items():
+                dep = self.resolve(ext.path) or self.resolve(ext.uid)
+                node = owners.get(ext_id)
+                if node is not None and ext.type != 'Script':
+                    self.on_nodes.add(dep)
+                owner = self._top_level(scene, node) if split and node is not None else sub
+                self.load_resource(dep, owner, ('scene', rel))
+        elif rel.endswith('.gd'):
+            sub.script_bytes += path.stat().st_size
+            script = self.project.scripts.get(rel)
+            if script is not None and script.extends:
+                self.load_resource(self.project.script_of(script.extends), sub, ('extends', rel))
+            for _, kind, name, line in self.index.symbols(rel, 'preload'):
+                self.load_resource(self.resolve(name), sub, ('preload', f'{rel}:{line}'))
+
+    def _texture_bytes(self, path, settings):
+        """(decoded, uploaded) bytes of an imported texture"""
+        if path.suffix.lower() == '.svg':
+            return 0, 0
+        with Image.open(path) as image:
+            width, height = image.size
+        mip = MIPMAP_FACTOR if settings.get('mipmaps/generate') else 1.0
+        if settings.get('compress/mode', 0) == 2:
+            return 0, int(width * height * mip)
+        return int(width * height * 4 * mip), int(width * height * 4 * mip)
+
+    # -- instancing -----------------------------------------------------------
+
+    def instantiate(self, rel, count, sub):
+        """Create `count` instances of scene `rel` (sub=None: split by top-level node)"""
+        scene = self.index.scene(rel)
+        if sub is not None:
+            sub.instances[rel] += count
+        for node in scene.nodes:
+            owner = sub if sub is not None else self._top_level(scene, node)
+            if node.instance is not None:
+                nested = self.resolve(node.instance.path) or self.resolve(node.instance.uid)
+                if nested:
+                    self.instantiate(nested, count, owner)
+                continue
+            owner.nodes += count
+            script = node.get('script')
+            if isinstance(script, ExtResource):
+                self.run_script(self.resolve(script.path) or self.resolve(script.uid),
+                                node.properties, count, owner)
+
+    def members(self, rel, seen=()):
+        """Script members with a literal initializer (number or [...] length), parents first"""
+        script = self.project.scripts.get(rel)
+        if script is None or rel in seen:
+            return {}
+        values = self.members(self.project.script_of(script.extends), (*seen, rel))
+        for name, tokens in script.members.items():
+            value = _literal(tokens)
+            if value is not None:
+                values[name] = value
+        return values
+
+    def run_script(self, rel, overrides, count, sub):
+        if rel not in self.project.scripts:
+            return
+        self.script_runs[rel] += count
+        values = self.members(rel)
+        values.update({k: v for k, v in overrides.items() if isinstance(v, (int, float))
+                       and not isinstance(v, bool)})
+        for name in STARTUP_FUNCTIONS:
+            function = self.project.method(rel, name)
+            if function is not None:
+                self.run_function(function, values, count, sub, (function.key,))
+
+    def loop_bound(self, header, values):
+        words = [t[1] for t in header]
+        if words[0] != 'for' or 'in' not in words:
+            return LOOP_TRIPS
+        expr = header[words.index('in') + 1:-1]
+        exprs = [t[1] for t in expr]
+        if exprs[:2] == ['range', '('] and exprs[-1] == ')':
+            args = [[]]
+            for token in expr[2:-1]:
+                if token[1] == ',':
+                    args.append([])
+                else:
+                    args[-1].append(token)
+            bounds = [self._value(arg, values) for arg in args]
+            if None in bounds:
+                return LOOP_TRIPS
+            return max(0, bounds[0] if len(bounds) == 1 else bounds[1] - bounds[0])
+        bound = self._value(expr, values)
+        return LOOP_TRIPS if bound is None else bound
+
+    def _value(self, tokens, values):
+        if len(tokens) == 1 and tokens[0][0] == 'name':
+            value = values.get(tokens[0][1])
+            return value if isinstance(value, (int, float)) else None
+        return _literal(tokens)
+
+    def scene_sources(self, function, name, depth=0):
+        """Scenes a variable called `name` was preloaded or loaded from"""
+        script = self.project.scripts[function.script]
+        init = None
+        for statement in function.body:
+            words = [t[1] for t in statement.tokens]
+            if words[:2] == ['var', name] and '=' in words:
+                init = statement.tokens[words.index('=') + 1:]
+            elif words[:2] == [name, '=']:
+                init = statement.tokens[2:]
+        if init is None:
+            rel = function.script
+            while rel in self.project.scripts and init is None:
+                init = self.project.scripts[rel].members.get(name)
+                rel = self.project.script_of(self.project.scripts[rel].extends)
+        scenes = []
+        for i, (kind, value, _) in enumerate(init or ()):
+            if kind == 'string' and i >= 2 and init[i - 2][1] in ('preload', 'load'):
+                scenes.append(self.resolve(value.strip('"\'')))
+            elif kind == 'name' and depth < 2 and value != name and (i == 0 or init[i - 1][1] != '.'):
+                if value in script.members:
+                    scenes += self.scene_sources(function, value, depth + 1)
+        return [s for s in dict.fromkeys(scenes) if s and s.endswith('.tscn')]
+
+    def run_function(self, function, values, count, sub, path):
+        values = dict(values)
+        for statement in function.body:
+            tokens = statement.tokens
+            words = [t[1] for t in tokens]
+            if len(words) >= 3 and words[1] == '=' and tokens[0][0] == 'name' and not statement.loops:
+                value = _literal(tokens[2:])
+                if value is not None:
+                    values[words[0]] = value
+            runs = count
+            for header in statement.loops:
+                runs *= self.loop_bound(header, values)
+            if not runs:
+                continue
+            where = f"{function.script}:{statement.line}"
+            for i, (kind, value, _) in enumerate(tokens):
+                if kind != 'name' or i + 1 >= len(tokens) or tokens[i + 1][1] != '(':
+                    continue
+                prev = tokens[i - 1][1] if i else ''
+                receiver = tokens[i - 2][1] if i >= 2 else ''
+                if value == 'load' and (prev != '.' or receiver == 'ResourceLoader'):
+                    if i + 2 < len(tokens) and tokens[i + 2][0] == 'string':
+                        rel = self.resolve(tokens[i + 2][1].strip('"\''))
+                        self.load_resource(rel, sub, ('load', where))
+                        sub.load_calls += runs
+                        self.loads.append((where, rel, runs))
+                elif value == 'instantiate' and prev == '.':
+                    scenes = self.scene_sources(function, receiver)
+                    for scene in scenes:
+                        self.load_resource(scene, sub, ('preload', where))
+                        self.instantiate(scene, runs / len(scenes), sub)
+                elif value == 'new' and prev == '.':
+                    if is_node_class(receiver):
+                        sub.nodes += runs
+                        sub.created[receiver] += runs
+                    elif receiver in self.project.class_names:
+                        rel = self.project.class_names[receiver]
+                        self.load_resource(rel, sub, ('class_name', where))
+                        sub.created[receiver] += runs
+                else:
+                    callee = self.project.callee(function, tokens, i)
+                    if callee is not None and callee.key not in path:
+                        self.run_function(callee, values, runs, sub, (*path, callee.key))
+
+    # -- findings -------------------------------------------------------------
+
+    def deferrable(self):
+        """(rel, decoded bytes, subsystem, origin) of textures only scripts load at startup"""
+        rows = []
+        for sub in self.subsystems.values():
+            for rel, (decoded, uploaded) in sub.textures.items():
+                how, where = self.origin[rel]
+                if how in ('preload', 'load') and rel not in self.on_nodes and max(decoded, uploaded) >= DEFER_MIN_BYTES:
+                    rows.append((rel, max(decoded, uploaded), sub.name, f'{how} {where}'))
+        return sorted(rows, key=lambda row: (-row[1], row[0]))
+
+    def pools(self):
+        return sorted(((sub.name, scene, count) for sub in self.subsystems.values()
+                       for scene, count in sub.instances.items() if count >= POOL_WARN),
+                      key=lambda row: -row[2])
+
+    def per_instance_loads(self):
+        """(script:line, path) of load() literals in startup functions of scripts
+        that are not a single node of the startup tree"""
+        rows = []
+        for rel, script in sorted(self.project.scripts.items()):
+            if self.script_runs[rel] == 1:
+                continue
+            for name in STARTUP_FUNCTIONS:
+                function = script.functions.get(name)
+                for statement in function.body if function else ():
+                    tokens = statement.tokens
+                    for i, (kind, value, _) in enumerate(tokens):
+                        if (kind == 'name' and value == 'load' and i + 2 < len(tokens)
+                                and tokens[i + 1][1] == '(' and tokens[i + 2][0] == 'string'
+                                and (i == 0 or tokens[i - 1][1] != '.')):
+                            rows.append((f'{rel}:{statement.line}', tokens[i + 2][1].strip('"\'')))
+        return rows
+
+
+def report(model):
+    subsystems = sorted(model.subsystems.values(), key=lambda s: -s.milliseconds)
+    print(f"Cold start of {model.scene} (+ autoloads), rough low-end phone estimate\n")
+    print(f"{'subsystem':28s} {'est ms':>8s} {'nodes':>7s} {'instanced':>9s} {'textures (decoded)':>22s} {'resources':>9s}")
+    total = Subsystem('total')
+    for sub in subsystems:
+        instanced = sum(sub.instances.values()) + sum(sub.created.values())
+        textures = f"{format_size(sub.decoded).strip()} ({len(sub.textures)})"
+        print(f"{sub.name:28s} {sub.milliseconds:8.1f} {sub.nodes:7.0f} {instanced:9.0f} "
+              f"{textures:>22s} {len(sub.resources):9d}")
+        total.nodes += sub.nodes
+        total.textures.update(sub.textures)
+        total.resources |= sub.resources
+        total.script_bytes += sub.script_bytes
+        total.load_calls += sub.load_calls
+    print(f"{'total':28s} {total.milliseconds:8.1f} {total.nodes:7.0f} {'':9s} "
+          f"{format_size(total.decoded).strip() + f' ({len(total.textures)})':>22s} {len(total.resources):9d}")
+
+    print("\nLargest startup textures:")
+    largest = sorted(((rel, max(sizes), sub.name) for sub in subsystems
+                      for rel, sizes in sub.textures.items()), key=lambda row: -row[1])[:15]
+    for rel, size, name in largest:
+        how, where = model.origin[rel]
+        print(f"  {format_size(size)}  {rel}  [{name}; {how} {where}]")
+
+    print("\nRecommendations:")
+    deferrable = model.deferrable()
+    if deferrable:
+        saving = sum(size for _, size, _, _ in deferrable)
+        print(f"  defer: {len(deferrable)} texture(s), {format_size(saving).strip()} decoded "
+              f"(~{saving / DECODE_BYTES_PER_MS:.0f} ms) that no node shows on the first frame")
+        for rel, size, name, origin in deferrable:
+            print(f"    {format_size(size)}  {rel}  ({origin})")
+    for name, scene, count in model.pools():
+        nodes = sum(1 for _ in model.index.scene(scene).nodes)
+        print(f"  pool: {name} instantiates {scene} x{count:.0f} ({count * nodes:.0f} nodes) at startup; "
+              f"start smaller and grow on demand")
+    for where, path in model.per_instance_loads():
+        print(f"  per-instance load(): {where} loads {path} for every instance; use a preload const")
+
+
+def main():
+    args = sys.argv[1:]
+    scene = SCENE
+    if args[:1] == ['--scene'] and len(args) == 2:
+        scene = args[1][len('res://'):] if args[1].startswith('res://') else args[1]
+    elif args:
+        print(__doc__)
+        return 2
+    with ProjectIndex() as index:
+        report(StartupModel(index, scene))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Resident texture memory per scene and per parallax layer, against a mobile budget.
+
+The parallax textures are full 1920-wide canvases of which the sprites
+show a region_rect (LotusPark uses 1608x584 of its texture), yet the GPU
+holds the whole canvas. This report computes, at each texture's import
+settings:
+
+    resident   bytes on the GPU: VRAM-compressed imports (compress/mode 2,
+               and Basis, transcoded) at ETC2/ASTC rates, 1 B/px with alpha
+               and 0.5 B/px without; everything else as RGBA8 (drivers pad
+               RGB8 to four bytes); mipmaps add a third; process/size_limit
+               applied
+    used       share of the texture inside the union of its region_rects:
+               every Sprite2D node region in the project's scenes plus
+               the "region": Rect2(...) next to each preload() in the
+               spawners' texture_configs. A use without a region uses it all
+    content    share inside the alpha bounding box of the used area; the
+               rest is wasted: trimming or packing the used parts into an
+               atlas would free it
+
+Scenes count the textures their cold start makes resident
+(tests/startup_cost.py). Layers are the Parallax2D / ParallaxLayer nodes
+of each scene: their textures are the ones their nodes and the scripts
+attached to them load.
+
+The budget is BUDGET_MB (or --budget MB, or VRAM_BUDGET_MB): scenes over
+it are flagged, and so is any texture that takes TEXTURE_SHARE of it or
+wastes WASTE_FLAG of its bytes. The exit status is 1 when a scene is over
+budget.
+
+Usage (from the project root):
+    python3 tests/vram_budget.py [--budget MB] [--top N]
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import _scripts_path  # noqa: F401
+from export_payload import MIPMAP_FACTOR, read_import
+from gdscript_hotpath import Project
+from godot_scene import ExtResource, Rect2
+from project_index import ProjectIndex
+from resource_graph import ResourceGraph, format_size
+from sprite_cache import CACHE_DIR, SpriteCache
+from startup_cost import StartupModel, _references
+
+BUDGET_MB = 128
+TEXTURE_SHARE = 0.05
+WASTE_FLAG = 0.4
+TOP = 20
+LAYER_TYPES = ('Parallax2D', 'ParallaxLayer')
+
+
+def budget_bytes(args):
+    if '--budget' in args:
+        return int(float(args[args.index('--budget') + 1]) * 1024 * 1024)
+    return int(float(os.environ.get('VRAM_BUDGET_MB', BUDGET_MB)) * 1024 * 1024)
+
+
+def resident_bytes(width, height, has_alpha, settings):
+    """GPU bytes of a width x height texture imported with `settings`"""
+    limit = settings.get('process/size_limit', 0) or 0
+    if limit and max(width, height) > limit:
+        factor = limit / max(width, height)
+        width, height = max(1, int(width * factor)), max(1, int(height * factor))
+    mip = MIPMAP_FACTOR if settings.get('mipmaps/generate') else 1.0
+    if settings.get('compress/mode', 0) in (2, 4):
+        per_pixel = 1.0 if has_alpha else 0.5
+    else:
+        per_pixel = 4
+    return int(width * height * per_pixel * mip)
+
+
+class Texture:
+    def __init__(self, rel, pixels, settings):
+        self.rel = rel
+        self.height, self.width = pixels.shape[:2]
+        alpha = pixels[:, :, 3]
+        self.resident = resident_bytes(self.width, self.height, bool((alpha < 255).any()), settings)
+        self._alpha = alpha
+        self.regions = []
+        self.whole = False
+
+    def coverage(self):
+        """(used, content) shares of the texture area"""
+        area = self.width * self.height
+        if self.whole or not self.regions:
+            used = np.ones((self.height, self.width), bool)
+        else:
+            used = np.zeros((self.height, self.width), bool)
+            for x, y, w, h in self.regions:
+                x0, y0 = max(0, int(x)), max(0, int(y))
+                x1, y1 = min(self.width, int(round(x + w))), min(self.height, int(round(y + h)))
+                if x1 > x0 and y1 > y0:
+                    used[y0:y1, x0:x1] = True
+        visible = used & (self._alpha > 0)
+        if not visible.any():
+            return used.sum() / area, 0.0
+        rows = np.nonzero(visible.any(axis=1))[0]
+        cols = np.nonzero(visible.any(axis=0))[0]
+        content = (rows[-1] - rows[0] + 1) * (cols[-1] - cols[0] + 1)
+        return used.sum() / area, min(content, used.sum()) / area
+
+    @property
+    def wasted(self):
+        return int(self.resident * (1.0 - self.coverage()[1]))
+
+
+class VramModel:
+    def __init__(self, index):
+        self.index = index
+        self.root = Path(index.root)
+        self.graph = ResourceGraph(index)
+        self.project = Project(index)
+        self.cache = SpriteCache(self.root / CACHE_DIR)
+        self.textures = {}
+        self._scenes = {}
+        self._collect_regions()
+        self.cache.save()
+
+    def texture(self, rel):
+        """Texture for an imported image, None for anything else"""
+        if rel not in self.textures:
+            sidecar = self.root / (rel + '.import')
+            texture = None
+            if sidecar.exists() and not rel.endswith('.svg'):
+                settings = read_import(sidecar)
+                if settings.get('importer') == 'texture':
+                    texture = Texture(rel, self.cache.load_rgba(self.root / rel), settings)
+            self.textures[rel] = texture
+        return self.textures[rel]
+
+    def resolve(self, ref):
+        found = self.graph.resolve(ref) if ref else set()
+        return sorted(found)[0] if len(found) == 1 else None
+
+    # -- regions ------------------------------------------------------------
+
+    def _collect_regions(self):
+        for rel in self.index.files('tscn'):
+            scene = self.index.scene(rel)
+            for node in scene.nodes:
+                texture = node.get('texture')
+                if not isinstance(texture, ExtResource):
+                    continue
+                target = self.texture(self.resolve(texture.path) or self.resolve(texture.uid) or '')
+                if target is None:
+                    continue
+                region = node.get('region_rect')
+                if node.get('region_enabled') and isinstance(region, Rect2):
+                    target.regions.append(region)
+                else:
+                    target.whole = True
+        for rel, script in self.project.scripts.items():
+            for function in script.functions.values():
+                for statement in function.body:
+                    self._config_regions(statement.tokens)
+            for tokens in script.members.values():
+                self._config_regions(tokens)
+
+    def _config_regions(self, tokens):
+        """preload("...") followed by "region": Rect2(x, y, w, h) in texture config dictionaries"""
+        current = None
+        words = [t[1] for t in tokens]
+        for i, (kind, value, _) in enumerate(tokens):
+            if kind == 'name' and value in ('preload', 'load') and words[i + 1:i + 2] == ['('] \
+                    and i + 2 < len(tokens) and tokens[i + 2][0] == 'string':
+                current = self.texture(self.resolve(tokens[i + 2][1].strip('"\'')) or '')
+            elif current is not None and kind == 'string' and value.strip('"\'') == 'region':
+                rest = words[i + 1:i + 12]
+                if rest[:3] == [':', 'Rect2', '('] and len(rest) >= 11 and rest[10] == ')':
+                    numbers = rest[3:10:2]
+                    if all(tokens[i + 4 + k * 2][0] == 'number' for k in range(4)):
+                        current.regions.append(Rect2(*(float(n) for n in numbers)))
+                elif rest[:2] == [':', 'null']:
+                    current.whole = True
+
+    # -- sets -----------------------------------------------------------------
+
+    def closure(self, rels):
+        """Textures loaded by these scenes/scripts through ext_resources and preload()"""
+        found, stack, seen = set(), list(rels), set()
+        while stack:
+            rel = stack.pop()
+            if rel is None or rel in seen:
+                continue
+            seen.add(rel)
+            if self.texture(rel) is not None:
+                found.add(rel)
+            elif rel.endswith(('.tscn', '.tres')):
+                stack += [self.resolve(e.path) or self.resolve(e.uid)
+                          for e in self.index.scene(rel).ext_resources.values()]
+            elif rel.endswith('.gd'):
+                stack += [self.resolve(name) for _, _, name, _ in self.index.symbols(rel, 'preload')]
+                stack += [self.resolve(name) for _, _, name, _ in self.index.symbols(rel, 'load')]
+        return found
+
+    def scene_textures(self, rel):
+        if rel not in self._scenes:
+            model = StartupModel(self.index, rel, graph=self.graph, project=self.project)
+            self._scenes[rel] = {t for sub in model.subsystems.values() for t in sub.textures if self.texture(t)}
+        return self._scenes[rel]
+
+    def layers(self, rel):
+        """(layer node path, textures) of each parallax layer in scene `rel`"""
+        scene = self.index.scene(rel)
+        layers = []
+        for layer in scene.nodes:
+            if layer.type not in LAYER_TYPES:
+                continue
+            rels = []
+            for node in scene.nodes:
+                if node.path == layer.path or node.path.startswith(layer.path + '/'):
+                    for ext_id in _references(list(node.properties.values()), scene):
+                        ext = scene.ext_resources.get(ext_id)
+                        if ext is not None:
+                            rels.append(self.resolve(ext.path) or self.resolve(ext.uid))
+            layers.append((layer.path, self.closure(rels)))
+        return layers
+
+    def total(self, rels):
+        return sum(self.textures[r].resident for r in rels)
+
+    def wasted(self, rels):
+        return sum(self.textures[r].wasted for r in rels)
+
+
+def report(model, budget, top):
+    alive = model.graph.reachable()
+    scenes = sorted(rel for rel in model.index.files('tscn') if rel in alive)
+    print(f"Resident texture memory (budget {format_size(budget).strip()})\n")
+    print(f"{'scene / layer':52s} {'resident':>11s} {'wasted':>11s}  textures")
+    over = []
+    for rel in sorted(scenes, key=lambda r: -model.total(model.scene_textures(r))):
+        textures = model.scene_textures(rel)
+        if not textures:
+            continue
+        resident = model.total(textures)
+        flag = '  OVER BUDGET' if resident > budget else ''
+        if flag:
+            over.append(rel)
+        print(f"{rel:52s} {format_size(resident)} {format_size(model.wasted(textures))}  {len(textures):4d}{flag}")
+        for path, layer in model.layers(rel):
+            if layer:
+                share = model.total(layer) / budget
+                print(f"  {path:50s} {format_size(model.total(layer))} {format_size(model.wasted(layer))}"
+                      f"  {len(layer):4d}  {share:.0%} of budget")
+
+    loaded = set()
+    for rel in scenes:
+        loaded |= model.scene_textures(rel)
+    ranked = sorted(loaded, key=lambda r: (-model.textures[r].resident, -model.textures[r].wasted, r))
+    print(f"\nLargest textures (! = over {TEXTURE_SHARE:.0%} of budget or {WASTE_FLAG:.0%}+ wasted):")
+    print(f"  {'resident':>11s} {'wasted':>11s}  {'used':>5s} {'content':>7s}  size")
+    for rel in ranked[:top]:
+        texture = model.textures[rel]
+        used, content = texture.coverage()
+        flagged = texture.resident > budget * TEXTURE_SHARE or (1 - content) >= WASTE_FLAG
+        print(f"{'!' if flagged else ' '} {format_size(texture.resident)} {format_size(texture.wasted)}  "
+              f"{used:5.0%} {content:7.0%}  {texture.width}x{texture.height}  {rel}")
+
+    worst = sorted(loaded, key=lambda r: -model.textures[r].wasted)[:top]
+    print("\nMost wasted (outside regions or transparent):")
+    for rel in worst:
+        texture = model.textures[rel]
+        if texture.wasted:
+            print(f"  {format_size(texture.wasted)} of {format_size(texture.resident).strip()}  {rel}")
+    if over:
+        print(f"\n✗ {len(over)} scene(s) over the {format_size(budget).strip()} budget: {', '.join(over)}")
+    return 1 if over else 0
+
+
+def main():
+    args = sys.argv[1:]
+    top = int(args[args.index('--top') + 1]) if '--top' in args else TOP
+    if any(a.startswith('--') and a not in ('--budget', '--top') for a in args):
+        print(__doc__)
+        return 2
+    with ProjectIndex() as index:
+        model = VramModel(index)
+        return report(model, budget_bytes(args), top)
+
+
+if __name__ == "__main__":
+    sys.exit(main())